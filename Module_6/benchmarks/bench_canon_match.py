@@ -0,0 +1,98 @@
+"""
+Per-lookup latency of canonical-name fuzzy matching: difflib vs the index.
+
+Builds ``--queries`` lookups from the canonical university and program
+lists (exact names, lower-cased names and names with random typos), then
+times ``difflib.get_close_matches`` against
+:meth:`canon_match.CanonMatcher.best_match` at the cutoffs ``app.py`` uses,
+checking that both return the same match for every query.
+
+Usage::
+
+    python benchmarks/bench_canon_match.py --queries 500
+"""
+
+import argparse
+import difflib
+import random
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+LLM_DIR = BENCH_DIR.parent / "src" / "llm_hosting"
+if str(LLM_DIR) not in sys.path:
+    sys.path.insert(0, str(LLM_DIR))
+
+import canon_match  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def read_canon(name):
+    """Return the non-empty lines of a canonical list."""
+    with open(LLM_DIR / name, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def make_queries(rng, candidates, count):
+    """Return exact, lower-cased and misspelled variants of canonical names."""
+    queries = []
+    for _ in range(count):
+        text = rng.choice(candidates)
+        kind = rng.random()
+        if kind < 0.2:
+            queries.append(text)
+        elif kind < 0.4:
+            queries.append(text.lower())
+        else:
+            chars = list(text)
+            for _ in range(rng.randint(1, 3)):
+                chars[rng.randrange(len(chars))] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            queries.append("".join(chars))
+    return queries
+
+
+def per_lookup_us(lookup, queries):
+    """Return ``(results, microseconds per lookup)``."""
+    started = time.perf_counter()
+    results = [lookup(query) for query in queries]
+    return results, (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def bench_list(rng, canon_file, cutoff, count):
+    """Return ``(size, difflib_us, index_us, build_ms)`` for one list."""
+    candidates = read_canon(canon_file)
+    queries = make_queries(rng, candidates, count)
+    started = time.perf_counter()
+    matcher = canon_match.CanonMatcher(candidates)
+    build_ms = (time.perf_counter() - started) * 1000
+    expected, difflib_us = per_lookup_us(
+        lambda q: (difflib.get_close_matches(q, candidates, 1, cutoff) or [None])[0], queries
+    )
+    actual, index_us = per_lookup_us(lambda q: matcher.best_match(q, cutoff), queries)
+    if actual != expected:
+        raise SystemExit(f"{canon_file}: indexed matcher disagrees with difflib")
+    return len(candidates), difflib_us, index_us, build_ms
+
+
+def main(argv=None):
+    """Time both matchers per canonical list and verify identical results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500, help="lookups per list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    rng = random.Random(args.seed)
+
+    print(f"{'list':<13} {'size':>5} {'difflib_us':>11} {'index_us':>9} {'speedup':>8}")
+    for name, canon_file, cutoff in (
+        ("universities", "canon_universities.txt", 0.86),
+        ("programs", "canon_programs.txt", 0.84),
+    ):
+        size, difflib_us, index_us, build_ms = bench_list(rng, canon_file, cutoff, args.queries)
+        print(
+            f"{name:<13} {size:>5} {difflib_us:>11.1f} {index_us:>9.1f} "
+            f"{difflib_us / index_us:>7.1f}x  (index build {build_ms:.1f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark for the clean pipeline on a large synthetic scrape.
+
+Writes a synthetic ``applicant_data.json`` (1M rows by default) plus a
+master JSONL file holding every tenth URL, then runs the original
+list-based clean steps and the streaming :func:`clean.main` in separate
+child processes, reporting wall time and peak RSS for each. The LLM
+standardizer is skipped in both variants.
+
+Usage::
+
+    python benchmarks/bench_clean_pipeline.py --rows 1000000
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import clean  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def synthetic_row(index):
+    """Return one scraped record; every 50th row lacks a university."""
+    return {
+        "program_name": f"Program {index % 300}",
+        "university": "" if index % 50 == 0 else f"University {index % 700}",
+        "masters_or_phd": "PhD" if index % 2 else "Masters",
+        "comments": f"Synthetic comment number {index}",
+        "date_added": "February 01, 2026",
+        "url": f"https://www.thegradcafe.com/result/{index}",
+        "applicant_status": "Accepted",
+        "decision_date": "01 Feb",
+        "semester_year_start": "Fall 2026",
+        "citizenship": "International",
+        "gpa": "GPA 3.80",
+        "gre": None,
+        "gre_v": None,
+        "gre_aw": None,
+    }
+
+
+def write_inputs(directory, rows):
+    """Stream the synthetic scraped file and master file to ``directory``."""
+    scraped = clean.JsonArrayWriter(str(directory / "applicant_data.json"))
+    with open(directory / "master.jsonl", "w", encoding="utf-8") as master:
+        for index in range(rows):
+            row = synthetic_row(index)
+            scraped.write(row)
+            if index % 10 == 0:
+                master.write(json.dumps({"url": row["url"]}) + "\n")
+    scraped.close()
+
+
+def legacy_main():
+    """The original clean.main() steps, materializing every stage."""
+    raw_rows = clean.load_data(clean.SCRAPED_FILE)
+    cleaned_rows = clean.clean_data(raw_rows)
+    reordered_rows = [clean.reorder_data(row) for row in cleaned_rows]
+    clean.save_data(reordered_rows, clean.SCRAPED_FILE)
+    existing_urls = {row.get("url") for row in clean.load_rows(clean.MASTER_FILE) if row.get("url")}
+    new_rows = [
+        row for row in reordered_rows if row.get("url") and row.get("url") not in existing_urls
+    ]
+    if new_rows:
+        clean.save_json_list(new_rows, clean.NEW_INPUT_FILE)
+
+
+def run_variant(mode, directory):
+    """Run one variant in this process and print ``seconds peak_kib``."""
+    clean.SCRAPED_FILE = str(directory / "applicant_data.json")
+    clean.MASTER_FILE = str(directory / "master.jsonl")
+    clean.NEW_INPUT_FILE = str(directory / "new_applicant_data.json")
+    clean.run_llm_standardizer = lambda _in, _out: None
+    clean.append_jsonl = lambda *_args: None
+    started = time.perf_counter()
+    if mode == "legacy":
+        legacy_main()
+    else:
+        clean.main()
+    elapsed = time.perf_counter() - started
+    peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{elapsed:.3f} {peak_kib}")
+
+
+def main(argv=None):
+    """Generate the input once, then time each variant in a child process."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic rows")
+    parser.add_argument("--mode", choices=("legacy", "streaming"), help=argparse.SUPPRESS)
+    parser.add_argument("--dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.mode:
+        run_variant(args.mode, Path(args.dir))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        print(f"{'variant':<10} {'rows':>9} {'seconds':>9} {'peak_MiB':>9}")
+        for mode in ("legacy", "streaming"):
+            # Both variants rewrite the scraped file, so start from fresh input
+            write_inputs(directory, args.rows)
+            result = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--dir", tmp],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            seconds, peak_kib = result.stdout.split()[-2:]
+            print(f"{mode:<10} {args.rows:>9} {float(seconds):>9.2f} {int(peak_kib) / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
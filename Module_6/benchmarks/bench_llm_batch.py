@@ -0,0 +1,98 @@
+"""
+Standardizer throughput: one row per completion vs batched prompts.
+
+Standardizes ``--rows`` synthetic program strings through
+:func:`app.standardize_rows` once with ``batch_size=1`` (the original
+one-completion-per-row path) and once per ``--batch-sizes`` entry, then
+reports rows/s and completions issued for each.
+
+With ``--model simulated`` (the default) a stand-in model charges a fixed
+per-completion overhead plus a per-token cost for prompt and reply, which
+is the cost structure batching targets; ``--model real`` runs the GGUF
+model from ``app._load_llm()`` and needs ``llama-cpp-python``.
+
+Usage::
+
+    python benchmarks/bench_llm_batch.py --rows 200 --batch-sizes 4 8 16
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from llm_hosting import app  # noqa: E402  pylint: disable=wrong-import-position
+
+
+class SimulatedLlama:  # pylint: disable=too-few-public-methods
+    """Deterministic stand-in for ``llama_cpp.Llama`` with a latency model."""
+
+    def __init__(self, call_s, token_s):
+        self.call_s = call_s
+        self.token_s = token_s
+        self.calls = 0
+
+    def create_chat_completion(self, messages, **_kwargs):
+        """Answer object or array prompts, sleeping for the modelled cost."""
+        self.calls += 1
+        request = json.loads(messages[-1]["content"])
+        items = request if isinstance(request, list) else [request]
+        results = []
+        for item in items:
+            program, _, university = item["program"].partition(", ")
+            results.append(
+                {"standardized_program": program, "standardized_university": university}
+            )
+        reply = json.dumps(results if isinstance(request, list) else results[0])
+        prompt_chars = sum(len(message["content"]) for message in messages)
+        # Rough 4-characters-per-token estimate for prompt and reply
+        time.sleep(self.call_s + self.token_s * (prompt_chars + len(reply)) / 4)
+        return {"choices": [{"message": {"content": reply}}]}
+
+
+def time_batch_size(rows, batch_size):
+    """Return seconds spent standardizing ``rows`` at ``batch_size``."""
+    started = time.perf_counter()
+    for _ in app.standardize_rows(({"program": text} for text in rows), batch_size):
+        pass
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    """Time the per-row path against each batch size and print rows/s."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200, help="program strings to standardize")
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[4, 8, 16], help="batch sizes to compare"
+    )
+    parser.add_argument("--model", choices=("simulated", "real"), default="simulated")
+    parser.add_argument("--call-ms", type=float, default=20.0, help="simulated per-call cost")
+    parser.add_argument("--token-ms", type=float, default=0.5, help="simulated per-token cost")
+    args = parser.parse_args(argv)
+
+    if args.model == "real":
+        llm = app._load_llm()  # pylint: disable=protected-access
+        if llm is None:
+            raise SystemExit("llama-cpp-python is not installed")
+    else:
+        llm = SimulatedLlama(args.call_ms / 1000, args.token_ms / 1000)
+        app._LLM_CACHE["instance"] = llm  # pylint: disable=protected-access
+    rows = [f"Program {i % 40}, University {i % 90}" for i in range(args.rows)]
+
+    print(f"model: {args.model}")
+    print(f"{'batch':>5} {'seconds':>9} {'rows_per_s':>11} {'calls':>6}")
+    for batch_size in [1, *args.batch_sizes]:
+        calls_before = getattr(llm, "calls", 0)
+        seconds = time_batch_size(rows, batch_size)
+        calls = getattr(llm, "calls", 0) - calls_before
+        print(f"{batch_size:>5} {seconds:>9.3f} {len(rows) / seconds:>11.1f} {calls or '-':>6}")
+
+
+if __name__ == "__main__":
+    main()
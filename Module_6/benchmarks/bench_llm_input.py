@@ -0,0 +1,73 @@
+"""
+Benchmark for standardizer CLI input: ``json.load`` vs streamed parsing.
+
+Writes a JSON array of ``--rows`` synthetic rows and, for the old
+``json.load`` path and :func:`json_stream.iter_rows`, reports the time to
+the first row, the time to read every row and the peak traced memory.
+
+Usage::
+
+    python benchmarks/bench_llm_input.py --rows 200000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+LLM_DIR = BENCH_DIR.parent / "src" / "llm_hosting"
+if str(LLM_DIR) not in sys.path:
+    sys.path.insert(0, str(LLM_DIR))
+
+import json_stream  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def load_all(path):
+    """Yield rows after loading the whole document (the old CLI path)."""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
+
+def stream(path):
+    """Yield rows as :func:`json_stream.iter_rows` parses them."""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from json_stream.iter_rows(f)
+
+
+def measure(reader, path):
+    """Return ``(first_row_s, total_s, peak_mib)`` for one full read."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = reader(path)
+    next(rows)
+    first_s = time.perf_counter() - started
+    for _ in rows:
+        pass
+    total_s = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_s, total_s, peak / (1 << 20)
+
+
+def main(argv=None):
+    """Compare first-row latency and peak memory for both readers."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="rows in the input file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "in.json"
+        row = {"program": "Computer Science, McGill University", "comments": "x" * 80}
+        path.write_text(json.dumps([dict(row, url=f"u{i}") for i in range(args.rows)]))
+        print(f"{'reader':<10} {'first_row_s':>11} {'total_s':>8} {'peak_mib':>9}")
+        for name, reader in (("json.load", load_all), ("stream", stream)):
+            first_s, total_s, peak = measure(reader, path)
+            print(f"{name:<10} {first_s:>11.4f} {total_s:>8.3f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
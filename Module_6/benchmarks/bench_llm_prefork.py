@@ -0,0 +1,112 @@
+"""
+Worker memory: N separately started servers vs N pre-forked workers.
+
+Starts ``app.py --serve`` ``--workers`` times (each process loads its own
+model, the current per-process load) and then ``app.py --serve --prefork
+N`` (the model is loaded once and shared copy-on-write), waits until
+every server is ready and reads ``/proc/<pid>/smaps_rollup`` for each
+worker. RSS counts shared pages in every worker; PSS splits them between
+the workers, so the PSS total is the memory the workers really cost.
+Without llama.cpp installed this measures the Flask app and canonical
+indexes only. Linux only.
+
+Usage::
+
+    python benchmarks/bench_llm_prefork.py --workers 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+LLM_DIR = BENCH_DIR.parent / "src" / "llm_hosting"
+if str(LLM_DIR) not in sys.path:
+    sys.path.insert(0, str(LLM_DIR))
+
+import prefork  # noqa: E402  pylint: disable=wrong-import-position,import-error
+
+
+def start_server(port, *extra):
+    """Start ``app.py --serve`` on ``port``."""
+    env = dict(os.environ, PORT=str(port))
+    return subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "app.py", "--serve", *extra],
+        cwd=LLM_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(port, timeout=600):
+    """Poll ``/ready`` until it answers 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"server on port {port} did not become ready")
+
+
+def report(label, pids):
+    """Print per-worker RSS/PSS and the totals for one mode."""
+    stats = [prefork.memory_kb(pid) for pid in pids]
+    for pid, stat in zip(pids, stats):
+        print(
+            f"{label:<10} {pid:>8} {stat.get('rss_kb', 0) / 1024:>9.1f} "
+            f"{stat.get('pss_kb', 0) / 1024:>9.1f}"
+        )
+    rss = sum(stat.get("rss_kb", 0) for stat in stats) / 1024
+    pss = sum(stat.get("pss_kb", 0) for stat in stats) / 1024
+    print(f"{label:<10} {'total':>8} {rss:>9.1f} {pss:>9.1f}")
+    return pss
+
+
+def main(argv=None):
+    """Measure both modes with the same worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    parser.add_argument("--port", type=int, default=18500, help="first port to use")
+    args = parser.parse_args(argv)
+
+    print(f"{'mode':<10} {'pid':>8} {'rss_mib':>9} {'pss_mib':>9}")
+    ports = [args.port + i for i in range(args.workers)]
+    servers = [start_server(port) for port in ports]
+    try:
+        for port in ports:
+            wait_ready(port)
+        separate = report("separate", [server.pid for server in servers])
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    parent = start_server(args.port, "--prefork", str(args.workers))
+    try:
+        deadline = time.monotonic() + 600
+        while len(prefork.child_pids(parent.pid)) < args.workers:
+            if time.monotonic() > deadline or parent.poll() is not None:
+                raise SystemExit("pre-fork server did not start its workers")
+            time.sleep(0.2)
+        # Every worker must have evaluated its prompts, not just the first
+        for _ in range(4 * args.workers):
+            wait_ready(args.port)
+        forked = report("prefork", prefork.child_pids(parent.pid))
+    finally:
+        parent.terminate()
+        parent.wait()
+    print(f"PSS saved by pre-forking: {separate - forked:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-pull standardizer cost: subprocess CLI vs in-process vs socket daemon.
+
+Runs :func:`clean.run_llm_standardizer` for ``--pulls`` consecutive pulls
+of a small synthetic batch in each mode and reports the first (cold) and
+the average later (warm) pull. The subprocess mode pays interpreter
+start-up, the Flask import, the canonical-list reads and the model load
+on every pull; the other modes pay them once per process.
+
+The in-process rows are what the web UI's "Pull Data" pays:
+``website.run_pull_pipeline`` calls ``clean.main()`` inside the web
+process, so only its first pull loads the model. Running ``clean.py`` as
+a fresh process per pull (as the pipeline used to) costs about as much
+as the subprocess cold pull every time.
+
+Usage::
+
+    python benchmarks/bench_llm_startup.py --pulls 5 --rows 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import clean  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def time_pulls(mode, input_file, output_file, pulls):
+    """Return per-pull seconds for ``pulls`` runs in ``mode``."""
+    timings = []
+    for _ in range(pulls):
+        started = time.perf_counter()
+        clean.run_llm_standardizer(input_file, output_file, mode=mode)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def start_daemon(sock_path):
+    """Start ``app.py --socket`` and wait until it accepts connections."""
+    daemon = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, clean.LLM_APP, "--socket", sock_path],
+        cwd=clean.LLM_DIR,
+    )
+    deadline = time.monotonic() + 60
+    while not os.path.exists(sock_path):
+        if time.monotonic() > deadline or daemon.poll() is not None:
+            daemon.kill()
+            raise SystemExit("standardizer daemon did not start")
+        time.sleep(0.05)
+    return daemon
+
+
+def main(argv=None):
+    """Time every mode on the same input and print cold/warm costs."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pulls", type=int, default=5, help="pulls per mode")
+    parser.add_argument("--rows", type=int, default=20, help="rows per pull")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "new_applicant_data.json")
+        output_file = os.path.join(tmp, "llm_new_applicant.json")
+        rows = [{"program": f"Computer Science, University {i}"} for i in range(args.rows)]
+        with open(input_file, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+
+        results = {}
+        results["subprocess"] = time_pulls("subprocess", input_file, output_file, args.pulls)
+        results["inprocess"] = time_pulls("inprocess", input_file, output_file, args.pulls)
+
+        clean.LLM_STANDARDIZER_SOCKET = os.path.join(tmp, "std.sock")
+        daemon = start_daemon(clean.LLM_STANDARDIZER_SOCKET)
+        try:
+            results["socket"] = time_pulls("socket", input_file, output_file, args.pulls)
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+    print(f"{'mode':<11} {'cold_s':>8} {'warm_s':>8}")
+    for mode, timings in results.items():
+        warm = sum(timings[1:]) / max(1, len(timings) - 1)
+        print(f"{mode:<11} {timings[0]:>8.3f} {warm:>8.4f}")
+    saved = results["subprocess"][1:] or results["subprocess"]
+    in_process = results["inprocess"][1:] or results["inprocess"]
+    print(
+        "start-up saved per pull (in-process vs subprocess): "
+        f"{sum(saved) / len(saved) - sum(in_process) / len(in_process):.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for the scraper's HTML parser backends.
+
+Builds a synthetic GradCafe results page (or reads one from disk), parses it
+repeatedly with each available backend and reports rows parsed per second.
+
+Usage::
+
+    python benchmarks/bench_scrape_parsers.py --rows 2000 --repeat 5
+    python benchmarks/bench_scrape_parsers.py --page tests/data/scrape_pages/survey_page.html
+"""
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import scrape  # noqa: E402  pylint: disable=wrong-import-position
+
+ROW_TEMPLATE = (
+    "<tr><td><div><img src='/logo.png'><div>University {n}</div></div></td>"
+    "<td><div><span>Computer Science</span><svg><path d='M0 0'/></svg>"
+    "<span>PhD</span></div></td><td>January {day}, 2026</td>"
+    "<td><div>Accepted on {day} Jan</div></td>"
+    "<td><a href='/result/{n}'>See More</a><a href='/survey/?q={n}'>Report</a></td></tr>"
+    "<tr class='tw-border-none'><td colspan='3'><div><div>Fall 2026</div>"
+    "<div>International</div><div>GPA 3.{day}</div><div>GRE 3{day}</div>"
+    "<div>GRE V 16{last}</div><div>GRE AW 4.5</div></div></td></tr>"
+    "<tr class='tw-border-none'><td colspan='3'><p>Comment &amp; notes for {n}</p></td></tr>"
+)
+
+
+def synthetic_page(rows):
+    """Return a results page with ``rows`` applicants (three table rows each)."""
+    body = "".join(
+        ROW_TEMPLATE.format(n=n, day=n % 28 + 1, last=n % 10) for n in range(rows)
+    )
+    return (
+        "<html><head><script>var x = 1;</script></head><body>"
+        f"<table><thead><tr><th>School</th></tr></thead><tbody>{body}</tbody></table>"
+        "<footer><p>footer</p></footer></body></html>"
+    )
+
+
+def available_backends():
+    """Return the backends that can run in this environment."""
+    backends = ["html.parser", "stream"]
+    if importlib.util.find_spec("lxml") is not None:
+        backends.insert(1, "lxml")
+    return backends
+
+
+def bench(html, backend, repeat):
+    """Parse ``html`` ``repeat`` times and return (records, best seconds)."""
+    best = float("inf")
+    records = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        records = scrape.parse_html(html, backend)
+        best = min(best, time.perf_counter() - started)
+    return records, best
+
+
+def main(argv=None):
+    """Run the benchmark and print one line per backend."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="synthetic applicants")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per backend (best kept)")
+    parser.add_argument("--page", help="parse this HTML file instead of a synthetic page")
+    args = parser.parse_args(argv)
+
+    html = Path(args.page).read_text(encoding="utf-8") if args.page else synthetic_page(args.rows)
+    baseline = None
+    print(f"{'backend':<12} {'records':>8} {'best_s':>9} {'rows/s':>11} {'speedup':>8}")
+    for backend in available_backends():
+        records, seconds = bench(html, backend, args.repeat)
+        if baseline is None:
+            baseline = (records, seconds)
+        elif records != baseline[0]:
+            raise SystemExit(f"{backend} records differ from html.parser")
+        rate = len(records) / seconds if seconds else float("inf")
+        print(
+            f"{backend:<12} {len(records):>8} {seconds:>9.4f} {rate:>11.0f} "
+            f"{baseline[1] / seconds if seconds else float('inf'):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark for per-row token classification in the scraper.
+
+Parses a synthetic results page with the current precompiled, cached
+classifiers and again with the original per-call ``re.match`` helpers
+swapped in, and reports the per-row parse cost of each.
+
+Usage::
+
+    python benchmarks/bench_scrape_rows.py --rows 2000 --repeat 5 --backend stream
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+for path in (BENCH_DIR, SRC_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import scrape  # noqa: E402  pylint: disable=wrong-import-position
+from bench_scrape_parsers import synthetic_page  # noqa: E402  pylint: disable=wrong-import-position
+
+# lru-cached helpers, emptied before every run so each pass starts cold
+CACHED_HELPERS = (scrape._parse_decision, scrape._detail_field)  # pylint: disable=protected-access
+
+
+def legacy_parse_decision(decision_text):
+    """Original decision parser, compiling its patterns on every call."""
+    if not decision_text:
+        return None, None
+    normalized = re.sub(r"\s+", " ", decision_text).strip()
+    match = re.match(
+        r"^(?P<status>.+?)(?:\s+on\s+(?P<date>.+))?$",
+        normalized,
+        flags=re.IGNORECASE,
+    )
+    if not match:
+        return None, None
+    status = match.group("status").strip()
+    decision_date = match.group("date").strip() if match.group("date") else None
+    return status, decision_date
+
+
+def legacy_apply_detail_text(record, text):
+    """Original detail classifier, trying up to six patterns in turn."""
+    if re.match(r"^(Fall|Spring|Summer|Winter)\s+\d{4}$", text):
+        record["semester_year_start"] = text
+        return
+    if text in ("American", "International"):
+        record["citizenship"] = text
+        return
+    if re.match(r"^GPA\s+[\d.]+$", text):
+        record["gpa"] = text
+        return
+    if re.match(r"^GRE\s+AW\s+[\d.]+$", text):
+        record["gre_aw"] = text
+        return
+    if re.match(r"^GRE\s+V\s+\d+$", text):
+        record["gre_v"] = text
+        return
+    if re.match(r"^GRE\s+\d+$", text):
+        record["gre"] = text
+
+
+def timed_rows(document, repeat):
+    """Return (records, best seconds) for scrape_data over a parsed document."""
+    best = float("inf")
+    records = []
+    for _ in range(repeat):
+        for helper in CACHED_HELPERS:
+            helper.cache_clear()
+        started = time.perf_counter()
+        records = scrape.scrape_data(document)
+        best = min(best, time.perf_counter() - started)
+    return records, best
+
+
+def main(argv=None):
+    """Run both variants on the same parsed page and print per-row costs."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000, help="synthetic applicants")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per variant (best kept)")
+    parser.add_argument("--backend", default="stream", help="parser backend for the page")
+    args = parser.parse_args(argv)
+
+    # Parse once so only the row logic is timed
+    document = scrape.make_soup(synthetic_page(args.rows), args.backend)
+    current, current_s = timed_rows(document, args.repeat)
+
+    saved = (scrape._parse_decision, scrape._apply_detail_text)  # pylint: disable=protected-access
+    scrape._parse_decision = legacy_parse_decision  # pylint: disable=protected-access
+    scrape._apply_detail_text = legacy_apply_detail_text  # pylint: disable=protected-access
+    try:
+        legacy, legacy_s = timed_rows(document, args.repeat)
+    finally:
+        scrape._parse_decision, scrape._apply_detail_text = saved  # pylint: disable=protected-access
+
+    if legacy != current:
+        raise SystemExit("legacy and current classifiers disagree")
+    rows = len(current) or 1
+    print(f"{'variant':<10} {'rows':>6} {'best_s':>9} {'us/row':>9}")
+    print(f"{'legacy':<10} {len(legacy):>6} {legacy_s:>9.4f} {legacy_s / rows * 1e6:>9.1f}")
+    print(f"{'current':<10} {len(current):>6} {current_s:>9.4f} {current_s / rows * 1e6:>9.1f}")
+    print(f"speedup: {legacy_s / current_s:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
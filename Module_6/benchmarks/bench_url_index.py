@@ -0,0 +1,74 @@
+"""
+Benchmark for master-file URL dedupe: full rescan vs the SQLite index.
+
+Builds a JSONL master file with ``--history`` rows, indexes it once, then
+appends ``--new`` rows and times a full ``load_rows`` URL-set rebuild
+against :meth:`clean_index.UrlIndex.sync`, plus a lookup pass for a
+batch of scraped URLs.
+
+Usage::
+
+    python benchmarks/bench_url_index.py --history 1000000 --new 1000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+import clean  # noqa: E402  pylint: disable=wrong-import-position
+import clean_index  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def append_rows(path, start, count):
+    """Append ``count`` master rows with URLs numbered from ``start``."""
+    with open(path, "a", encoding="utf-8") as f:
+        for index in range(start, start + count):
+            f.write(json.dumps({"program": "CS, Test U", "url": f"u{index}"}) + "\n")
+
+
+def timed(func):
+    """Return ``(result, seconds)`` for one call."""
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    """Time rescans and incremental syncs after a small append."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, default=1_000_000, help="rows already in master")
+    parser.add_argument("--new", type=int, default=1000, help="rows appended per run")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        master = Path(tmp) / "master.jsonl"
+        append_rows(master, 0, args.history)
+        index = clean_index.UrlIndex(str(master))
+        _, build_s = timed(index.sync)
+
+        append_rows(master, args.history, args.new)
+        batch = [f"u{i}" for i in range(args.history - args.new, args.history + args.new)]
+        known, rescan_s = timed(
+            lambda: {row.get("url") for row in clean.load_rows(str(master)) if row.get("url")}
+        )
+        _, rescan_lookup_s = timed(lambda: sum(url in known for url in batch))
+        _, sync_s = timed(index.sync)
+        _, index_lookup_s = timed(lambda: sum(url in index for url in batch))
+        index.close()
+
+    print(f"initial index build ({args.history} rows): {build_s:.3f}s")
+    print(f"{'variant':<8} {'refresh_s':>10} {'lookup_s':>9}")
+    print(f"{'rescan':<8} {rescan_s:>10.3f} {rescan_lookup_s:>9.4f}")
+    print(f"{'index':<8} {sync_s:>10.3f} {index_lookup_s:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
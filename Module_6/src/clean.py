@@ -5,11 +5,20 @@ This module prepares scraped rows for analysis and optional LLM-based
 standardization, producing both cleaned JSON and JSONL outputs.
 """
 
+import importlib
 import json
 import os
+import socket
 import subprocess
 import sys
 
+try:
+    from . import clean_index
+    from .llm_hosting import json_stream
+except ImportError:  # pragma: no cover - script execution path
+    import clean_index
+    from llm_hosting import json_stream
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Save file name for easy reference
@@ -20,10 +29,25 @@ NEW_LLM_FILE = os.path.join(BASE_DIR, "llm_new_applicant.json")
 LLM_DIR = os.path.join(BASE_DIR, "llm_hosting")
 LLM_APP = os.path.join(LLM_DIR, "app.py")
 
+# How the standardizer runs: "inprocess" imports llm_hosting/app.py once per
+# process, "socket" talks to a long-lived `app.py --socket` daemon (falling
+# back to in-process when it is not running), "subprocess" runs the CLI.
+LLM_STANDARDIZER_MODE = os.getenv("LLM_STANDARDIZER_MODE", "inprocess")
+LLM_STANDARDIZER_MODES = ("inprocess", "socket", "subprocess")
+LLM_STANDARDIZER_SOCKET = os.getenv("LLM_STANDARDIZER_SOCKET") or os.path.join(
+    LLM_DIR, "standardizer.sock"
+)
+_STANDARDIZER = {"module": None}
+
 
 # Options for missing data
 UNAVAILABLE = {"", "n/a", "na", "none", "null", "nan"}
 
+# Characters read per refill when streaming a JSON array
+READ_CHUNK_SIZE = 1 << 16
+# Rows encoded per write when streaming a JSON array out
+WRITE_BATCH_ROWS = 1000
+
 
 def load_data(file):
     """
@@ -36,36 +60,61 @@ def load_data(file):
         return json.load(f)
 
 
-def load_rows(file_path):
+def iter_json_array(f, chunk_size=READ_CHUNK_SIZE):
     """
-    Load rows from a JSON array file or JSONL file.
+    Yield the items of a JSON array one at a time.
+
+    Parsing is shared with the standardizer's input reader
+    (:func:`llm_hosting.json_stream.iter_array`), so memory stays bounded
+    by the largest single item rather than the whole array.
+
+    :param f: Text file object positioned before the array.
+    :param chunk_size: Characters read per refill.
+    :raises ValueError: If the input is not a complete JSON array.
+    """
+    return json_stream.iter_array(f, chunk_size)
+
+
+def iter_rows(file_path):
+    """
+    Stream rows from a JSON array file or JSONL file.
 
     :param file_path: Path to a JSON array or JSONL file.
-    :returns: A list of dicts. Returns [] if the file is missing or empty.
+    :returns: Iterator of dicts; nothing is yielded if the file is missing
+        or empty.
     """
     if not os.path.exists(file_path):
-        return []
+        return
 
     with open(file_path, "r", encoding="utf-8") as f:
         first_non_ws = ""
         while True:
             ch = f.read(1)
             if ch == "":
-                return []
+                return
             if not ch.isspace():
                 first_non_ws = ch
                 break
         f.seek(0)
         if first_non_ws == "[":
-            return json.load(f)
+            yield from iter_json_array(f)
+            return
 
-        rows = []
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            rows.append(json.loads(line))
-        return rows
+            yield json.loads(line)
+
+
+def load_rows(file_path):
+    """
+    Load rows from a JSON array file or JSONL file.
+
+    :param file_path: Path to a JSON array or JSONL file.
+    :returns: A list of dicts. Returns [] if the file is missing or empty.
+    """
+    return list(iter_rows(file_path))
 
 
 def is_missing(value):
@@ -88,19 +137,16 @@ def is_missing(value):
     return False
 
 
-def clean_data(rows):
+def iter_clean_data(rows, stats=None):
     """
-    Build a combined "program" field and drop invalid rows.
+    Lazily build the "program" field and drop invalid rows.
 
     :param rows: Iterable of raw records.
-    :returns: A new list of records with a "program" field added. Rows missing
-        program_name or university are removed.
+    :param stats: Optional dict whose ``"removed"`` count is incremented for
+        every row missing program_name or university.
+    :returns: Iterator of new records with a "program" field added.
     """
 
-    # Initialize list
-    cleaned = []
-    remove = 0
-
     # Loop through each record
     for row in rows:
 
@@ -110,7 +156,8 @@ def clean_data(rows):
 
         # remove cases where program name or university is missing (not valid)
         if is_missing(program_name) or is_missing(university):
-            remove += 1
+            if stats is not None:
+                stats["removed"] = stats.get("removed", 0) + 1
             continue
 
         # Combine into a program field
@@ -119,9 +166,21 @@ def clean_data(rows):
         # Add the new field into the record
         new_row = dict(row)
         new_row["program"] = program
-        cleaned.append(new_row)
+        yield new_row
+
+
+def clean_data(rows):
+    """
+    Build a combined "program" field and drop invalid rows.
+
+    :param rows: Iterable of raw records.
+    :returns: A new list of records with a "program" field added. Rows missing
+        program_name or university are removed.
+    """
 
-    print("Records removed due to missing program/university:", remove)
+    stats = {"removed": 0}
+    cleaned = list(iter_clean_data(rows, stats))
+    print("Records removed due to missing program/university:", stats["removed"])
     # Return the list of cleaned records
     return cleaned
 
@@ -148,6 +207,88 @@ def save_json_list(rows, file):
         json.dump(rows, f, indent=2)
 
 
+class JsonArrayWriter:
+    """
+    Incremental writer for a JSON array file.
+
+    Rows are buffered in batches of ``batch_rows`` and written in the same
+    layout as ``json.dump(rows, f, indent=2)``; encoding a batch at a time
+    keeps the encoder's per-call setup off the per-row path. Output goes to
+    ``<path>.tmp`` and only replaces ``path`` on :meth:`close`, so a file
+    can be rewritten while it is still being read and a failed run leaves
+    the original intact.
+    """
+
+    def __init__(self, path, batch_rows=WRITE_BATCH_ROWS):
+        self.path = path
+        self.count = 0
+        self.batch_rows = max(1, int(batch_rows))
+        self._batch = []
+        self._started = False
+        self._tmp_path = f"{path}.tmp"
+        self._handle = open(self._tmp_path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def write(self, row):
+        """Append one row to the array."""
+        self._batch.append(row)
+        self.count += 1
+        if len(self._batch) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        """Encode the buffered rows as the next slice of the array."""
+        if not self._batch:
+            return
+        self._handle.write(",\n" if self._started else "[\n")
+        # Drop the batch's own "[\n" and "\n]" to splice it into the array
+        self._handle.write(json.dumps(self._batch, indent=2)[2:-2])
+        self._started = True
+        self._batch = []
+
+    def close(self):
+        """Finish the array and move it into place."""
+        self._flush()
+        self._handle.write("\n]" if self.count else "[]")
+        self._handle.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Drop the partial output, leaving ``path`` untouched."""
+        self._handle.close()
+        os.remove(self._tmp_path)
+
+
+def write_through(rows, writer):
+    """
+    Write each row to ``writer`` and pass it on.
+
+    :param rows: Iterable of records.
+    :param writer: :class:`JsonArrayWriter` receiving every row.
+    """
+    for row in rows:
+        writer.write(row)
+        yield row
+
+
+def dedupe_by_url(rows, known_urls):
+    """
+    Yield rows whose URL is neither known nor already yielded.
+
+    Rows without a URL are dropped because they cannot be matched against
+    the master file later.
+
+    :param rows: Iterable of records.
+    :param known_urls: Container of URLs already in the master file, such
+        as a set or :class:`clean_index.UrlIndex`.
+    """
+    batch_urls = set()
+    for row in rows:
+        url = row.get("url")
+        if url and url not in batch_urls and url not in known_urls:
+            batch_urls.add(url)
+            yield row
+
+
 def reorder_data(row):
     """
     Reorder keys so "program" appears first and output matches the example format.
@@ -173,35 +314,114 @@ def reorder_data(row):
     }
 
 
-def run_llm_standardizer(input_file, output_file):
+def load_standardizer():
     """
-    Run the LLM standardizer CLI to produce JSONL output.
+    Import the LLM standardizer module once per process.
 
-    :param input_file: Path to JSON array input for the LLM.
-    :param output_file: Destination JSONL output path.
+    Flask, the canonical name lists and (on first use) the model stay
+    loaded in this process for every later call.
+
+    :returns: The ``llm_hosting.app`` module.
     """
+    if _STANDARDIZER["module"] is None:
+        package = f"{__package__}." if __package__ else ""
+        _STANDARDIZER["module"] = importlib.import_module(f"{package}llm_hosting.app")
+    return _STANDARDIZER["module"]
+
+
+def _run_standardizer_cli(input_file, output_file):
+    """Run the standardizer CLI in a child process (the original path)."""
     input_path = os.path.abspath(input_file)
     output_path = os.path.abspath(output_file)
+    base_dir = os.path.dirname(input_path)
+    if os.path.dirname(output_path) != base_dir:
+        raise ValueError("Standardizer input and output must share a directory.")
+    # The CLI only accepts bare filenames under LLM_IO_BASE_DIR
     subprocess.run(
         [
             sys.executable,
             LLM_APP,
             "--file",
-            input_path,
+            os.path.basename(input_path),
             "--out",
-            output_path,
+            os.path.basename(output_path),
         ],
         cwd=LLM_DIR,
+        env={**os.environ, "LLM_IO_BASE_DIR": base_dir},
         check=True,
     )
 
 
-def append_jsonl(src_file, dest_file):
+def _standardize_via_socket(rows, conn):
+    """
+    Standardize rows through a connected standardizer daemon.
+
+    Rows are sent one line at a time and each reply is read before the
+    next row is sent, so neither side can block on a full buffer.
+
+    :param rows: Iterable of records.
+    :param conn: Connected Unix socket.
+    :raises RuntimeError: If the daemon reports a row error.
+    """
+    with conn, conn.makefile("rwb") as stream:
+        for row in rows:
+            stream.write(json.dumps(row).encode("utf-8") + b"\n")
+            stream.flush()
+            reply = json.loads(stream.readline())
+            if "error" in reply:
+                raise RuntimeError(f"Standardizer daemon error: {reply['error']}")
+            yield reply
+
+
+def _connect_standardizer(path):
+    """Return a socket connected to the daemon at ``path``, or None."""
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        print(f"Standardizer daemon not reachable at {path}; running in-process.")
+        return None
+    return conn
+
+
+def run_llm_standardizer(input_file, output_file, mode=None):
+    """
+    Standardize a JSON array file into JSONL output.
+
+    :param input_file: Path to JSON array input for the LLM.
+    :param output_file: Destination JSONL output path (overwritten).
+    :param mode: One of :data:`LLM_STANDARDIZER_MODES`; defaults to
+        ``LLM_STANDARDIZER_MODE``.
+    :raises ValueError: If the mode is unknown.
+    """
+    mode = mode or LLM_STANDARDIZER_MODE
+    if mode not in LLM_STANDARDIZER_MODES:
+        raise ValueError(f"Unknown standardizer mode: {mode}")
+    if mode == "subprocess":
+        _run_standardizer_cli(input_file, output_file)
+        return
+
+    rows = iter_rows(input_file)
+    conn = _connect_standardizer(LLM_STANDARDIZER_SOCKET) if mode == "socket" else None
+    if conn is not None:
+        rows = _standardize_via_socket(rows, conn)
+    else:
+        rows = load_standardizer().standardize_rows(rows)
+    with open(output_file, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write("\n")
+
+
+def append_jsonl(src_file, dest_file, url_index=None):
     """
     Append JSONL rows to a destination file.
 
     :param src_file: JSONL source file.
     :param dest_file: JSONL destination file (created if missing).
+    :param url_index: Optional :class:`clean_index.UrlIndex` over
+        ``dest_file``; it is synced with the appended lines afterwards.
     """
     if not os.path.exists(src_file):
         return
@@ -215,47 +435,70 @@ def append_jsonl(src_file, dest_file):
             if not line:
                 continue
             dest.write(line + "\n")
+    if url_index is not None:
+        url_index.sync()
+
+
+def _write_new_rows(known_urls):
+    """
+    Stream scraped rows through cleaning into the scraped and LLM input files.
+
+    :param known_urls: URLs already in the master file.
+    :returns: Number of new rows written to ``NEW_INPUT_FILE`` (0 leaves
+        that file untouched).
+    """
+    stats = {"removed": 0}
+    scraped_out = JsonArrayWriter(SCRAPED_FILE)
+    new_out = JsonArrayWriter(NEW_INPUT_FILE)
+    try:
+        rows = iter_clean_data(iter_rows(SCRAPED_FILE), stats)
+        rows = write_through(map(reorder_data, rows), scraped_out)
+        for row in dedupe_by_url(rows, known_urls):
+            new_out.write(row)
+    except BaseException:
+        scraped_out.discard()
+        new_out.discard()
+        raise
+
+    print("Records removed due to missing program/university:", stats["removed"])
+    # Save the reordered rows over the scraped JSON file
+    scraped_out.close()
+    if new_out.count:
+        new_out.close()
+    else:
+        new_out.discard()
+    return new_out.count
 
 
 def main():
     """
     Orchestrate the clean + LLM pipeline.
 
-    Steps:
-        1. Load scraped rows.
+    Rows stream through generator stages one at a time, so memory stays
+    flat:
+
+        1. Stream scraped rows.
         2. Clean and add the "program" field.
-        3. Reorder fields and overwrite the scraped JSON file.
-        4. Deduplicate by URL against the LLM master file.
+        3. Reorder fields and rewrite the scraped JSON file.
+        4. Deduplicate by URL against the LLM master file (and the batch).
         5. Run the LLM standardizer for new rows only.
         6. Append new JSONL rows to the master file.
-    """
-
-    # Load the original JSON file
-    raw_rows = load_data(SCRAPED_FILE)
-    # Clean and add new program field
-    cleaned_rows = clean_data(raw_rows)
-    # Match format of example output
-    reordered_rows = [reorder_data(row) for row in cleaned_rows]
-    # Save as a new JSON file
-    save_data(reordered_rows, SCRAPED_FILE)
 
-    existing_urls = {
-        row.get("url")
-        for row in load_rows(MASTER_FILE)
-        if row.get("url")
-    }
-    new_rows = [
-        row
-        for row in reordered_rows
-        if row.get("url") and row.get("url") not in existing_urls
-    ]
-    if not new_rows:
-        print("No new rows to add to LLM output.")
-        return
+    Master file URLs are looked up in a :class:`clean_index.UrlIndex`
+    sidecar that only reads lines appended since the previous run.
+    """
 
-    save_json_list(new_rows, NEW_INPUT_FILE)
-    run_llm_standardizer(NEW_INPUT_FILE, NEW_LLM_FILE)
-    append_jsonl(NEW_LLM_FILE, MASTER_FILE)
+    url_index = clean_index.UrlIndex(MASTER_FILE)
+    try:
+        url_index.sync()
+        if not _write_new_rows(url_index):
+            print("No new rows to add to LLM output.")
+            return
+
+        run_llm_standardizer(NEW_INPUT_FILE, NEW_LLM_FILE)
+        append_jsonl(NEW_LLM_FILE, MASTER_FILE, url_index)
+    finally:
+        url_index.close()
 
 
 # Run only if executed directly
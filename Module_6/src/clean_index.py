@@ -0,0 +1,154 @@
+"""
+Persistent URL index for the append-only LLM master file.
+
+The master JSONL file only ever grows, so rebuilding a set of every URL on
+each clean run costs time proportional to history. This SQLite sidecar keeps
+the URLs together with the byte offset already indexed; a sync only parses
+lines appended since then, and falls back to a full rebuild if the master
+file was truncated or rewritten.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+
+# Bytes before the indexed offset hashed to detect a rewritten master file
+FINGERPRINT_BYTES = 4096
+# URLs inserted per executemany() call while indexing
+INSERT_BATCH_ROWS = 1000
+
+
+def _line_url(line, strict=True):
+    """
+    Return the ``url`` of one JSONL line, or None.
+
+    :param line: Raw line bytes.
+    :param strict: Raise on invalid JSON; otherwise treat it as a torn line.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line).get("url")
+    except ValueError:
+        if strict:
+            raise
+        return None
+
+
+class UrlIndex:
+    """
+    SQLite set of the URLs in a JSONL master file.
+
+    Besides the URLs, the index stores how many bytes of the master file it
+    covers, that file's mtime and a hash of the bytes just before the
+    offset. :meth:`sync` uses them to index only newly appended lines, or
+    to rebuild from scratch when the covered prefix changed.
+    """
+
+    def __init__(self, master_path, index_path=None):
+        self.master_path = master_path
+        self.index_path = index_path or f"{os.path.splitext(master_path)[0]}.urls.sqlite"
+        self._conn = sqlite3.connect(self.index_path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY) WITHOUT ROWID")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), "
+            "byte_offset INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, fingerprint TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __contains__(self, url):
+        row = self._conn.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def _fingerprint(self, offset):
+        """Hash the bytes of the master file just before ``offset``."""
+        start = max(0, offset - FINGERPRINT_BYTES)
+        with open(self.master_path, "rb") as f:
+            f.seek(start)
+            return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    def _resume_offset(self, stat):
+        """
+        Return the offset to index from, or None when already current.
+
+        ``0`` means the stored URLs no longer describe the file's prefix.
+        """
+        state = self._conn.execute(
+            "SELECT byte_offset, mtime_ns, fingerprint FROM state WHERE id = 0"
+        ).fetchone()
+        if state is None or stat is None:
+            return 0
+        offset, mtime_ns, fingerprint = state
+        if (offset, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            return None
+        if offset <= stat.st_size and self._fingerprint(offset) == fingerprint:
+            return offset
+        return 0
+
+    def sync(self):
+        """
+        Index master file lines appended since the last sync.
+
+        :returns: Number of lines read from the master file.
+        """
+        try:
+            stat = os.stat(self.master_path)
+        except FileNotFoundError:
+            stat = None
+        offset = self._resume_offset(stat)
+        if offset is None:
+            return 0
+        if offset == 0:
+            self._conn.execute("DELETE FROM urls")
+        lines = 0
+        if stat is not None:
+            offset, lines = self._index_from(offset)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state (id, byte_offset, mtime_ns, fingerprint) "
+            "VALUES (0, ?, ?, ?)",
+            (
+                offset,
+                stat.st_mtime_ns if stat is not None else 0,
+                self._fingerprint(offset) if stat is not None else "",
+            ),
+        )
+        self._conn.commit()
+        return lines
+
+    def _index_from(self, offset):
+        """
+        Insert URLs from the lines after ``offset``; return ``(end, lines)``.
+
+        A final line without a newline may still be mid-write: its URL is
+        indexed if it parses, but ``end`` stops before it so the next sync
+        reads it again.
+        """
+        batch = []
+        lines = 0
+        insert = "INSERT OR IGNORE INTO urls (url) VALUES (?)"
+        with open(self.master_path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                complete = line.endswith(b"\n")
+                if complete:
+                    offset += len(line)
+                    lines += 1
+                url = _line_url(line, strict=complete)
+                if url:
+                    batch.append((url,))
+                if len(batch) >= INSERT_BATCH_ROWS:
+                    self._conn.executemany(insert, batch)
+                    batch = []
+        self._conn.executemany(insert, batch)
+        return offset, lines
+
+    def close(self):
+        """Close the SQLite connection."""
+        self._conn.close()
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+# pylint: disable=too-many-lines
 """Flask + tiny local LLM standardizer with incremental JSONL CLI output.
 
 This module exposes an HTTP API and CLI that standardize program/university
@@ -7,16 +8,50 @@ names using a tiny local LLM, with deterministic fallbacks when needed.
 
 from __future__ import annotations
 
+import hashlib
+import io
 import json
 import logging
 import os
 import re
+import socket
+import socketserver
 import sys
-import difflib
+import threading
+import time
+from concurrent.futures import Future
 from contextlib import nullcontext
-from typing import Any, Dict, List, Tuple
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.serving import make_server
+
+try:
+    from . import (
+        canon_match,
+        constrained_json,
+        fast_path,
+        json_stream,
+        memo_cache,
+        ordered_pool,
+        prefix_cache,
+        prefork,
+        serving,
+        startup,
+    )
+except ImportError:  # pragma: no cover - script execution path
+    import canon_match
+    import constrained_json
+    import fast_path
+    import json_stream
+    import memo_cache
+    import ordered_pool
+    import prefix_cache
+    import prefork
+    import serving
+    import startup
 
 try:
     from huggingface_hub import hf_hub_download
@@ -28,9 +63,16 @@ try:
 except ImportError:  # pragma: no cover - optional dependency path
     Llama = None
 
+try:
+    from waitress import serve as waitress_serve
+except ImportError:  # pragma: no cover - optional dependency path
+    waitress_serve = None
+
 app = Flask(__name__)
 LOGGER = logging.getLogger(__name__)
 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # ---------------- Model config ----------------
 MODEL_REPO = os.getenv(
     "MODEL_REPO",
@@ -41,17 +83,67 @@ MODEL_FILE = os.getenv(
     "tinyllama-1.1b-chat-v1.0.Q4_K_M.gguf",
 )
 
+# GGUF download directory; absolute so library callers share one copy
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.join(APP_DIR, "models"))
+
 N_THREADS = int(os.getenv("N_THREADS", str(os.cpu_count() or 2)))
 N_CTX = int(os.getenv("N_CTX", "2048"))
 N_GPU_LAYERS = int(os.getenv("N_GPU_LAYERS", "0"))  # 0 → CPU-only
+# Map the GGUF file instead of reading it into private memory ("0" → off);
+# pre-forked workers (`--serve --prefork N`) then share the weights
+LLM_USE_MMAP = os.getenv("LLM_USE_MMAP", "1") != "0"
 STANDARDIZE_MAX_ROWS = int(os.getenv("STANDARDIZE_MAX_ROWS", "100"))
 STANDARDIZE_MAX_PROGRAM_CHARS = int(os.getenv("STANDARDIZE_MAX_PROGRAM_CHARS", "512"))
-
-CANON_UNIS_PATH = os.getenv("CANON_UNIS_PATH", "canon_universities.txt")
-CANON_PROGS_PATH = os.getenv("CANON_PROGS_PATH", "canon_programs.txt")
+# Accept/Content-Type of streamed /standardize requests (no row cap)
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Request body limits (413 when exceeded): buffered JSON requests, streamed
+# NDJSON requests, and any single row of a streamed request (JSON characters)
+STANDARDIZE_MAX_BODY_BYTES = int(os.getenv("STANDARDIZE_MAX_BODY_BYTES", str(1 << 20)))
+STANDARDIZE_MAX_STREAM_BYTES = int(os.getenv("STANDARDIZE_MAX_STREAM_BYTES", str(1 << 30)))
+STANDARDIZE_MAX_ROW_CHARS = int(os.getenv("STANDARDIZE_MAX_ROW_CHARS", str(1 << 16)))
+app.config["MAX_CONTENT_LENGTH"] = STANDARDIZE_MAX_BODY_BYTES
+# Program strings packed into one prompt by the batched API (1 → per-row)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))
+# Completion budget per row in a batched prompt
+LLM_BATCH_TOKENS_PER_ROW = int(os.getenv("LLM_BATCH_TOKENS_PER_ROW", "48"))
+
+# Rows handed to a worker process per task by the CLI's --workers mode
+LLM_WORKER_CHUNK_ROWS = int(os.getenv("LLM_WORKER_CHUNK_ROWS", "64"))
+
+# Restore the evaluated few-shot prefix from a llama.cpp state snapshot ("0" → off)
+LLM_PREFIX_CACHE = os.getenv("LLM_PREFIX_CACHE", "1") != "0"
+# Constrain replies to the result JSON schema with a grammar ("0" → free text)
+LLM_CONSTRAINED_JSON = os.getenv("LLM_CONSTRAINED_JSON", "1") != "0"
+
+# Serving pool (`--serve --pool N`, 0 → off): model instances, batching
+# window, and rows admitted before /standardize answers 429
+LLM_POOL_INSTANCES = int(os.getenv("LLM_POOL_INSTANCES", "0"))
+LLM_POOL_MAX_WAIT_MS = float(os.getenv("LLM_POOL_MAX_WAIT_MS", "5"))
+LLM_POOL_MAX_QUEUE = int(os.getenv("LLM_POOL_MAX_QUEUE", "256"))
+# Request threads for the production (waitress) server
+LLM_SERVE_THREADS = int(os.getenv("LLM_SERVE_THREADS", "16"))
+# Load the model(s), evaluate the prompts and build the canon indexes before
+# serving, reporting readiness on /ready ("0" → load lazily on first use)
+LLM_WARMUP = os.getenv("LLM_WARMUP", "1") != "0"
+WARMUP_PROGRAM = "Mathematics, McGill University"
+
+# Resolve already-canonical "Program, University" strings without the model ("0" → off)
+LLM_RULE_FAST_PATH = os.getenv("LLM_RULE_FAST_PATH", "1") != "0"
+
+# Persistent memo of standardized program strings; MAX_ROWS=0 disables it
+LLM_MEMO_PATH = os.getenv("LLM_MEMO_PATH") or os.path.join(APP_DIR, "standardize.memo.sqlite")
+LLM_MEMO_MAX_ROWS = int(os.getenv("LLM_MEMO_MAX_ROWS", "100000"))
+# Bump when the rules-based fallback/normalizers change their output
+MEMO_RULES_VERSION = 1
+
+# Canonical lists default to this directory so imports work from any cwd
+CANON_UNIS_PATH = os.getenv("CANON_UNIS_PATH", os.path.join(APP_DIR, "canon_universities.txt"))
+CANON_PROGS_PATH = os.getenv("CANON_PROGS_PATH", os.path.join(APP_DIR, "canon_programs.txt"))
 
 # Precompiled, non-greedy JSON object matcher to tolerate chatter around JSON
 JSON_OBJ_RE = re.compile(r"\{.*?\}", re.DOTALL)
+# Greedy JSON array matcher for batched replies
+JSON_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
 SAFE_FILENAME_RE = re.compile(r"^[A-Za-z0-9._-]+$")
 
 # ---------------- Canonical lists + abbrev maps ----------------
@@ -149,37 +241,119 @@ FEW_SHOTS: List[Tuple[Dict[str, str], Dict[str, str]]] = [
     ),
 ]
 
-_LLM_CACHE: Dict[str, Any] = {"instance": None}
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT + (
+    "\nThe input may instead be a JSON array of such objects. Then return a "
+    "JSON array ONLY, with exactly one result object per input, in the same "
+    "order.\n"
+)
+
+
+def _few_shot_messages(system_prompt: str, batched: bool) -> List[Dict[str, str]]:
+    """Build the system + few-shot chat prefix shared by every request.
+
+    :param system_prompt: System message text.
+    :param batched: If True, present the few-shots as one array example.
+    :returns: List of chat messages.
+    """
+    messages = [{"role": "system", "content": system_prompt}]
+    pairs = [([x_in for x_in, _ in FEW_SHOTS], [x_out for _, x_out in FEW_SHOTS])]
+    for x_in, x_out in pairs if batched else FEW_SHOTS:
+        messages.append({"role": "user", "content": json.dumps(x_in, ensure_ascii=False)})
+        messages.append({"role": "assistant", "content": json.dumps(x_out, ensure_ascii=False)})
+    return messages
+
+
+# Prompt prefixes are identical for every row, so build them once
+FEW_SHOT_MESSAGES = _few_shot_messages(SYSTEM_PROMPT, batched=False)
+BATCH_FEW_SHOT_MESSAGES = _few_shot_messages(BATCH_SYSTEM_PROMPT, batched=True)
+
+# n_threads: llama.cpp threads, lowered to a worker's share by --workers
+_LLM_CACHE: Dict[str, Any] = {"instance": None, "n_threads": N_THREADS}
+# llama.cpp state snapshots of the few-shot prefix, valid for the cached model only
+_PREFIX_CACHE = prefix_cache.PrefixCache()
+_PREFIX_STATES = _PREFIX_CACHE.states
+# Prompt-eval accounting for the prefix cache (see prefix_cache_stats())
+_PREFIX_STATS = _PREFIX_CACHE.counters
+# Generated tokens and rule fallbacks of model replies (see /metrics)
+_DECODE = constrained_json.DecodeStats()
+# llama.cpp contexts are not thread-safe; the Flask dev server is threaded
+_LLM_LOCK = threading.Lock()
+# Serving-pool threads bind their own model and prefix cache here
+_THREAD_MODEL = threading.local()
 
 
 def _load_llm() -> Any:
-    """Download (or reuse) the GGUF file and initialize llama.cpp.
+    """Return this thread's pool model, or the cached shared model.
 
-    :returns: A cached :class:`llama_cpp.Llama` instance, or ``None`` when
+    :returns: A :class:`llama_cpp.Llama` instance, or ``None`` when
         optional LLM runtime dependencies are not installed.
     """
+    bound_llm = getattr(_THREAD_MODEL, "llm", None)
+    if bound_llm is not None:
+        return bound_llm
     cached_llm = _LLM_CACHE["instance"]
     if cached_llm is not None:
         return cached_llm
 
+    llm = _new_llm()
+    if llm is not None:
+        _LLM_CACHE["instance"] = llm
+        _PREFIX_STATES.clear()
+    return llm
+
+
+def _new_llm() -> Any:
+    """Download (or reuse) the GGUF file and initialize a new llama.cpp model.
+
+    :returns: A new :class:`llama_cpp.Llama` instance, or ``None`` when
+        optional LLM runtime dependencies are not installed.
+    """
     if Llama is None or hf_hub_download is None:
         return None
 
     model_path = hf_hub_download(
         repo_id=MODEL_REPO,
         filename=MODEL_FILE,
-        local_dir="models",
+        local_dir=MODEL_DIR,
     )
 
-    llm = Llama(
+    return Llama(
         model_path=model_path,
         n_ctx=N_CTX,
-        n_threads=N_THREADS,
+        n_threads=_LLM_CACHE["n_threads"],
         n_gpu_layers=N_GPU_LAYERS,
+        use_mmap=LLM_USE_MMAP,
         verbose=False,
     )
-    _LLM_CACHE["instance"] = llm
-    return llm
+
+
+def _chat_completion(llm: Any, messages: List[Dict[str, str]], rows: int, **kwargs: Any) -> Any:
+    """Run a chat completion under the model lock, reusing the prefix KV cache.
+
+    See :meth:`prefix_cache.PrefixCache.complete`; ``LLM_PREFIX_CACHE=0``
+    turns the snapshots off.
+
+    :param llm: Loaded model.
+    :param messages: Chat messages, shared prefix first.
+    :param rows: Rows standardized by this call (for per-row accounting).
+    :param kwargs: Passed to ``create_chat_completion``.
+    :returns: The completion response.
+    """
+    bound_cache = getattr(_THREAD_MODEL, "prefix", None)
+    if bound_cache is not None:
+        # A pool model is only ever used by the thread it is bound to
+        return bound_cache.complete(llm, messages, rows, LLM_PREFIX_CACHE, **kwargs)
+    with _LLM_LOCK:
+        return _PREFIX_CACHE.complete(llm, messages, rows, LLM_PREFIX_CACHE, **kwargs)
+
+
+def prefix_cache_stats() -> Dict[str, float]:
+    """Report how many prompt-eval tokens the prefix cache saved.
+
+    :returns: Totals for calls, rows, prompt tokens and reused tokens, plus
+        ``tokens_saved_per_row``.
+    """
+    return _PREFIX_CACHE.stats()
 
 
 def _split_fallback(text: str) -> Tuple[str, str]:
@@ -211,8 +385,25 @@ def _split_fallback(text: str) -> Tuple[str, str]:
     return prog, uni
 
 
+# Matchers per canonical list object; the lists are built once at import
+_MATCHERS: Dict[int, Tuple[List[str], canon_match.CanonMatcher]] = {}
+
+
+def _matcher(candidates: List[str]) -> canon_match.CanonMatcher:
+    """Return the (cached) :class:`canon_match.CanonMatcher` for a list.
+
+    :param candidates: Candidate list, e.g. ``CANON_UNIS``.
+    :returns: Matcher indexing ``candidates``.
+    """
+    entry = _MATCHERS.get(id(candidates))
+    if entry is None or entry[0] is not candidates:
+        entry = (candidates, canon_match.CanonMatcher(candidates))
+        _MATCHERS[id(candidates)] = entry
+    return entry[1]
+
+
 def _best_match(name: str, candidates: List[str], cutoff: float = 0.86) -> str | None:
-    """Fuzzy match via difflib (lightweight, no extra deps).
+    """Fuzzy match with the same result as ``difflib.get_close_matches``.
 
     :param name: Name to match.
     :param candidates: Candidate list.
@@ -221,8 +412,7 @@ def _best_match(name: str, candidates: List[str], cutoff: float = 0.86) -> str |
     """
     if not name or not candidates:
         return None
-    matches = difflib.get_close_matches(name, candidates, n=1, cutoff=cutoff)
-    return matches[0] if matches else None
+    return _matcher(candidates).best_match(name, cutoff)
 
 
 def _post_normalize_program(prog: str) -> str:
@@ -234,80 +424,91 @@ def _post_normalize_program(prog: str) -> str:
     p = (prog or "").strip()
     p = COMMON_PROG_FIXES.get(p, p)
     p = p.title()
-    if p in CANON_PROGS:
+    if p in _matcher(CANON_PROGS):
         return p
     match = _best_match(p, CANON_PROGS, cutoff=0.84)
     return match or p
 
 
+def _expand_university(uni: str) -> str:
+    """Expand ``ABBREV_UNI`` abbreviations, then apply ``COMMON_UNI_FIXES``.
+
+    :param uni: Stripped university text.
+    :returns: Expanded university text.
+    """
+    for pat, full in ABBREV_UNI.items():
+        if re.fullmatch(pat, uni):
+            uni = full
+            break
+    return COMMON_UNI_FIXES.get(uni, uni)
+
+
+_FAST_PATH = fast_path.RuleFastPath(lambda p: COMMON_PROG_FIXES.get(p, p), _expand_university)
+
+
 def _post_normalize_university(uni: str) -> str:
     """Expand abbreviations, apply fixes, and canonical/fuzzy mapping.
 
     :param uni: Raw university text.
     :returns: Normalized university name.
     """
-    u = (uni or "").strip()
-
-    # Abbreviations
-    for pat, full in ABBREV_UNI.items():
-        if re.fullmatch(pat, u):
-            u = full
-            break
-
-    # Common spelling fixes
-    u = COMMON_UNI_FIXES.get(u, u)
+    u = _expand_university((uni or "").strip())
 
     # Normalize 'Of' → 'of'
     if u:
         u = re.sub(r"\bOf\b", "of", u.title())
 
     # Canonical or fuzzy map
-    if u in CANON_UNIS:
+    if u in _matcher(CANON_UNIS):
         return u
     match = _best_match(u, CANON_UNIS, cutoff=0.86)
     return match or u or "Unknown"
 
 
+def _constrained_kwargs(count: int | None) -> Dict[str, Any]:
+    """Return the completion kwargs that constrain the reply's JSON shape.
+
+    :param count: Rows in a batched prompt, or None for one row.
+    :returns: ``response_format`` kwargs, or none with
+        ``LLM_CONSTRAINED_JSON=0``.
+    """
+    if not LLM_CONSTRAINED_JSON:
+        return {}
+    return {"response_format": constrained_json.response_format(count)}
+
+
 def _call_llm(program_text: str) -> Dict[str, str]:
     """Query the tiny LLM and return standardized fields.
 
+    Unless ``LLM_CONSTRAINED_JSON=0`` the reply is grammar-constrained to
+    the result object, so it parses as-is and generation stops at its
+    closing brace.
+
     :param program_text: Raw program text.
     :returns: Dict with standardized program/university fields.
     """
     llm = _load_llm()
     if llm is None:
-        std_prog, std_uni = _split_fallback(program_text)
-        std_prog = _post_normalize_program(std_prog)
-        std_uni = _post_normalize_university(std_uni)
-        return {
-            "standardized_program": std_prog,
-            "standardized_university": std_uni,
-        }
+        return _fallback_result(program_text)
 
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for x_in, x_out in FEW_SHOTS:
-        messages.append(
-            {"role": "user", "content": json.dumps(x_in, ensure_ascii=False)}
-        )
-        messages.append(
-            {
-                "role": "assistant",
-                "content": json.dumps(x_out, ensure_ascii=False),
-            }
-        )
-    messages.append(
+    messages = [
+        *FEW_SHOT_MESSAGES,
         {
             "role": "user",
             "content": json.dumps({"program": program_text}, ensure_ascii=False),
-        }
-    )
+        },
+    ]
 
+    out = None
     try:
-        out = llm.create_chat_completion(
-            messages=messages,
+        out = _chat_completion(
+            llm,
+            messages,
+            1,
             temperature=0.0,
             max_tokens=128,
             top_p=1.0,
+            **_constrained_kwargs(None),
         )
 
         text = (out["choices"][0]["message"]["content"] or "").strip()
@@ -315,8 +516,10 @@ def _call_llm(program_text: str) -> Dict[str, str]:
         obj = json.loads(match.group(0) if match else text)
         std_prog = str(obj.get("standardized_program", "")).strip()
         std_uni = str(obj.get("standardized_university", "")).strip()
+        _DECODE.record(1, constrained_json.completion_tokens(out), 0)
     except (*LLM_OUTPUT_PARSE_ERRORS, *STANDARDIZE_ROW_ERRORS):
-        std_prog, std_uni = _split_fallback(program_text)
+        _DECODE.record(1, constrained_json.completion_tokens(out), 1)
+        return _fallback_result(program_text)
 
     std_prog = _post_normalize_program(std_prog)
     std_uni = _post_normalize_university(std_uni)
@@ -326,6 +529,451 @@ def _call_llm(program_text: str) -> Dict[str, str]:
     }
 
 
+class RuleResult(dict):
+    """Standardized fields produced by the rules instead of a model reply.
+
+    Model callers return these for rows the model could not answer, so
+    the memo can tell degraded results apart and not persist them.
+    """
+
+
+def _fallback_result(program_text: str) -> Dict[str, str]:
+    """Standardize one program string with the rules-only parser.
+
+    :param program_text: Raw program text.
+    :returns: :class:`RuleResult` with standardized program/university fields.
+    """
+    std_prog, std_uni = _split_fallback(program_text)
+    return RuleResult(
+        standardized_program=_post_normalize_program(std_prog),
+        standardized_university=_post_normalize_university(std_uni),
+    )
+
+
+def _parse_batch_reply(text: str, count: int) -> List[Dict[str, str] | None]:
+    """Extract up to ``count`` result objects from a batched reply.
+
+    :param text: Raw completion text.
+    :param count: Number of inputs in the batch.
+    :returns: One entry per input; None where the item is missing/invalid.
+    """
+    results: List[Dict[str, str] | None] = [None] * count
+    try:
+        match = JSON_ARRAY_RE.search(text)
+        items = json.loads(match.group(0) if match else text)
+    except LLM_OUTPUT_PARSE_ERRORS:
+        return results
+    if not isinstance(items, list):
+        return results
+    for index, item in enumerate(items[:count]):
+        if not isinstance(item, dict):
+            continue
+        std_prog = str(item.get("standardized_program") or "").strip()
+        std_uni = str(item.get("standardized_university") or "").strip()
+        if std_prog:
+            results[index] = {
+                "standardized_program": std_prog,
+                "standardized_university": std_uni,
+            }
+    return results
+
+
+def _call_llm_batch(program_texts: List[str]) -> List[Dict[str, str]]:
+    """Standardize several program strings with one chat completion.
+
+    The strings go in as a JSON array and the model answers with an array
+    in the same order (grammar-constrained to exactly that many result
+    objects unless ``LLM_CONSTRAINED_JSON=0``). Items the reply does not
+    cover (or covers with invalid objects) fall back to
+    :func:`_split_fallback` individually; a failed request falls back for
+    the whole batch.
+
+    :param program_texts: Raw program texts.
+    :returns: One standardized dict per input, in order; rule fallbacks
+        are :class:`RuleResult` instances.
+    """
+    if len(program_texts) <= 1:
+        return [_call_llm(text) for text in program_texts]
+    llm = _load_llm()
+    if llm is None:
+        return [_fallback_result(text) for text in program_texts]
+
+    payload = [{"program": text} for text in program_texts]
+    messages = [
+        *BATCH_FEW_SHOT_MESSAGES,
+        {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+    ]
+    out = None
+    try:
+        out = _chat_completion(
+            llm,
+            messages,
+            len(program_texts),
+            temperature=0.0,
+            max_tokens=LLM_BATCH_TOKENS_PER_ROW * len(program_texts),
+            top_p=1.0,
+            **_constrained_kwargs(len(program_texts)),
+        )
+        text = (out["choices"][0]["message"]["content"] or "").strip()
+        parsed = _parse_batch_reply(text, len(program_texts))
+    except STANDARDIZE_ROW_ERRORS:
+        LOGGER.exception("Batched standardization failed; using rules for the batch")
+        parsed = [None] * len(program_texts)
+    _DECODE.record(
+        len(program_texts),
+        constrained_json.completion_tokens(out),
+        parsed.count(None),
+    )
+
+    results = []
+    for program_text, item in zip(program_texts, parsed):
+        if item is None:
+            results.append(_fallback_result(program_text))
+            continue
+        results.append(
+            {
+                "standardized_program": _post_normalize_program(item["standardized_program"]),
+                "standardized_university": _post_normalize_university(
+                    item["standardized_university"]
+                ),
+            }
+        )
+    return results
+
+
+def _memo_key(program_text: str) -> str:
+    """Normalize a program string into its memo key (collapsed whitespace).
+
+    :param program_text: Raw program text.
+    :returns: Normalized text.
+    """
+    return " ".join(program_text.split())
+
+
+def _llm_runtime() -> bool:
+    """Whether the optional LLM runtime is installed (else rules only)."""
+    return bool(Llama and hf_hub_download)
+
+
+def memo_version() -> str:
+    """Fingerprint everything a memoized result depends on.
+
+    Covers the backend (the model, or the rules-only backend when the LLM
+    runtime is missing), the prompts and few-shots, the decoding settings
+    that change model replies (constrained JSON, batch size, token budget,
+    context size), the canonical lists and the rule tables, so changing
+    any of them invalidates the memo.
+
+    :returns: Hex digest identifying the current standardizer.
+    """
+    backend: Any = "rules"
+    if _llm_runtime():
+        backend = {
+            "model": f"{MODEL_REPO}/{MODEL_FILE}",
+            "constrained_json": LLM_CONSTRAINED_JSON,
+            "batch_size": LLM_BATCH_SIZE,
+            "batch_tokens_per_row": LLM_BATCH_TOKENS_PER_ROW,
+            "n_ctx": N_CTX,
+        }
+    parts = [
+        MEMO_RULES_VERSION,
+        backend,
+        SYSTEM_PROMPT,
+        BATCH_SYSTEM_PROMPT,
+        FEW_SHOTS,
+        CANON_UNIS,
+        CANON_PROGS,
+        ABBREV_UNI,
+        COMMON_UNI_FIXES,
+        COMMON_PROG_FIXES,
+    ]
+    return hashlib.sha1(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+_MEMO: Dict[str, Any] = {"cache": None}
+
+
+def _memo_cache() -> memo_cache.MemoCache | None:
+    """Open (once) the memo configured by ``LLM_MEMO_PATH``/``LLM_MEMO_MAX_ROWS``.
+
+    :returns: The shared :class:`memo_cache.MemoCache`, or ``None`` when disabled.
+    """
+    if LLM_MEMO_MAX_ROWS <= 0:
+        return None
+    if _MEMO["cache"] is None:
+        _MEMO["cache"] = memo_cache.MemoCache(LLM_MEMO_PATH, memo_version(), LLM_MEMO_MAX_ROWS)
+    return _MEMO["cache"]
+
+
+def _standardize_texts(program_texts: List[str]) -> List[Dict[str, str]]:
+    """Standardize program strings, resolving canonical ones by rules first.
+
+    Strings whose program and university halves are already canonical are
+    answered by :data:`_FAST_PATH` (unless ``LLM_RULE_FAST_PATH=0``); the
+    rest go through :func:`_standardize_unresolved`.
+
+    :param program_texts: Raw program texts.
+    :returns: One standardized dict per input, in order.
+    """
+    if not LLM_RULE_FAST_PATH:
+        return _standardize_unresolved(program_texts)
+    results = _FAST_PATH.resolve_many(program_texts, _matcher(CANON_PROGS), _matcher(CANON_UNIS))
+    pending = [text for text, result in zip(program_texts, results) if result is None]
+    computed = iter(_standardize_unresolved(pending) if pending else [])
+    return [result or next(computed) for result in results]
+
+
+def _standardize_unresolved(program_texts: List[str]) -> List[Dict[str, str]]:
+    """Standardize program strings with the model, serving repeats from the memo.
+
+    Only distinct strings missing from the memo reach the model (batched
+    through :func:`_call_llm_batch`). Real model replies are memoized;
+    rule fallbacks (:class:`RuleResult`, e.g. after a failed model call)
+    are returned but not stored, so the model is asked again next time.
+    Without the LLM runtime the rules are the backend, so their results
+    are memoized under the ``"rules"`` version.
+
+    :param program_texts: Raw program texts.
+    :returns: One standardized dict per input, in order.
+    """
+    memo = _memo_cache()
+    if memo is None:
+        return _call_llm_batch(program_texts)
+    keys = [_memo_key(text) for text in program_texts]
+    found = memo.get_many(keys)
+    missing = [key for key in dict.fromkeys(keys) if key not in found]
+    if missing:
+        computed = dict(zip(missing, _call_llm_batch(missing)))
+        rules_backend = not _llm_runtime()
+        memo.put_many(
+            {
+                key: result
+                for key, result in computed.items()
+                if rules_backend or not isinstance(result, RuleResult)
+            }
+        )
+        found.update(computed)
+    return [dict(found[key]) for key in keys]
+
+
+def standardize_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the LLM-generated program/university fields to one row in place.
+
+    :param row: Row with a ``program`` field.
+    :returns: The same row, for chaining.
+    """
+    program_text = (row or {}).get("program") or ""
+    result = _standardize_texts([program_text])[0]
+    row["llm-generated-program"] = result["standardized_program"]
+    row["llm-generated-university"] = result["standardized_university"]
+    return row
+
+
+def standardize_rows(
+    rows: Iterable[Dict[str, Any]],
+    batch_size: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Lazily standardize rows; the library entry point used by ``clean.py``.
+
+    Rows are standardized ``batch_size`` at a time through the memo and
+    :func:`_call_llm_batch`. The model and canonical lists are loaded once
+    per process, so repeated calls only pay for inference.
+
+    :param rows: Iterable of rows with a ``program`` field.
+    :param batch_size: Rows per prompt (defaults to ``LLM_BATCH_SIZE``).
+    :returns: Iterator of standardized rows, in input order.
+    """
+    size = max(1, LLM_BATCH_SIZE if batch_size is None else batch_size)
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        texts = [(row or {}).get("program") or "" for row in batch]
+        for row, result in zip(batch, _standardize_texts(texts)):
+            row["llm-generated-program"] = result["standardized_program"]
+            row["llm-generated-university"] = result["standardized_university"]
+            yield row
+
+
+_POOL: Dict[str, Any] = {"pool": None, "models": []}
+_STARTUP = startup.Startup()
+
+
+def _run_pool_batch(
+    instance: Tuple[Any, prefix_cache.PrefixCache],
+    program_texts: List[str],
+) -> List[Dict[str, str]]:
+    """Standardize one micro-batch on a pool thread's own model instance.
+
+    :param instance: ``(model, prefix cache)`` owned by the calling thread.
+    :param program_texts: Program strings coalesced from concurrent requests.
+    :returns: One standardized dict per input, in order.
+    """
+    _THREAD_MODEL.llm, _THREAD_MODEL.prefix = instance
+    return _standardize_texts(program_texts)
+
+
+def start_pool(instances: int) -> serving.MicroBatchPool:
+    """Load ``instances`` models and route ``/standardize`` through a pool.
+
+    Each instance gets an even share of ``N_THREADS`` and its own prefix
+    cache; rows from concurrent requests are coalesced into batches of up
+    to ``LLM_BATCH_SIZE``. An already running pool is closed first.
+
+    :param instances: Model instances (one worker thread each).
+    :returns: The running :class:`serving.MicroBatchPool`.
+    """
+    if _POOL["pool"] is not None:
+        _POOL["pool"].close()
+    _LLM_CACHE["n_threads"] = max(1, N_THREADS // instances)
+    models = [(_new_llm(), prefix_cache.PrefixCache()) for _ in range(instances)]
+    limits = serving.BatchLimits(
+        max_batch=max(1, LLM_BATCH_SIZE),
+        max_wait_s=LLM_POOL_MAX_WAIT_MS / 1000.0,
+        max_queue=LLM_POOL_MAX_QUEUE,
+    )
+    _POOL["models"] = models
+    _POOL["pool"] = serving.MicroBatchPool(models, _run_pool_batch, limits)
+    return _POOL["pool"]
+
+
+def _warm_model(llm: Any, cache: prefix_cache.PrefixCache | None) -> None:
+    """Evaluate the per-row and batched prompts once on one model.
+
+    This pays the first-call cost up front and leaves a prefix snapshot
+    for both prompts, so the first real request only evaluates its rows.
+
+    :param llm: Loaded model.
+    :param cache: The model's own prefix cache, or None for the shared one.
+    """
+    _THREAD_MODEL.llm, _THREAD_MODEL.prefix = llm, cache
+    try:
+        _call_llm_batch([WARMUP_PROGRAM])
+        _call_llm_batch([WARMUP_PROGRAM, WARMUP_PROGRAM])
+    finally:
+        _THREAD_MODEL.llm = _THREAD_MODEL.prefix = None
+
+
+def _warm_prompts(models: List[Tuple[Any, prefix_cache.PrefixCache | None]]) -> None:
+    """Run :func:`_warm_model` on each loaded model as the ``prompt`` phase.
+
+    :param models: ``(model, prefix cache)`` pairs; None models are skipped.
+    """
+    with _STARTUP.phase("prompt"):
+        for llm, cache in models:
+            if llm is not None:
+                _warm_model(llm, cache)
+
+
+def warmup(pool_instances: int = 0, evaluate: bool = True) -> Dict[str, Any]:
+    """Prepare everything a request needs, timing each phase.
+
+    Phases: ``canon_index`` (canonical-name matchers), ``model_load``
+    (download and load the model, or ``pool_instances`` models via
+    :func:`start_pool`) and ``prompt`` (:func:`_warm_model` on each
+    model). ``/ready`` answers 503 and ``/standardize`` is refused until
+    this returns. Every exit records ``ready`` or ``failed``; a failed
+    warmup is reported on ``/ready`` and ``/metrics``, and the model is
+    then loaded lazily on the next request, as with ``LLM_WARMUP=0``.
+
+    :param pool_instances: Model instances in the serving pool (0 → none).
+    :param evaluate: Run the ``prompt`` phase; :func:`serve_prefork` runs
+        it in each worker instead.
+    :returns: :meth:`startup.Startup.status` after warmup.
+    """
+    _STARTUP.begin()
+    error: str | None = "warmup did not complete"
+    try:
+        with _STARTUP.phase("canon_index"):
+            _matcher(CANON_PROGS)
+            _matcher(CANON_UNIS)
+        with _STARTUP.phase("model_load"):
+            if pool_instances > 0:
+                start_pool(pool_instances)
+                models = _POOL["models"]
+            else:
+                models = [(_load_llm(), None)]
+        if evaluate:
+            _warm_prompts(models)
+        error = None
+    except STANDARDIZE_ROW_ERRORS as exc:
+        LOGGER.exception("Warmup failed; the model will be loaded on first use")
+        error = str(exc) or type(exc).__name__
+    finally:
+        _STARTUP.finish(error)
+    status = _STARTUP.status()
+    LOGGER.info("Warmup %s in %.2fs: %s", status["state"], status["total_s"], status["phases_s"])
+    return status
+
+
+def serve_http(port: int, pool_instances: int = 0) -> None:
+    """Run the HTTP API.
+
+    Without a pool this is the Flask development server. With
+    ``pool_instances > 0`` it is the production mode: a
+    :func:`start_pool` model pool behind waitress, or behind the threaded
+    Flask server when waitress is not installed. Unless ``LLM_WARMUP=0``,
+    :func:`warmup` runs in the background while the server starts.
+
+    :param port: TCP port.
+    :param pool_instances: Model instances in the serving pool (0 → none).
+    """
+    if LLM_WARMUP:
+        # Warm up in the background so liveness answers while loading; enter
+        # the warming state first so no request slips in before the thread runs
+        _STARTUP.begin()
+        threading.Thread(target=warmup, args=(pool_instances,), daemon=True).start()
+    elif pool_instances > 0:
+        start_pool(pool_instances)
+    if pool_instances <= 0:
+        app.run(host="0.0.0.0", port=port, debug=False)
+        return
+    if waitress_serve is None:
+        LOGGER.warning("waitress is not installed; serving with the threaded Flask server")
+        app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+    else:
+        waitress_serve(app, host="0.0.0.0", port=port, threads=LLM_SERVE_THREADS)
+
+
+def _serve_forked(listener: socket.socket) -> None:
+    """Serve HTTP on an inherited listening socket inside a pre-forked worker.
+
+    :param listener: Socket bound and listening in the parent.
+    """
+    try:
+        _warm_prompts([(_LLM_CACHE["instance"], None)])
+    except STANDARDIZE_ROW_ERRORS:
+        LOGGER.exception("Prompt warmup failed in worker %s", os.getpid())
+    if waitress_serve is None:
+        LOGGER.warning(
+            "waitress is not installed; worker %s serves one request at a time", os.getpid()
+        )
+        host, port = listener.getsockname()[:2]
+        make_server(host, port, app, fd=listener.fileno()).serve_forever()
+    else:
+        waitress_serve(app, sockets=[listener], threads=LLM_SERVE_THREADS)
+
+
+def serve_prefork(port: int, workers: int) -> None:
+    """Load the model once, then fork ``workers`` HTTP worker processes.
+
+    The parent binds the port, builds the canonical-name indexes and loads
+    the (memory-mapped, see ``LLM_USE_MMAP``) model before forking, so the
+    workers share those pages copy-on-write instead of each loading its
+    own copy. The few-shot prompts are evaluated in each worker after the
+    fork: llama.cpp's compute threads are not safe to carry across
+    ``fork()``. Workers accept connections from the shared socket; each
+    reports its own memory under ``process`` in ``/metrics``.
+
+    :param port: TCP port.
+    :param workers: Worker processes.
+    """
+    with socket.create_server(("0.0.0.0", port)) as listener:
+        warmup(evaluate=False)
+        prefork.run_workers(workers, lambda: _serve_forked(listener))
+
+
 def _normalize_input(payload: Any) -> List[Dict[str, Any]]:
     """Accept either a list of rows or ``{'rows': [...]}``.
 
@@ -348,42 +996,212 @@ def health() -> Any:
     return jsonify({"ok": True})
 
 
-@app.post("/standardize")
-def standardize() -> Any:
-    """Standardize rows from an HTTP request and return JSON.
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(exc: RequestEntityTooLarge) -> Any:
+    """Answer an over-limit request body with a JSON 413.
 
-    :returns: JSON response with standardized rows.
+    :param exc: The size error raised while reading the body.
+    :returns: ``{"error": ...}`` with status 413.
     """
-    payload = request.get_json(force=True, silent=True)
-    rows = _normalize_input(payload)
-    limited_rows = rows[:STANDARDIZE_MAX_ROWS]
+    response = jsonify({"error": "request too large", "detail": exc.description})
+    response.status_code = 413
+    return response
 
-    out: List[Dict[str, Any]] = []
-    invalid_rows_skipped = 0
-    for row in limited_rows:
-        if not isinstance(row, dict):
-            invalid_rows_skipped += 1
-            continue
 
-        row_out = dict(row)
-        program_text = str(row_out.get("program") or "")
-        if len(program_text) > STANDARDIZE_MAX_PROGRAM_CHARS:
-            program_text = program_text[:STANDARDIZE_MAX_PROGRAM_CHARS]
+@app.get("/ready")
+def ready() -> Any:
+    """Readiness check: 503 while warming up, else 200.
+
+    After a failed warmup this is 200 again (the model loads lazily on the
+    next request) and the body carries the warmup ``error``.
+
+    :returns: JSON :meth:`startup.Startup.status` with per-phase timings.
+    """
+    status = _STARTUP.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+
+@app.get("/metrics")
+def metrics() -> Any:
+    """Report cache, fast-path and serving-pool counters, startup and memory.
+
+    :returns: JSON response with ``memo``, ``prefix_cache``, ``fast_path``,
+        ``pool``, ``startup``, ``process`` (this worker's memory) and
+        ``decoding`` (generated tokens per row, fallback rate) sections.
+    """
+    memo = _memo_cache()
+    pool = _POOL["pool"]
+    return jsonify(
+        {
+            "memo": memo.stats() if memo is not None else None,
+            "prefix_cache": prefix_cache_stats(),
+            "fast_path": _FAST_PATH.stats(),
+            "pool": pool.stats() if pool is not None else None,
+            "startup": _STARTUP.status(),
+            "process": {"pid": os.getpid(), **prefork.memory_kb()},
+            "decoding": _DECODE.stats(),
+        }
+    )
+
 
+def _request_text(row: Dict[str, Any]) -> str:
+    """Return a request row's ``program`` text, capped in length.
+
+    :param row: Request row.
+    :returns: At most ``STANDARDIZE_MAX_PROGRAM_CHARS`` characters.
+    """
+    return str(row.get("program") or "")[:STANDARDIZE_MAX_PROGRAM_CHARS]
+
+
+def _submit_texts(program_texts: List[str]) -> List[Future] | None:
+    """Queue texts on the serving pool, if one is running.
+
+    :param program_texts: Program strings from one request.
+    :returns: One future per text, or None without a pool.
+    :raises serving.Overloaded: If the pool queue cannot take them.
+    """
+    pool = _POOL["pool"]
+    return pool.submit(program_texts) if pool is not None else None
+
+
+def _annotate_rows(
+    rows: List[Dict[str, Any]],
+    program_texts: List[str],
+    futures: List[Future] | None,
+) -> Iterator[Dict[str, Any]]:
+    """Add the LLM-generated fields to request rows, one row at a time.
+
+    A row whose standardization fails gets the rule-based result instead.
+
+    :param rows: Request rows (copies; updated in place).
+    :param program_texts: The rows' program texts.
+    :param futures: Pool results from :func:`_submit_texts`, or None to
+        standardize each row in this thread.
+    :returns: Iterator of the updated rows, in order.
+    """
+    for index, (row_out, program_text) in enumerate(zip(rows, program_texts)):
         try:
-            result = _call_llm(program_text)
+            if futures is None:
+                result = _standardize_texts([program_text])[0]
+            else:
+                result = futures[index].result()
         except STANDARDIZE_ROW_ERRORS:
             LOGGER.exception("Standardization failed for one row")
-            fallback_program, fallback_university = _split_fallback(program_text)
-            result = {
-                "standardized_program": _post_normalize_program(fallback_program),
-                "standardized_university": _post_normalize_university(fallback_university),
-            }
+            result = _fallback_result(program_text)
 
         row_out["llm-generated-program"] = result["standardized_program"]
         row_out["llm-generated-university"] = result["standardized_university"]
-        out.append(row_out)
+        yield row_out
+
+
+def _until_decode_error(rows: Iterator[Any]) -> Iterator[Any]:
+    """Yield rows, then the parse or size error that ended them.
+
+    :param rows: Lazily parsed rows.
+    :returns: The rows, followed by the :class:`json.JSONDecodeError`,
+        :class:`json_stream.ValueTooLarge` or :class:`RequestEntityTooLarge`
+        that stopped reading, if any.
+    """
+    try:
+        yield from rows
+    except (json.JSONDecodeError, json_stream.ValueTooLarge, RequestEntityTooLarge) as exc:
+        yield exc
+
+
+def _stream_ndjson(rows: Iterator[Any]) -> Iterator[str]:
+    """Standardize a streamed request body into NDJSON lines.
+
+    Rows are read and standardized ``LLM_BATCH_SIZE`` at a time, so memory
+    stays constant however many rows the client sends. Every input row
+    yields one line: the standardized row, or ``{"error": ...}`` for a row
+    that is not an object. Malformed JSON ends the stream with an error
+    line after the rows read before it; so does a row longer than
+    ``STANDARDIZE_MAX_ROW_CHARS`` or a body past ``STANDARDIZE_MAX_STREAM_BYTES``,
+    whose line also carries ``"status": 413``. With a serving pool, a full queue
+    delays the next batch instead of rejecting the request, since the
+    response has already started.
+
+    :param rows: Rows parsed lazily from the request body.
+    :returns: Iterator of newline-terminated JSON lines.
+    """
+    size = max(1, LLM_BATCH_SIZE)
+    if _POOL["pool"] is not None:
+        size = min(size, _POOL["pool"].limits.max_queue)
+    rows = _until_decode_error(rows)
+    for batch in iter(lambda: list(islice(rows, size)), []):
+        valid_rows = [dict(row) for row in batch if isinstance(row, dict)]
+        texts = [_request_text(row) for row in valid_rows]
+        while True:
+            try:
+                futures = _submit_texts(texts)
+                break
+            except serving.Overloaded as exc:
+                time.sleep(exc.retry_after)
+        annotated = _annotate_rows(valid_rows, texts, futures)
+        for row in batch:
+            if isinstance(row, dict):
+                reply = next(annotated, row)
+            elif isinstance(row, json.JSONDecodeError):
+                reply = {"error": f"invalid JSON: {row}"}
+            elif isinstance(row, Exception):
+                reply = {"error": f"request too large: {row}", "status": 413}
+            else:
+                reply = {"error": "row must be a JSON object"}
+            yield json.dumps(reply, ensure_ascii=False) + "\n"
+
+
+@app.post("/standardize")
+def standardize() -> Any:
+    """Standardize rows from an HTTP request.
 
+    Clients that accept ``application/x-ndjson`` (and not plain JSON) get a
+    streamed response with one line per row as it is standardized, and
+    are not subject to ``STANDARDIZE_MAX_ROWS``; see :func:`_stream_ndjson`.
+    Their body may be a JSON array, ``{"rows": [...]}`` or, when sent as
+    ``application/x-ndjson``, JSON Lines.
+
+    Bodies are limited to ``STANDARDIZE_MAX_BODY_BYTES`` (buffered) or
+    ``STANDARDIZE_MAX_STREAM_BYTES`` (streamed); a larger ``Content-Length``
+    is refused with 413 before anything is read.
+
+    :returns: JSON response with standardized rows, a streamed NDJSON
+        response, 413 when the body is too large, 429 when the serving pool
+        is full, or 503 during warmup.
+    """
+    if _STARTUP.state == startup.WARMING:
+        response = jsonify({"error": "warming up"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "1"
+        return response
+    if request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == (
+        NDJSON_MIMETYPE
+    ):
+        request.max_content_length = STANDARDIZE_MAX_STREAM_BYTES
+        rows_in = json_stream.iter_rows(
+            io.TextIOWrapper(request.stream, encoding="utf-8"),
+            jsonl=request.mimetype == NDJSON_MIMETYPE,
+            max_value_chars=STANDARDIZE_MAX_ROW_CHARS,
+        )
+        return app.response_class(
+            stream_with_context(_stream_ndjson(rows_in)),
+            mimetype=NDJSON_MIMETYPE,
+        )
+
+    payload = request.get_json(force=True, silent=True)
+    rows = _normalize_input(payload)
+    limited_rows = rows[:STANDARDIZE_MAX_ROWS]
+    valid_rows = [dict(row) for row in limited_rows if isinstance(row, dict)]
+    invalid_rows_skipped = len(limited_rows) - len(valid_rows)
+    texts = [_request_text(row) for row in valid_rows]
+    try:
+        futures = _submit_texts(texts)
+    except serving.Overloaded as exc:
+        response = jsonify({"error": "overloaded", "retry_after": exc.retry_after})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response
+
+    out = list(_annotate_rows(valid_rows, texts, futures))
     response: Dict[str, Any] = {"rows": out}
     if len(rows) > len(limited_rows):
         response["truncated"] = True
@@ -392,18 +1210,143 @@ def standardize() -> Any:
     return jsonify(response)
 
 
+def _report_caches() -> None:
+    """Print fast-path, memo, prefix-cache and decoding counters to stderr."""
+    fast = _FAST_PATH.stats()
+    if fast["rows"]:
+        print(
+            f"Rule fast path: {fast['resolved']} of {fast['rows']} rows "
+            f"({fast['fraction']:.1%}) resolved without the model.",
+            file=sys.stderr,
+        )
+    memo = _memo_cache()
+    if memo is not None:
+        print(f"Memo: {memo.hits} hits, {memo.misses} misses.", file=sys.stderr)
+    stats = prefix_cache_stats()
+    if stats["calls"]:
+        print(
+            f"Prefix cache: {stats['tokens_saved']} of {stats['prompt_tokens']} prompt tokens "
+            f"reused ({stats['tokens_saved_per_row']:.1f} per row).",
+            file=sys.stderr,
+        )
+    decode = _DECODE.stats()
+    if decode["calls"]:
+        print(
+            f"Decoding: {decode['tokens_per_row']:.1f} generated tokens per row, "
+            f"{decode['fallback_rate']:.1%} of model rows fell back to the rules.",
+            file=sys.stderr,
+        )
+
+
+def _cache_counters() -> Dict[str, int]:
+    """Snapshot this process's prefix-cache, memo, fast-path and decoding counters.
+
+    :returns: Prefix-cache totals plus ``memo_*``, ``fast_path_*`` and
+        ``decode_*`` counts.
+    """
+    memo = _memo_cache()
+    return dict(
+        _PREFIX_STATS,
+        memo_hits=memo.hits if memo is not None else 0,
+        memo_misses=memo.misses if memo is not None else 0,
+        fast_path_rows=_FAST_PATH.counters["rows"],
+        fast_path_resolved=_FAST_PATH.counters["resolved"],
+        **{f"decode_{key}": value for key, value in _DECODE.counters.items()},
+    )
+
+
+def _merge_counters(deltas: Dict[str, int]) -> None:
+    """Add a worker's counter deltas to this process's counters.
+
+    :param deltas: Output of :func:`_standardize_chunk`.
+    """
+    _PREFIX_STATS.update({key: value + deltas[key] for key, value in _PREFIX_STATS.items()})
+    _FAST_PATH.counters["rows"] += deltas["fast_path_rows"]
+    _FAST_PATH.counters["resolved"] += deltas["fast_path_resolved"]
+    for key in _DECODE.counters:
+        _DECODE.counters[key] += deltas[f"decode_{key}"]
+    memo = _memo_cache()
+    if memo is not None:
+        memo.hits += deltas["memo_hits"]
+        memo.misses += deltas["memo_misses"]
+
+
+def _init_worker(n_threads: int) -> None:
+    """Reset a CLI worker process to load its own model with ``n_threads``.
+
+    Forked workers inherit the parent's caches; the model, prefix states
+    and memo connection must not be shared across processes.
+
+    :param n_threads: llama.cpp threads for this worker.
+    """
+    _LLM_CACHE["instance"] = None
+    _LLM_CACHE["n_threads"] = n_threads
+    _PREFIX_STATES.clear()
+    _MEMO["cache"] = None
+
+
+def _standardize_chunk(rows: List[Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+    """Standardize one chunk of rows in a worker process.
+
+    :param rows: Rows with a ``program`` field.
+    :returns: The chunk as JSONL text and the counter deltas it caused.
+    """
+    before = _cache_counters()
+    text = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in standardize_rows(rows))
+    after = _cache_counters()
+    return text, {key: value - before[key] for key, value in after.items()}
+
+
+def _standardize_parallel(rows: Iterable[Dict[str, Any]], workers: int) -> Iterator[str]:
+    """Standardize rows across worker processes, in input order.
+
+    Rows go out ``LLM_WORKER_CHUNK_ROWS`` at a time through
+    :func:`ordered_pool.imap_ordered`. Each worker loads its own model with
+    an even share of ``N_THREADS``.
+
+    :param rows: Iterable of rows with a ``program`` field.
+    :param workers: Worker processes.
+    :returns: Iterator of JSONL chunks, in input order.
+    """
+    rows = iter(rows)
+    size = max(1, LLM_WORKER_CHUNK_ROWS)
+    chunks = iter(lambda: list(islice(rows, size)), [])
+    totals: Dict[str, int] = {}
+    for text, deltas in ordered_pool.imap_ordered(
+        _standardize_chunk,
+        chunks,
+        workers,
+        initializer=_init_worker,
+        initargs=(max(1, N_THREADS // workers),),
+    ):
+        for key, value in deltas.items():
+            totals[key] = totals.get(key, 0) + value
+        yield text
+    # Merged once the pool is gone, so no worker forks with the memo open
+    if totals:
+        _merge_counters(totals)
+
+
 def _cli_process_file(
     in_path: str,
     out_path: str | None,
     append: bool,
     to_stdout: bool,
+    workers: int = 1,
 ) -> None:
-    """Process a JSON file and write JSONL incrementally.
+    """Stream a JSON or JSON Lines file and write JSONL incrementally.
 
-    :param in_path: Input JSON path.
+    Rows are parsed by :func:`json_stream.iter_rows` as they are needed, so
+    the first row is written before the rest of the input is read. Files
+    ending in ``.jsonl``/``.ndjson`` are read as JSON Lines. With
+    ``workers > 1`` rows are sharded across processes and written in
+    chunks instead of one flushed line at a time.
+
+    :param in_path: Input JSON or JSON Lines filename.
     :param out_path: Optional output JSONL path.
     :param append: If True, append to output file.
     :param to_stdout: If True, write JSONL to stdout.
+    :param workers: Standardizer processes (1 → this process).
     """
     base_dir = os.path.abspath(os.path.expanduser(os.getenv("LLM_IO_BASE_DIR", os.getcwd())))
 
@@ -418,8 +1361,6 @@ def _cli_process_file(
     safe_in_path = os.path.join(base_dir, raw_in_name)
     if not os.path.exists(safe_in_path):
         raise FileNotFoundError(f"Input file not found: {safe_in_path}")
-    with open(safe_in_path, "r", encoding="utf-8") as f:
-        rows = _normalize_input(json.load(f))
 
     sink_context = nullcontext(sys.stdout)
     if not to_stdout:
@@ -428,21 +1369,59 @@ def _cli_process_file(
             raise ValueError("Output path must be a filename without directories.")
         if not SAFE_FILENAME_RE.fullmatch(raw_out_name):
             raise ValueError("Output filename contains invalid characters.")
+        # Input is read while output is written, so they must not be one file
+        if raw_out_name == raw_in_name:
+            raise ValueError("Output file must differ from the input file.")
 
-        safe_out_path = os.path.join(base_dir, raw_out_name)
-        mode = "a" if append else "w"
-        sink_context = open(safe_out_path, mode, encoding="utf-8")
-
-    with sink_context as sink:
-        for row in rows:
-            program_text = (row or {}).get("program") or ""
-            result = _call_llm(program_text)
-            row["llm-generated-program"] = result["standardized_program"]
-            row["llm-generated-university"] = result["standardized_university"]
+        sink_context = open(
+            os.path.join(base_dir, raw_out_name), "a" if append else "w", encoding="utf-8"
+        )
 
-            json.dump(row, sink, ensure_ascii=False)
-            sink.write("\n")
+    with open(safe_in_path, "r", encoding="utf-8") as f, sink_context as sink:
+        rows = json_stream.iter_rows(f, jsonl=raw_in_name.endswith(json_stream.JSONL_SUFFIXES))
+        if workers > 1:
+            chunks = _standardize_parallel(rows, workers)
+        else:
+            chunks = (json.dumps(row, ensure_ascii=False) + "\n" for row in standardize_rows(rows))
+        for text in chunks:
+            sink.write(text)
             sink.flush()
+    _report_caches()
+
+
+class _SocketHandler(socketserver.StreamRequestHandler):
+    """Answer each JSON row line on a Unix socket with its standardized row."""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("row must be a JSON object")
+                reply = standardize_row(row)
+            except STANDARDIZE_ROW_ERRORS as exc:
+                reply = {"error": str(exc)}
+            self.wfile.write((json.dumps(reply, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def serve_socket(path: str) -> None:
+    """Run a long-lived standardizer daemon on a Unix socket.
+
+    Unless ``LLM_WARMUP=0``, :func:`warmup` runs before the first
+    connection; the model is kept for the life of the process. Clients
+    send one JSON row per line and read one standardized row (or
+    ``{"error": ...}``) per line back.
+
+    :param path: Filesystem path for the socket; a stale one is replaced.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    if LLM_WARMUP:
+        warmup()
+    with socketserver.UnixStreamServer(path, _SocketHandler) as server:
+        server.serve_forever()
 
 
 if __name__ == "__main__":
@@ -453,7 +1432,7 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--file",
-        help="Path to JSON input (list of rows or {'rows': [...]})",
+        help="JSON input (list of rows or {'rows': [...]}) or .jsonl/.ndjson rows",
         default=None,
     )
     parser.add_argument(
@@ -461,6 +1440,23 @@ if __name__ == "__main__":
         action="store_true",
         help="Run the HTTP server instead of CLI.",
     )
+    parser.add_argument(
+        "--pool",
+        type=int,
+        default=LLM_POOL_INSTANCES,
+        help="With --serve: model instances for pooled, micro-batched serving.",
+    )
+    parser.add_argument(
+        "--prefork",
+        type=int,
+        default=0,
+        help="With --serve: worker processes forked after loading the model once.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="Serve the standardizer on this Unix socket path (daemon mode).",
+    )
     parser.add_argument(
         "--out",
         default=None,
@@ -477,11 +1473,22 @@ if __name__ == "__main__":
         action="store_true",
         help="Write JSON Lines to stdout instead of a file.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Standardize --file rows across this many processes.",
+    )
     args = parser.parse_args()
 
-    if args.serve or args.file is None:
-        port = int(os.getenv("PORT", "8000"))
-        app.run(host="0.0.0.0", port=port, debug=False)
+    if args.socket:
+        serve_socket(args.socket)
+    elif args.prefork > 0 and args.pool > 0:
+        parser.error("--prefork and --pool are mutually exclusive")
+    elif args.prefork > 0:
+        serve_prefork(int(os.getenv("PORT", "8000")), args.prefork)
+    elif args.serve or args.file is None:
+        serve_http(int(os.getenv("PORT", "8000")), args.pool)
     else:
         try:
             _cli_process_file(
@@ -489,6 +1496,7 @@ if __name__ == "__main__":
                 out_path=args.out,
                 append=bool(args.append),
                 to_stdout=bool(args.stdout),
+                workers=args.workers,
             )
         except (FileNotFoundError, OSError, ValueError) as exc:
             parser.error(str(exc))
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Indexed fuzzy matching against the canonical program/university lists.
+
+:class:`CanonMatcher` returns exactly what
+``difflib.get_close_matches(word, candidates, n=1, cutoff=cutoff)`` returns,
+but prunes the candidates with filters that can never drop a match instead
+of scoring every one of them.
+"""
+
+from __future__ import annotations
+
+import difflib
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+def _min_matches(total: int, cutoff: float) -> int:
+    """Smallest matching-character count whose difflib ratio reaches ``cutoff``.
+
+    :param total: Combined length of both strings.
+    :param cutoff: Similarity threshold.
+    :returns: Minimum number of matching characters.
+    """
+    matches = max(0, int(cutoff * total / 2) - 1)
+    while total and 2.0 * matches / total < cutoff:
+        matches += 1
+    return matches
+
+
+def _occurrence_tokens(grams: Iterable[str]) -> List[Tuple[str, int]]:
+    """Turn a sequence of n-grams into ``(gram, k)`` occurrence tokens.
+
+    The ``k``-th repeat of a gram becomes its own token, so the size of the
+    intersection of two token sets equals the size of the intersection of
+    the two gram multisets.
+    """
+    return [(gram, k) for gram, count in Counter(grams).items() for k in range(count)]
+
+
+def _trigram_tokens(text: str) -> List[Tuple[str, int]]:
+    """Return the trigram occurrence tokens of ``text``."""
+    return _occurrence_tokens(text[i : i + 3] for i in range(len(text) - 2))
+
+
+class CanonMatcher:
+    """Indexed ``difflib.get_close_matches(word, candidates, n=1, cutoff)``.
+
+    Exact hits come from a hash set. Fuzzy lookups only score candidates
+    that survive three filters which can never drop a difflib match:
+
+    - length buckets bound ``real_quick_ratio``;
+    - a trigram inverted index: a ratio of at least ``cutoff`` needs ``M``
+      matching characters in at most ``la + lb - 2M + 1`` blocks, so the
+      strings share at least ``5M - 2(la + lb) - 2`` trigrams;
+    - the character-multiset bound ``quick_ratio``.
+
+    Survivors are scored with :class:`difflib.SequenceMatcher` in order of
+    their ``quick_ratio`` bound, stopping once no bound can beat the best
+    score. Ties go to the larger string, as in ``get_close_matches``.
+    """
+
+    def __init__(self, candidates: List[str]) -> None:
+        self.candidates = list(dict.fromkeys(candidates))
+        self._exact = set(self.candidates)
+        # Case-insensitive exact index; the first spelling of a name wins
+        self._folded: Dict[str, str] = {}
+        for text in self.candidates:
+            self._folded.setdefault(text.casefold(), text)
+        self._chars: List[FrozenSet[Tuple[str, int]]] = [
+            frozenset(_occurrence_tokens(text)) for text in self.candidates
+        ]
+        self._by_length: Dict[int, List[int]] = {}
+        postings: Dict[Tuple[str, int], List[int]] = {}
+        for index, text in enumerate(self.candidates):
+            self._by_length.setdefault(len(text), []).append(index)
+            for token in _trigram_tokens(text):
+                postings.setdefault(token, []).append(index)
+        self._postings = {token: tuple(ids) for token, ids in postings.items()}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._exact
+
+    def canonical(self, name: str) -> str | None:
+        """Return the candidate equal to ``name`` ignoring case, if any.
+
+        :param name: Name to look up.
+        :returns: The canonical spelling or None.
+        """
+        if name in self._exact:
+            return name
+        return self._folded.get(name.casefold())
+
+    def _shared_trigrams(self, word: str) -> Counter:
+        """Count the trigrams each candidate shares with ``word``."""
+        shared: Counter = Counter()
+        for token in _trigram_tokens(word):
+            shared.update(self._postings.get(token, ()))
+        return shared
+
+    def _pruned_indexes(self, word: str, cutoff: float) -> List[int]:
+        """Return candidates passing the length and trigram filters."""
+        word_len = len(word)
+        needs: Dict[int, int] = {}
+        indexes: List[int] = []
+        for length, bucket in self._by_length.items():
+            total = length + word_len
+            if 2.0 * min(length, word_len) / total < cutoff:
+                continue
+            need = 5 * _min_matches(total, cutoff) - 2 * total - 2
+            if need > 0:
+                needs[length] = need
+            else:
+                indexes.extend(bucket)
+        if needs:
+            for index, count in self._shared_trigrams(word).items():
+                if count >= needs.get(len(self.candidates[index]), count + 1):
+                    indexes.append(index)
+        return indexes
+
+    def _bounded_candidates(self, word: str, cutoff: float) -> List[Tuple[float, str]]:
+        """Return ``(quick_ratio, candidate)`` for candidates that may match."""
+        word_chars = frozenset(_occurrence_tokens(word))
+        bounded = []
+        for index in self._pruned_indexes(word, cutoff):
+            candidate = self.candidates[index]
+            common = len(word_chars & self._chars[index])
+            bound = 2.0 * common / (len(candidate) + len(word))
+            if bound >= cutoff:
+                bounded.append((bound, candidate))
+        bounded.sort(reverse=True)
+        return bounded
+
+    def best_match(self, word: str, cutoff: float) -> str | None:
+        """Return what ``get_close_matches(word, candidates, 1, cutoff)`` would.
+
+        :param word: Name to match.
+        :param cutoff: Similarity threshold in ``[0, 1]``.
+        :returns: Best candidate or None.
+        """
+        if word in self._exact:
+            return word
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best: Tuple[float, str] = (-1.0, "")
+        for bound, candidate in self._bounded_candidates(word, cutoff):
+            if bound < best[0]:
+                break
+            matcher.set_seq1(candidate)
+            score = matcher.ratio()
+            if score >= cutoff and (score, candidate) > best:
+                best = (score, candidate)
+        return best[1] if best[0] >= 0 else None
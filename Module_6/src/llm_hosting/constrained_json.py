@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Grammar-constrained JSON output for the standardizer prompts.
+
+:func:`response_format` builds the llama.cpp ``response_format`` that
+compiles a JSON schema into a GBNF grammar, so the model can only emit
+the ``{standardized_program, standardized_university}`` object (or an
+array of exactly ``count`` of them) and generation ends at the closing
+bracket. :class:`DecodeStats` counts the tokens generated per row and how
+often a reply still had to fall back to the rules.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+RESULT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "standardized_program": {"type": "string"},
+        "standardized_university": {"type": "string"},
+    },
+    "required": ["standardized_program", "standardized_university"],
+    "additionalProperties": False,
+}
+
+
+def response_format(count: int | None = None) -> Dict[str, Any]:
+    """Return a ``response_format`` forcing the standardizer reply shape.
+
+    :param count: Rows in a batched prompt, or None for the single-row
+        object reply.
+    :returns: ``{"type": "json_object", "schema": ...}`` for
+        ``create_chat_completion``.
+    """
+    schema = RESULT_SCHEMA
+    if count is not None:
+        schema = {"type": "array", "items": RESULT_SCHEMA, "minItems": count, "maxItems": count}
+    return {"type": "json_object", "schema": schema}
+
+
+def completion_tokens(out: Any) -> int:
+    """Read the generated-token count from a completion response.
+
+    :param out: ``create_chat_completion`` response, or None if it failed.
+    :returns: ``usage.completion_tokens``, or 0 when not reported.
+    """
+    try:
+        return int(out["usage"]["completion_tokens"])
+    except (TypeError, KeyError, ValueError):
+        return 0
+
+
+class DecodeStats:
+    """Generated-token and rule-fallback counters for model replies."""
+
+    def __init__(self) -> None:
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "rows": 0,
+            "completion_tokens": 0,
+            "fallback_rows": 0,
+        }
+        self._lock = threading.Lock()
+
+    def record(self, rows: int, tokens: int, fallback_rows: int) -> None:
+        """Count one completion.
+
+        :param rows: Rows the completion standardized.
+        :param tokens: Tokens it generated.
+        :param fallback_rows: Rows whose reply could not be used.
+        """
+        with self._lock:
+            self.counters["calls"] += 1
+            self.counters["rows"] += rows
+            self.counters["completion_tokens"] += tokens
+            self.counters["fallback_rows"] += fallback_rows
+
+    def stats(self) -> Dict[str, float]:
+        """Report the counters plus ``tokens_per_row`` and ``fallback_rate``."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self.counters)
+        rows = max(1, stats["rows"])
+        stats["tokens_per_row"] = stats["completion_tokens"] / rows
+        stats["fallback_rate"] = stats["fallback_rows"] / rows
+        return stats
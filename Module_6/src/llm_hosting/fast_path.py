@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Rule-based fast path for program strings that are already canonical.
+
+A ``"Program, University"`` string whose two halves are canonical names
+(ignoring case, after the abbreviation and spelling-fix tables) is
+standardized by lookups alone. Only strings this cannot resolve need
+model inference.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List
+
+try:
+    from .canon_match import CanonMatcher
+except ImportError:  # pragma: no cover - script execution path
+    from canon_match import CanonMatcher
+
+
+class RuleFastPath:
+    """Resolve already-canonical program strings without the model.
+
+    :param fix_program: Spelling fixes applied to the program half.
+    :param expand_university: Abbreviation expansion and spelling fixes
+        applied to the university half.
+    """
+
+    def __init__(
+        self,
+        fix_program: Callable[[str], str],
+        expand_university: Callable[[str], str],
+    ) -> None:
+        self.fix_program = fix_program
+        self.expand_university = expand_university
+        self.counters: Dict[str, int] = {"rows": 0, "resolved": 0}
+        self._lock = threading.Lock()
+
+    def resolve(
+        self,
+        program_text: str,
+        programs: CanonMatcher,
+        universities: CanonMatcher,
+    ) -> Dict[str, str] | None:
+        """Split on the comma and look both halves up in the canonical lists.
+
+        :param program_text: Raw program text.
+        :param programs: Matcher over the canonical programs.
+        :param universities: Matcher over the canonical universities.
+        :returns: Standardized fields, or None if either half is not canonical.
+        """
+        parts = " ".join(program_text.split()).split(",")
+        if len(parts) != 2:
+            return None
+        program = programs.canonical(self.fix_program(parts[0].strip()))
+        university = universities.canonical(self.expand_university(parts[1].strip()))
+        if program is None or university is None:
+            return None
+        return {"standardized_program": program, "standardized_university": university}
+
+    def resolve_many(
+        self,
+        program_texts: List[str],
+        programs: CanonMatcher,
+        universities: CanonMatcher,
+    ) -> List[Dict[str, str] | None]:
+        """Resolve several strings and count how many were short-circuited.
+
+        :param program_texts: Raw program texts.
+        :param programs: Matcher over the canonical programs.
+        :param universities: Matcher over the canonical universities.
+        :returns: One result (or None) per input, in order.
+        """
+        results = [self.resolve(text, programs, universities) for text in program_texts]
+        with self._lock:
+            self.counters["rows"] += len(results)
+            self.counters["resolved"] += sum(result is not None for result in results)
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        """Report rows seen, rows resolved and the resolved ``fraction``."""
+        stats: Dict[str, float] = dict(self.counters)
+        stats["fraction"] = stats["resolved"] / max(1, stats["rows"])
+        return stats
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Incremental readers for standardizer input files.
+
+:func:`iter_rows` yields rows as they are parsed instead of loading the
+whole document, so memory stays at one row (plus a read buffer) and the
+first row can be standardized before the rest of the file is read. It
+accepts the same shapes as ``app._normalize_input`` (a JSON array or a
+``{"rows": [...]}`` object) plus JSON Lines. :func:`iter_array` is the
+plain JSON array reader that ``clean.iter_rows`` uses for scraped files.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, TextIO
+
+# Characters read from the input per buffer refill
+READ_CHARS = 1 << 16
+# File suffixes read line by line as JSON Lines
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class ValueTooLarge(ValueError):
+    """A single row is longer than the reader's ``max_value_chars``."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"row exceeds {limit} characters")
+        self.limit = limit
+
+
+class _Reader:
+    """Pull JSON tokens and values from a text stream through a buffer."""
+
+    def __init__(
+        self,
+        handle: TextIO,
+        chunk_size: int | None = None,
+        max_value_chars: int | None = None,
+    ) -> None:
+        self._handle = handle
+        self._chunk_size = chunk_size or READ_CHARS
+        self._max_value = max_value_chars
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, minimum: int = 0) -> bool:
+        """Append at least one chunk to the buffer, dropping what was consumed.
+
+        :param minimum: Keep reading chunks until this many characters were
+            added (or the stream ends).
+        :returns: False once the stream is exhausted.
+        """
+        chunks = []
+        added = 0
+        while not self._eof and (not chunks or added < minimum):
+            chunk = self._handle.read(self._chunk_size)
+            if chunk:
+                chunks.append(chunk)
+                added += len(chunk)
+            else:
+                self._eof = True
+        if not chunks:
+            return False
+        self._buf = self._buf[self._pos :] + "".join(chunks)
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it.
+
+        :returns: The character, or ``""`` at the end of the stream.
+        """
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def take(self, allowed: str) -> str:
+        """Consume the next character, which must be one of ``allowed``.
+
+        :param allowed: Acceptable structural characters.
+        :returns: The character consumed.
+        :raises json.JSONDecodeError: If another character (or EOF) follows.
+        """
+        char = self.peek()
+        if not char or char not in allowed:
+            raise json.JSONDecodeError(f"Expecting one of {allowed!r}", self._buf, self._pos)
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value.
+
+        :returns: The decoded value.
+        :raises ValueTooLarge: If the value is longer than ``max_value_chars``.
+        :raises json.JSONDecodeError: If the stream ends mid-value or is invalid.
+        """
+        self.peek()
+        while True:
+            # Each retry decodes from the start of the value, so at least
+            # double the pending text first to keep large values linear
+            pending = len(self._buf) - self._pos
+            try:
+                obj, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                self._check_size(pending)
+                if self._fill(pending):
+                    continue
+                raise
+            # A number running up to the buffer edge may continue in the next
+            # chunk, including one cut after ".", "e" or "e+" that decoded
+            # as its integer prefix
+            tail = self._buf[end:]
+            if not tail.strip(_NUMBER_CHARS) and self._fill(pending):
+                continue
+            self._check_size(end - self._pos)
+            self._pos = end
+            return obj
+
+    def _check_size(self, chars: int) -> None:
+        """Reject a value of at least ``chars`` characters if over the limit.
+
+        :raises ValueTooLarge: If ``chars`` exceeds ``max_value_chars``.
+        """
+        if self._max_value is not None and chars > self._max_value:
+            raise ValueTooLarge(self._max_value)
+
+    def array(self) -> Iterator[Any]:
+        """Yield the elements of the JSON array that starts next."""
+        self.take("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(",]") == "]":
+                return
+
+
+def _object_rows(reader: _Reader) -> Iterator[Any]:
+    """Yield rows from a top-level object.
+
+    A ``"rows"`` array is streamed element by element. Otherwise the object
+    is treated as the first line of JSON Lines content when more values
+    follow it, and as an empty input when it stands alone.
+
+    :param reader: Reader positioned at ``{``.
+    """
+    reader.take("{")
+    fields = {}
+    streamed = False
+    closed = reader.peek() == "}"
+    if closed:
+        reader.take("}")
+    while not closed:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", "", 0)
+        reader.take(":")
+        if key == "rows" and reader.peek() == "[":
+            yield from reader.array()
+            streamed = True
+        else:
+            fields[key] = reader.value()
+        closed = reader.take(",}") == "}"
+    if streamed or not reader.peek():
+        return
+    yield fields
+    while reader.peek():
+        yield reader.value()
+
+
+def iter_array(handle: TextIO, chunk_size: int | None = None) -> Iterator[Any]:
+    """Yield the elements of the JSON array in ``handle`` as they are parsed.
+
+    :param handle: Text stream positioned before the array.
+    :param chunk_size: Characters read per refill (defaults to
+        :data:`READ_CHARS`).
+    :returns: Iterator of the array's elements.
+    :raises json.JSONDecodeError: If the input is not a complete JSON array.
+    """
+    yield from _Reader(handle, chunk_size).array()
+
+
+def _lines(handle: TextIO, max_value_chars: int | None) -> Iterator[str]:
+    """Yield the non-blank lines of ``handle``, refusing over-long ones.
+
+    :param handle: Text stream of JSON Lines.
+    :param max_value_chars: Longest accepted line (without surrounding
+        whitespace), or None for no limit.
+    :raises ValueTooLarge: At the first line over the limit, before the
+        rest of it is read.
+    """
+    limit = -1 if max_value_chars is None else max_value_chars + 2
+    for line in iter(lambda: handle.readline(limit), ""):
+        if max_value_chars is not None and (
+            len(line.strip()) > max_value_chars or (len(line) == limit and line[-1] != "\n")
+        ):
+            raise ValueTooLarge(max_value_chars)
+        if line.strip():
+            yield line
+
+
+def iter_rows(
+    handle: TextIO,
+    jsonl: bool = False,
+    max_value_chars: int | None = None,
+) -> Iterator[Any]:
+    """Yield input rows from ``handle`` as they are parsed.
+
+    :param handle: Text stream holding a JSON array, a ``{"rows": [...]}``
+        object or JSON Lines.
+    :param jsonl: If True, read one JSON value per non-blank line.
+    :param max_value_chars: Longest accepted row, as JSON text, or None for
+        no limit; bounds the buffer a single row can grow.
+    :returns: Iterator of rows, in file order.
+    :raises ValueTooLarge: When a row over ``max_value_chars`` is reached.
+    :raises json.JSONDecodeError: On malformed input, when it is reached.
+    """
+    if jsonl:
+        for line in _lines(handle, max_value_chars):
+            yield json.loads(line)
+        return
+    reader = _Reader(handle, max_value_chars=max_value_chars)
+    first = reader.peek()
+    if first == "[":
+        yield from reader.array()
+    elif first == "{":
+        yield from _object_rows(reader)
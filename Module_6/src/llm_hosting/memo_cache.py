@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Persistent memo of standardized program strings.
+
+A small SQLite table maps normalized ``program`` text to its standardized
+program/university pair, so strings that recur across pulls skip model
+inference entirely.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from typing import Dict, List
+
+
+class MemoCache:
+    """Size-bounded SQLite memo of standardized program strings.
+
+    Entries are keyed by the normalized program text. The table is wiped
+    when the stored ``version`` (see ``app.memo_version()``) differs from
+    the one given, and the least recently used entries are evicted beyond
+    ``max_rows``.
+    """
+
+    _SELECT_CHUNK = 500
+
+    def __init__(self, path: str, version: str, max_rows: int) -> None:
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, program TEXT NOT NULL, "
+            "university TEXT NOT NULL, used INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS memo_used ON memo (used)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        stored = self._conn.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if stored is None or stored[0] != version:
+            self._conn.execute("DELETE FROM memo")
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        self._conn.commit()
+        self._rows, last_used = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(used), 0) FROM memo"
+        ).fetchone()
+        self._clock = last_used
+
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, str]]:
+        """Return memoized results for ``keys`` and mark them recently used.
+
+        Every key counts as one hit or miss, duplicates included.
+
+        :param keys: Normalized program strings.
+        :returns: ``{key: result}`` for the keys present.
+        """
+        unique = list(dict.fromkeys(keys))
+        found: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            for start in range(0, len(unique), self._SELECT_CHUNK):
+                chunk = unique[start : start + self._SELECT_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                for key, program, university in self._conn.execute(
+                    f"SELECT key, program, university FROM memo WHERE key IN ({marks})", chunk
+                ):
+                    found[key] = {
+                        "standardized_program": program,
+                        "standardized_university": university,
+                    }
+            served = sum(key in found for key in keys)
+            self.hits += served
+            self.misses += len(keys) - served
+            if found:
+                self._clock += 1
+                self._conn.executemany(
+                    "UPDATE memo SET used = ? WHERE key = ?",
+                    [(self._clock, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, results: Dict[str, Dict[str, str]]) -> None:
+        """Store results and evict the least recently used overflow.
+
+        :param results: ``{key: result}`` to memoize.
+        """
+        with self._lock:
+            self._clock += 1
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO memo (key, program, university, used) VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        key,
+                        result["standardized_program"],
+                        result["standardized_university"],
+                        self._clock,
+                    )
+                    for key, result in results.items()
+                ],
+            )
+            self._rows += max(0, cursor.rowcount)
+            overflow = self._rows - self.max_rows
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM memo WHERE key IN "
+                    "(SELECT key FROM memo ORDER BY used LIMIT ?)",
+                    (overflow,),
+                )
+                self._rows -= overflow
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for this process and the entry count."""
+        return {"hits": self.hits, "misses": self.misses, "rows": self._rows}
+
+    def close(self) -> None:
+        """Close the SQLite connection."""
+        self._conn.close()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Order-preserving, bounded fan-out of tasks to worker processes.
+
+:func:`imap_ordered` feeds a (possibly lazy) stream of tasks to a process
+pool and yields the results in input order. Only a few tasks per worker
+are in flight at a time, so memory stays bounded however long the input
+is.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+# Tasks queued per worker; 2 keeps every worker busy while one is collected
+IN_FLIGHT_PER_WORKER = 2
+
+
+def imap_ordered(
+    func: Callable[[Any], Any],
+    tasks: Iterable[Any],
+    workers: int,
+    *,
+    initializer: Callable[..., None] | None = None,
+    initargs: Tuple[Any, ...] = (),
+) -> Iterator[Any]:
+    """Apply ``func`` to each task in worker processes, in input order.
+
+    :param func: Picklable function of one task.
+    :param tasks: Tasks to submit; consumed lazily.
+    :param workers: Worker processes.
+    :param initializer: Optional per-process setup function.
+    :param initargs: Arguments for ``initializer``.
+    :returns: Iterator of ``func`` results, in input order.
+    """
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        for task in tasks:
+            pending.append(pool.submit(func, task))
+            if len(pending) >= IN_FLIGHT_PER_WORKER * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""KV-cache reuse for the shared few-shot prompt prefix.
+
+Every standardizer prompt starts with the same system prompt and
+few-shots. :class:`PrefixCache` snapshots the llama.cpp state once that
+prefix has been evaluated and restores it before later calls, so only the
+row-specific tokens are evaluated again.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+
+def common_prefix_len(left: Iterable[int], right: Iterable[int]) -> int:
+    """Count the leading tokens two token sequences share.
+
+    :param left: First token sequence.
+    :param right: Second token sequence.
+    :returns: Length of the shared prefix.
+    """
+    count = 0
+    for left_token, right_token in zip(left, right):
+        if left_token != right_token:
+            break
+        count += 1
+    return count
+
+
+class PrefixCache:
+    """llama.cpp state snapshots per system prompt, with prompt-eval accounting.
+
+    Snapshots are only valid for the model that produced them; call
+    ``states.clear()`` when the model is replaced. Callers must serialize
+    :meth:`complete` with the model's own lock.
+    """
+
+    def __init__(self) -> None:
+        self.states: Dict[str, Any] = {}
+        self.counters: Dict[str, int] = {
+            "calls": 0,
+            "rows": 0,
+            "prompt_tokens": 0,
+            "tokens_saved": 0,
+        }
+
+    def complete(
+        self,
+        llm: Any,
+        messages: List[Dict[str, str]],
+        rows: int,
+        enabled: bool = True,
+        **kwargs: Any,
+    ) -> Any:
+        """Run a chat completion, reusing the KV cache of the shared prefix.
+
+        The first call per system prompt snapshots the model state with
+        ``save_state()``; later calls ``load_state()`` it first, so
+        llama.cpp only evaluates the tokens after the longest shared prefix
+        instead of the whole prompt. Backends without state snapshots, or
+        ``enabled=False``, run the plain completion.
+
+        :param llm: Loaded model.
+        :param messages: Chat messages, shared prefix first.
+        :param rows: Rows standardized by this call (for per-row accounting).
+        :param enabled: If False, neither restore nor take snapshots.
+        :param kwargs: Passed to ``create_chat_completion``.
+        :returns: The completion response.
+        """
+        use_cache = enabled and hasattr(llm, "save_state")
+        key = messages[0]["content"]
+        state = self.states.get(key) if use_cache else None
+        if state is not None:
+            llm.load_state(state)
+        out = llm.create_chat_completion(messages=messages, **kwargs)
+        saved = 0
+        if state is not None:
+            saved = common_prefix_len(state.input_ids[: state.n_tokens], llm.input_ids)
+        elif use_cache:
+            self.states[key] = llm.save_state()
+        self.counters["calls"] += 1
+        self.counters["rows"] += rows
+        self.counters["prompt_tokens"] += int((out.get("usage") or {}).get("prompt_tokens", 0))
+        self.counters["tokens_saved"] += saved
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        """Report how many prompt-eval tokens the snapshots saved.
+
+        :returns: Totals for calls, rows, prompt tokens and reused tokens,
+            plus ``tokens_saved_per_row``.
+        """
+        stats: Dict[str, float] = dict(self.counters)
+        stats["tokens_saved_per_row"] = stats["tokens_saved"] / max(1, stats["rows"])
+        return stats
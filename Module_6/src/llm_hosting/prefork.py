@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Pre-fork worker processes and per-process memory accounting.
+
+:func:`run_workers` forks serving processes from a parent that has
+already loaded the model. The memory-mapped weights, the model context
+and the canonical-name indexes are then shared copy-on-write instead of
+being loaded once per process. :func:`memory_kb` reads the figures that
+show the difference: RSS counts shared pages in every process, PSS
+divides them between the processes sharing them.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+from typing import Any, Callable, Dict, List
+
+LOGGER = logging.getLogger(__name__)
+
+# /proc/<pid>/smaps_rollup fields reported by memory_kb, as result keys
+_SMAPS_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def memory_kb(pid: int | str = "self") -> Dict[str, int]:
+    """Read the resident, proportional, shared and private memory of a process.
+
+    :param pid: Process id, or ``"self"``.
+    :returns: ``rss_kb``, ``pss_kb``, ``shared_*_kb`` and ``private_*_kb``,
+        or an empty dict where ``/proc/<pid>/smaps_rollup`` is unavailable
+        (non-Linux, or the process is gone).
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            lines = f.readlines()
+    except OSError:
+        return {}
+    stats: Dict[str, int] = {}
+    for line in lines:
+        name, _, value = line.partition(":")
+        if name in _SMAPS_FIELDS:
+            stats[_SMAPS_FIELDS[name]] = int(value.split()[0])
+    return stats
+
+
+def child_pids(pid: int | None = None) -> List[int]:
+    """List the children started by a process's main thread (Linux only).
+
+    :param pid: Parent process id (defaults to this process).
+    :returns: Child pids; empty where ``/proc`` does not expose them.
+    """
+    pid = os.getpid() if pid is None else pid
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="utf-8") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def _exit_on_signal(signum: int, _frame: Any) -> None:
+    """Turn SIGTERM in the parent into SystemExit so the workers get stopped."""
+    raise SystemExit(128 + signum)
+
+
+def run_workers(workers: int, serve: Callable[[], None]) -> None:
+    """Fork ``workers`` processes that each run ``serve`` and wait for them.
+
+    Call this after everything worth sharing is loaded. The parent only
+    supervises: it logs each worker's exit and, when interrupted or
+    failing, sends SIGTERM to the workers still running.
+
+    :param workers: Worker processes to fork.
+    :param serve: Serving loop run in each worker; the worker exits when
+        it returns.
+    """
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the forked child
+            code = 0
+            try:
+                serve()
+            except KeyboardInterrupt:
+                pass
+            except BaseException:  # pylint: disable=broad-exception-caught
+                LOGGER.exception("Pre-forked worker %s failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)  # pylint: disable=protected-access
+        pids.append(pid)
+    LOGGER.info("Forked %d workers: %s", workers, pids)
+    running = set(pids)
+    previous = signal.signal(signal.SIGTERM, _exit_on_signal)
+    try:
+        while running:
+            pid, status = os.wait()
+            running.discard(pid)
+            LOGGER.info("Worker %s exited with status %s", pid, os.waitstatus_to_exitcode(status))
+    except KeyboardInterrupt:
+        LOGGER.info("Interrupted; stopping %d workers", len(running))
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        for pid in running:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Pooled, micro-batched serving for the standardizer endpoint.
+
+:class:`MicroBatchPool` runs one worker thread per model instance, each
+draining its own queue. A worker takes the first waiting row, keeps
+collecting rows (from any request) until ``max_batch`` rows or
+``max_wait_s`` have passed, and standardizes them in one shared inference
+batch. Admission is bounded: a request whose rows do not fit in the free
+queue capacity is rejected with :class:`Overloaded` instead of waiting.
+"""
+
+from __future__ import annotations
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Tuple
+
+# Weight of the newest batch in the moving average of batch latency
+LATENCY_SMOOTHING = 0.2
+
+
+@dataclass(frozen=True)
+class BatchLimits:
+    """
+    Tunables for :class:`MicroBatchPool`.
+
+    :param max_batch: Rows standardized together in one batch.
+    :param max_wait_s: How long a worker waits for more rows to join a batch.
+    :param max_queue: Rows admitted but not yet finished, across all queues.
+    """
+
+    max_batch: int = 8
+    max_wait_s: float = 0.005
+    max_queue: int = 256
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request does not fit in the free queue capacity."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"standardizer queue full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class MicroBatchPool:
+    """Model-instance pool with per-instance queues and micro-batching.
+
+    :param instances: One opaque model handle per worker thread.
+    :param run_batch: ``run_batch(instance, items)`` returning one result
+        per item, in order; called on the instance's own thread.
+    :param limits: Batch size, batching window and queue capacity.
+    """
+
+    def __init__(
+        self,
+        instances: List[Any],
+        run_batch: Callable[[Any, List[Any]], List[Any]],
+        limits: BatchLimits,
+    ) -> None:
+        self.limits = limits
+        self._run_batch = run_batch
+        self._lock = threading.Lock()
+        self._batch_s = 0.0
+        # "queued" counts rows admitted but not yet finished
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "rows": 0,
+            "batches": 0,
+            "rejected": 0,
+            "queued": 0,
+        }
+        self._queues: List[queue.Queue] = [queue.Queue() for _ in instances]
+        self._threads = [
+            threading.Thread(target=self._work, args=(instance, jobs), daemon=True)
+            for instance, jobs in zip(instances, self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def retry_after(self) -> int:
+        """Estimate whole seconds until the current backlog has drained."""
+        rounds = self.counters["queued"] / max(1, len(self._queues) * self.limits.max_batch)
+        return max(1, math.ceil(rounds * self._batch_s))
+
+    def submit(self, items: List[Any]) -> List[Future]:
+        """Queue items for standardization, all or none.
+
+        Each item goes to the instance queue with the fewest waiting rows,
+        so one large request is spread across instances while concurrent
+        small ones are coalesced into shared batches.
+
+        :param items: Items for ``run_batch``.
+        :returns: One future per item, in order.
+        :raises Overloaded: If the items do not fit in the free capacity.
+        """
+        with self._lock:
+            if self.counters["queued"] + len(items) > self.limits.max_queue:
+                self.counters["rejected"] += 1
+                raise Overloaded(self.retry_after())
+            self.counters["queued"] += len(items)
+            self.counters["requests"] += 1
+        futures: List[Future] = []
+        for item in items:
+            future: Future = Future()
+            min(self._queues, key=queue.Queue.qsize).put((item, future))
+            futures.append(future)
+        return futures
+
+    def _collect(self, jobs: queue.Queue, first: Tuple[Any, Future]) -> List[Tuple[Any, Future]]:
+        """Gather up to ``max_batch`` jobs that arrive within the batching window."""
+        batch = [first]
+        deadline = time.monotonic() + self.limits.max_wait_s
+        while len(batch) < self.limits.max_batch:
+            try:
+                job = jobs.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if job is None:
+                # Finish this batch before honouring the shutdown sentinel
+                jobs.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _work(self, instance: Any, jobs: queue.Queue) -> None:
+        """Run batches for one model instance until :meth:`close`."""
+        while True:
+            first = jobs.get()
+            if first is None:
+                return
+            batch = self._collect(jobs, first)
+            started = time.monotonic()
+            try:
+                results = self._run_batch(instance, [item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise ValueError(f"run_batch returned {len(results)} of {len(batch)} results")
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # Callers are blocked on these futures; never leave them unset
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self.counters["queued"] -= len(batch)
+                self.counters["rows"] += len(batch)
+                self.counters["batches"] += 1
+                self._batch_s += LATENCY_SMOOTHING * (elapsed - self._batch_s)
+
+    def stats(self) -> Dict[str, float]:
+        """Report request/row/batch/rejection counters and queue depth."""
+        with self._lock:
+            stats: Dict[str, float] = dict(self.counters)
+            stats["instances"] = len(self._queues)
+            stats["avg_batch_rows"] = stats["rows"] / max(1, stats["batches"])
+            stats["batch_s"] = round(self._batch_s, 4)
+        return stats
+
+    def close(self) -> None:
+        """Stop the workers once the rows already queued are done."""
+        for jobs in self._queues:
+            jobs.put(None)
+        for thread in self._threads:
+            thread.join()
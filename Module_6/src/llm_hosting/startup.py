@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Readiness state and per-phase timings of the standardizer warmup.
+
+A service that has not been warmed up loads everything lazily and counts
+as ready (``"lazy"``). :class:`Startup` moves it through ``"warming"``
+to ``"ready"`` (or ``"failed"``) and records how long each warmup phase
+took, so a slow start can be traced to the model download, the model
+load, the first prompt evaluation or the canonical-name indexes. A failed
+warmup is not terminal: the service falls back to lazy loading, so it
+counts as ready again and keeps the error for reporting.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+LAZY = "lazy"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+class Startup:
+    """Track the warmup state and the seconds spent in each phase."""
+
+    def __init__(self) -> None:
+        self.state = LAZY
+        self.error: str | None = None
+        self.phases: Dict[str, float] = {}
+
+    @property
+    def ready(self) -> bool:
+        """Whether requests can be served (any state but warming)."""
+        return self.state != WARMING
+
+    def begin(self) -> None:
+        """Enter the warming state and forget earlier timings."""
+        self.state = WARMING
+        self.error = None
+        self.phases.clear()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as warmup phase ``name``.
+
+        :param name: Phase name; repeated phases accumulate.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phases[name] = round(self.phases.get(name, 0.0) + elapsed, 4)
+
+    def finish(self, error: str | None = None) -> None:
+        """Leave the warming state.
+
+        :param error: Why warmup failed, or None on success.
+        """
+        self.state = FAILED if error else READY
+        self.error = error
+
+    def status(self) -> Dict[str, Any]:
+        """Report readiness, state, per-phase seconds and their total."""
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "error": self.error,
+            "phases_s": dict(self.phases),
+            "total_s": round(sum(self.phases.values()), 4),
+        }
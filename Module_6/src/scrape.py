@@ -5,8 +5,16 @@ This module uses robots.txt checks, page iteration, and BeautifulSoup
 to extract structured applicant records from the public survey pages.
 """
 
+import argparse
+import os
+import sys
 import ssl
-from urllib import parse, robotparser, error, request
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import lru_cache
+from urllib import parse, error, request
 import re
 import json
 import time
@@ -17,11 +25,63 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     certifi = None
 
+try:
+    from . import scrape_cache, scrape_http, scrape_output, scrape_robots, scrape_stream
+except ImportError:  # pragma: no cover - script execution path
+    import scrape_cache
+    import scrape_http
+    import scrape_output
+    import scrape_robots
+    import scrape_stream
+
 
 URL = "https://www.thegradcafe.com/"
 USER_AGENT = "Mozilla/5.0 (compatible; zhang/1.0)"
 AGENT = "zhang"
 OUTPUT_FILE = "applicant_data.json"
+RESULT_ID_RE = re.compile(r"/result/(\d+)")
+
+# One classifier for detail tokens; the named group that matches is the
+# record field the token fills. Alternatives keep the original precedence.
+DETAIL_TOKEN_RE = re.compile(
+    r"(?P<semester_year_start>(?:Fall|Spring|Summer|Winter)\s+\d{4})$"
+    r"|(?P<citizenship>American|International)\Z"
+    r"|(?P<gpa>GPA\s+[\d.]+)$"
+    r"|(?P<gre_aw>GRE\s+AW\s+[\d.]+)$"
+    r"|(?P<gre_v>GRE\s+V\s+\d+)$"
+    r"|(?P<gre>GRE\s+\d+)$"
+)
+DECISION_RE = re.compile(r"^(?P<status>.+?)(?:\s+on\s+(?P<date>.+))?$", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+# Distinct detail tokens and decision strings cached per process
+TOKEN_CACHE_SIZE = 4096
+
+# Global request pacing shared by every fetch thread. Unless
+# SCRAPE_RATE_LIMIT is set, robots.txt Crawl-delay sets the pace; the
+# fallback of one request per 10 seconds is the historic fixed sleep.
+RATE_LIMIT_ENV = os.getenv("SCRAPE_RATE_LIMIT") or None
+RATE_LIMIT_PER_SEC = float(RATE_LIMIT_ENV or "0.1")
+RATE_LIMIT_BURST = int(os.getenv("SCRAPE_RATE_BURST", "1"))
+FETCH_WORKERS = int(os.getenv("SCRAPE_WORKERS", "1"))
+# Oldest checkpoint (seconds) a resumed pull may continue from. Pages are
+# newest-first, so new results shift older ones onto later pages; the longer
+# a pull sits interrupted the more rows resuming would skip or repeat.
+CHECKPOINT_MAX_AGE_S = float(os.getenv("SCRAPE_CHECKPOINT_MAX_AGE", "3600"))
+
+# On-disk page cache; an empty SCRAPE_CACHE_DIR disables caching
+CACHE_DIR = os.getenv("SCRAPE_CACHE_DIR", "")
+# HTML parser backend: "html.parser" (default), "lxml" or "stream"
+PARSER_BACKEND = os.getenv("SCRAPE_PARSER_BACKEND", "html.parser")
+PARSER_BACKENDS = ("html.parser", "lxml", "stream")
+
+_SSL_CONTEXT_CACHE = {"context": None}
+_SSL_CONTEXT_LOCK = threading.Lock()
+
+# Re-export the transport/cache types used by callers of this module
+HttpResponse = scrape_http.HttpResponse
+HttpSession = scrape_http.HttpSession
+PageCache = scrape_cache.PageCache
+PageSpool = scrape_output.PageSpool
 
 
 def _build_ssl_context():
@@ -38,6 +98,22 @@ def _build_ssl_context():
     return ssl.create_default_context()
 
 
+def _shared_ssl_context():
+    """
+    Return the process-wide TLS context, building it on first use.
+
+    Loading the CA bundle is comparatively expensive, so every HTTPS
+    connection made by this module reuses a single context.
+    """
+
+    with _SSL_CONTEXT_LOCK:
+        context = _SSL_CONTEXT_CACHE["context"]
+        if context is None:
+            context = _build_ssl_context()
+            _SSL_CONTEXT_CACHE["context"] = context
+        return context
+
+
 def _urlopen_with_tls(req):
     """
     Open a URL request using the module's TLS context.
@@ -46,26 +122,13 @@ def _urlopen_with_tls(req):
     do not accept the ``context`` keyword.
     """
 
-    context = _build_ssl_context()
+    context = _shared_ssl_context()
     try:
         return request.urlopen(req, context=context)
     except TypeError:
         return request.urlopen(req)
 
 
-def _is_cert_verification_error(err):
-    """
-    Return True when a URLError wraps a certificate verification failure.
-    """
-
-    reason = getattr(err, "reason", None)
-    if isinstance(reason, ssl.SSLCertVerificationError):
-        return True
-    if isinstance(reason, ssl.SSLError):
-        return "CERTIFICATE_VERIFY_FAILED" in str(reason)
-    return False
-
-
 def _fetch_text(url):
     """
     Fetch UTF-8 text content from a URL using module TLS settings.
@@ -76,66 +139,113 @@ def _fetch_text(url):
         return response.read().decode("utf-8", errors="replace")
 
 
+# Shared keep-alive session for survey page fetches
+HTTP_SESSION = HttpSession(USER_AGENT, _shared_ssl_context)
+
+
+def _fetch_robots(robots_url):
+    """
+    Fetch robots.txt and return ``(status, text)``.
+
+    HTTP error replies are returned as their status with an empty body so
+    :class:`scrape_robots.RobotsPolicy` can apply the standard rules.
+    """
+
+    try:
+        return 200, _fetch_text(robots_url)
+    except error.HTTPError as err:
+        return err.code, ""
+
+
+def _robots_cache_path():
+    """Return the robots.txt cache path that sits next to ``OUTPUT_FILE``."""
+    return f"{os.path.splitext(OUTPUT_FILE)[0]}.robots.json"
+
+
 def url_check():
     """
-    Create and initialize a robots.txt parser for the GradCafe site.
+    Load the robots.txt policy for the GradCafe site.
+
+    The reply is cached next to ``OUTPUT_FILE`` for ``SCRAPE_ROBOTS_TTL``
+    seconds, so repeated pulls skip the robots.txt fetch.
 
-    :returns: A configured :class:`robotparser.RobotFileParser` instance.
+    :returns: A :class:`scrape_robots.RobotsPolicy` with memoized decisions.
     """
 
-    # Join robots.txt URL and run it through the parser
-    parser = robotparser.RobotFileParser()
+    # Reuse a fresh cached robots.txt before going to the network
     robots_url = parse.urljoin(URL, "robots.txt")
-    parser.set_url(robots_url)
+    cache = scrape_robots.RobotsCache(_robots_cache_path())
+    entry = cache.load(robots_url)
+    if entry is None:
+        status, text = _fetch_robots(robots_url)
+        entry = cache.store(robots_url, status, text)
+        print("Fetch results: robots.txt checked")
+    else:
+        print("Fetch results: robots.txt loaded from cache")
 
-    # Read robots.txt with default parser behavior first, then retry once
-    # with an explicit CA bundle on certificate verification failures.
-    try:
-        parser.read()
-    except error.URLError as err:
-        if not _is_cert_verification_error(err):
-            raise
-        print("Fetch results: robots.txt TLS verify failed; retrying with CA bundle")
-        robots_text = _fetch_text(robots_url)
-        parser.parse(robots_text.splitlines())
+    # Return parser to check URLs
+    return scrape_robots.RobotsPolicy.from_entry(entry)
 
-    # Print that robots.txt was checked
-    print("Fetch results: robots.txt checked")
 
-    # Return parser to check URLs
-    return parser
+def resolve_rate_limit(rate_limit, parser):
+    """
+    Pick the request rate for a pull.
 
+    An explicit ``rate_limit`` wins, then ``SCRAPE_RATE_LIMIT``, then the
+    site's robots.txt Crawl-delay/Request-rate, then
+    :data:`RATE_LIMIT_PER_SEC`.
 
-def check_url (page_url, parser):
+    :param rate_limit: Requests per second passed by the caller, or None.
+    :param parser: Robots parser from :func:`url_check` (or None offline).
+    :returns: Requests per second (``0`` disables pacing).
     """
-    Fetch a page if allowed by robots.txt and return a BeautifulSoup object.
 
-    :param page_url: Page URL to fetch.
+    if rate_limit is not None:
+        return rate_limit
+    if RATE_LIMIT_ENV is None and isinstance(parser, scrape_robots.RobotsPolicy):
+        site_rate = parser.request_rate_limit(USER_AGENT)
+        if site_rate is not None:
+            print(f"Fetch results: pacing at {site_rate:g} requests/s from robots.txt")
+            return site_rate
+    return RATE_LIMIT_PER_SEC
+
+
+def _robots_allowed(page_url, parser):
+    """
+    Return True when robots.txt allows fetching ``page_url``.
+
+    :param page_url: Page URL to check.
     :param parser: Robots parser from :func:`url_check`.
-    :returns: :class:`bs4.BeautifulSoup` or None if blocked/error.
     """
 
     # Check if robots.txt allows for agent to fetch the URL (T/F)
     allowed = parser.can_fetch(USER_AGENT, page_url)
-    print(f"Fetch results: robots.txt check - {allowed}")
-
-    # If not allowed to fetch, then do not scrape URL
     if not allowed:
         print("Fetch results: NOT allowed to fetch URL")
+    return allowed
+
+
+def check_url (page_url, parser):
+    """
+    Fetch a page if allowed by robots.txt and return a BeautifulSoup object.
+
+    :param page_url: Page URL to fetch.
+    :param parser: Robots parser from :func:`url_check`.
+    :returns: Parsed document from :func:`make_soup` or None if blocked/error.
+    """
+
+    # If not allowed to fetch, then do not scrape URL
+    if not _robots_allowed(page_url, parser):
         return None
 
     # Review of any HTTP errors
     try:
-        # Create user header to avoid 403 error when scrapping
-        new_header = request.Request(page_url,
-            headers={"User-Agent": USER_AGENT})
-
-        # Requests and decodes the HTML
-        with _urlopen_with_tls(new_header) as response:
-            html = response.read().decode("utf-8")
+        # Requests and decodes the HTML over the pooled keep-alive session
+        response = HTTP_SESSION.get(page_url)
+        html = response.body.decode("utf-8")
 
-        # Converting HTML into object
-        soup = BeautifulSoup(html, "html.parser")
+        # Converting HTML into object with the configured parser backend
+        soup = make_soup(html)
         return soup
 
     # Print any errors that occurred
@@ -144,6 +254,39 @@ def check_url (page_url, parser):
         return None
 
 
+def make_soup(html, backend=None):
+    """
+    Parse page HTML with one of the :data:`PARSER_BACKENDS`.
+
+    ``html.parser`` and ``lxml`` build a full BeautifulSoup tree (``lxml``
+    must be installed); ``stream`` tokenizes only the results table body
+    and returns a lightweight tree with the same lookup methods, so
+    :func:`scrape_data` yields identical records for every backend.
+
+    :param html: Page HTML as text.
+    :param backend: Backend name, defaulting to :data:`PARSER_BACKEND`.
+    :returns: Parsed document accepted by :func:`scrape_data`.
+    :raises ValueError: If the backend name is unknown.
+    """
+    backend = backend or PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    if backend == "stream":
+        return scrape_stream.parse_document(html)
+    return BeautifulSoup(html, backend)
+
+
+def parse_html(html, backend=None):
+    """
+    Parse survey page HTML straight into records.
+
+    :param html: Page HTML as text.
+    :param backend: Optional backend name (see :func:`make_soup`).
+    :returns: List of record dicts (possibly empty).
+    """
+    return scrape_data(make_soup(html, backend))
+
+
 def _empty_record():
     """Return a new record skeleton."""
     return {
@@ -164,16 +307,13 @@ def _empty_record():
     }
 
 
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
 def _parse_decision(decision_text):
     """Split a decision string into status and optional date."""
     if not decision_text:
         return None, None
-    normalized = re.sub(r"\s+", " ", decision_text).strip()
-    match = re.match(
-        r"^(?P<status>.+?)(?:\s+on\s+(?P<date>.+))?$",
-        normalized,
-        flags=re.IGNORECASE,
-    )
+    normalized = WHITESPACE_RE.sub(" ", decision_text).strip()
+    match = DECISION_RE.match(normalized)
     if not match:
         return None, None
     status = match.group("status").strip()
@@ -181,25 +321,18 @@ def _parse_decision(decision_text):
     return status, decision_date
 
 
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _detail_field(text):
+    """Return the record field a detail token fills, or None."""
+    match = DETAIL_TOKEN_RE.match(text)
+    return match.lastgroup if match else None
+
+
 def _apply_detail_text(record, text):
     """Apply one detail text token to the current record."""
-    if re.match(r"^(Fall|Spring|Summer|Winter)\s+\d{4}$", text):
-        record["semester_year_start"] = text
-        return
-    if text in ("American", "International"):
-        record["citizenship"] = text
-        return
-    if re.match(r"^GPA\s+[\d.]+$", text):
-        record["gpa"] = text
-        return
-    if re.match(r"^GRE\s+AW\s+[\d.]+$", text):
-        record["gre_aw"] = text
-        return
-    if re.match(r"^GRE\s+V\s+\d+$", text):
-        record["gre_v"] = text
-        return
-    if re.match(r"^GRE\s+\d+$", text):
-        record["gre"] = text
+    field = _detail_field(text)
+    if field:
+        record[field] = text
 
 
 def _fill_following_rows(cases, start_index, record):
@@ -304,70 +437,487 @@ def create_pages(page_num):
 
 
 
-def pull_pages(target_n= 50, start_page=1):
+@dataclass
+class PullOptions:
+    """
+    Tunables for :func:`pull_pages`.
+
+    :param workers: Concurrent page fetches (defaults to ``FETCH_WORKERS``).
+    :param rate_limit: Requests per second across all workers (defaults to
+        the pace chosen by :func:`resolve_rate_limit`; ``0`` disables pacing).
+    :param cache: Optional :class:`PageCache`; defaults to one rooted at
+        ``SCRAPE_CACHE_DIR`` when that variable is set.
+    :param since: Ingestion watermark (numeric ``/result/<id>``); paging
+        stops at the first page whose result IDs are all at or below it.
+    :param output_format: ``json`` (indented array), ``json-compact`` or
+        ``jsonl``; defaults to ``SCRAPE_OUTPUT_FORMAT``.
+    :param resume: Continue an interrupted pull with the same parameters
+        from its checkpoint instead of starting again at ``start_page``.
     """
-    Pull records from paginated survey pages and save to JSON.
 
-    :param target_n: Maximum number of records to collect.
-    :param start_page: First page to start scraping from.
-    :returns: None. Writes ``OUTPUT_FILE`` as a JSON array.
+    workers: int | None = None
+    rate_limit: float | None = None
+    cache: PageCache | None = None
+    since: str | None = None
+    output_format: str | None = None
+    resume: bool = False
+
+    @property
+    def offline(self):
+        """True when pages are replayed from an offline cache."""
+        return self.cache is not None and self.cache.offline
+
+
+def _default_cache():
+    """Return the environment-configured page cache, if any."""
+    if not CACHE_DIR:
+        return None
+    return PageCache(CACHE_DIR)
+
+
+class RateLimiter:
     """
+    Thread-safe token bucket used to pace page requests.
 
-    # Parses through robots.txt
-    robot = url_check()
-    # Track page of URL
-    page = start_page
-    num_rec = 0
-    all_records = []
+    Tokens refill continuously at ``rate`` per second up to ``burst``. The
+    bucket starts with ``tokens`` (a full burst by default). A non-positive
+    rate disables limiting entirely.
+    """
 
-    # Run until you've met your target number of records
-    while num_rec < target_n:
+    def __init__(self, rate, burst=1, tokens=None):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst if tokens is None else min(tokens, self.burst))
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token and return how long the caller must wait for it.
+
+        :returns: Delay in seconds (0.0 when a token was available).
+        """
+
+        if self.rate <= 0:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(0.0, now - self._updated)
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _fetch_page_records(page_url, parser, limiter, cache=None):
+    """
+    Fetch and parse one survey page under the shared rate limit.
 
-        # Create url for the specific page
-        page_url = create_pages(page)
+    :param page_url: Survey page URL.
+    :param parser: Robots parser from :func:`url_check`.
+    :param limiter: Shared :class:`RateLimiter`.
+    :param cache: Optional :class:`PageCache` for conditional requests.
+    :returns: List of records, or None when the page could not be fetched.
+    """
 
-        # Check robots.txt and uses BeautifulSoup to pull page
-        soup = check_url(page_url, robot)
-        if soup is None:
-            break
+    if cache is not None:
+        return _fetch_cached_records(page_url, parser, limiter, cache)
 
-        # Pull rows from the page
-        page_records = scrape_data(soup)
-        if not page_records:
-            break
+    limiter.acquire()
+    soup = check_url(page_url, parser)
+    if soup is None:
+        return None
+    return scrape_data(soup)
 
-        # Keep adding records from the page until target n is met
-        for record in page_records:
-            if num_rec >= target_n:
-                break
-            all_records.append(record)
 
-            num_rec += 1
+def _fetch_cached_records(page_url, parser, limiter, cache):
+    """
+    Fetch one page through the on-disk cache.
+
+    A ``304 Not Modified`` reply reuses the cached records without parsing
+    the page again; offline caches never touch the network.
+    """
+
+    if cache.offline:
+        records = cache.records(page_url)
+        print(f"Fetch results: offline cache {'hit' if records is not None else 'miss'}")
+        return records
+
+    if not _robots_allowed(page_url, parser):
+        return None
+
+    limiter.acquire()
+    try:
+        response = HTTP_SESSION.get(page_url, headers=cache.validators(page_url))
+        if response.status == 304:
+            records = cache.records(page_url)
+            if records is not None:
+                print("Fetch results: page not modified, using cache")
+                return records
+            # The cached records vanished; fall back to a full fetch, which
+            # is a second request and so needs its own token
+            limiter.acquire()
+            response = HTTP_SESSION.get(page_url)
+    except (error.HTTPError, error.URLError) as err:
+        print(f"An error has occurred - {err}")
+        return None
+
+    records = scrape_data(make_soup(response.body.decode("utf-8")))
+    cache.store(page_url, response.headers, response.body, records)
+    return records
+
+
+def _iter_page_records(start_page, parser, options):
+    """
+    Yield ``(page, records)`` in page order while fetching ahead in parallel.
+
+    Up to ``workers`` pages are in flight at once; each worker thread parses
+    its page as soon as it arrives. Iteration stops at the first page that
+    is blocked, fails, or has no rows.
+
+    :param start_page: First page to fetch.
+    :param parser: Robots parser from :func:`url_check`.
+    :param options: Resolved :class:`PullOptions`.
+    """
+
+    workers = options.workers
+    limiter = RateLimiter(options.rate_limit, RATE_LIMIT_BURST)
+    pending = deque()
+    next_page = start_page
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            while True:
+                # Keep the fetch window full before waiting on the oldest page
+                while len(pending) < workers:
+                    future = pool.submit(
+                        _fetch_page_records,
+                        create_pages(next_page),
+                        parser,
+                        limiter,
+                        options.cache,
+                    )
+                    pending.append((next_page, future))
+                    next_page += 1
+
+                page, future = pending.popleft()
+                page_records = future.result()
+                if not page_records:
+                    return
+                yield page, page_records
+        finally:
+            for _page, future in pending:
+                future.cancel()
+
+
+def _throughput(pages, rows, elapsed):
+    """Build the throughput summary returned by :func:`pull_pages`."""
+    elapsed = max(elapsed, 1e-9)
+    return {
+        "pages": pages,
+        "rows": rows,
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 3),
+    }
+
+
+def _result_id(record):
+    """Return the numeric ``/result/<id>`` of a record, or None."""
+    match = RESULT_ID_RE.search(record.get("url") or "")
+    return int(match.group(1)) if match else None
+
+
+def _parse_watermark(since):
+    """Return a numeric watermark, or None when absent/not numeric."""
+    if since is None:
+        return None
+    since = str(since).strip()
+    if not since.isdigit():
+        print(f"Fetch results: ignoring non-numeric watermark {since!r}")
+        return None
+    return int(since)
+
+
+def _accept_page(page_records, progress, target_n, since_id):
+    """
+    Trim one page to the watermark and target size, updating ``progress``.
+
+    Records at or below ``since_id`` were ingested before and are dropped;
+    records without a result ID are kept. When every ID on the page is at
+    or below the watermark, ``progress["caught_up"]`` is set so paging can
+    stop.
+
+    :returns: Records to keep from this page.
+    """
+
+    if since_id is not None:
+        ids = [_result_id(record) for record in page_records]
+        known = [result_id for result_id in ids if result_id is not None]
+        progress["caught_up"] = bool(known) and max(known) <= since_id
+        page_records = [
+            record
+            for record, result_id in zip(page_records, ids)
+            if result_id is None or result_id > since_id
+        ]
+
+    kept = page_records[: target_n - progress["rows"]]
+    for record in kept:
+        result_id = _result_id(record)
+        if result_id is not None and result_id > (progress["high_water_mark"] or 0):
+            progress["high_water_mark"] = result_id
+    progress["pages"] += 1
+    progress["rows"] += len(kept)
+    return kept
+
+
+def _spool_path():
+    """Return the per-page JSONL spool path that sits next to ``OUTPUT_FILE``."""
+    return f"{os.path.splitext(OUTPUT_FILE)[0]}.partial.jsonl"
+
+
+def _checkpoint_path():
+    """Return the resume checkpoint path that sits next to ``OUTPUT_FILE``."""
+    return f"{os.path.splitext(OUTPUT_FILE)[0]}.checkpoint.json"
+
+
+def _open_spool(checkpoint, options, since_id):
+    """
+    Open the page spool, resuming from ``checkpoint`` when asked and valid.
+
+    The spool is cut back to the checkpointed byte offset, so a page that
+    reached the spool but not the checkpoint is fetched again rather than
+    duplicated. A checkpoint older than ``CHECKPOINT_MAX_AGE_S`` (``0``
+    disables the bound) or that no longer matches the spool is ignored.
+
+    :returns: ``(spool, progress, next_page)``; ``next_page`` is None when
+        the pull starts from scratch.
+    """
+    progress = {
+        "pages": 0, "rows": 0, "high_water_mark": since_id,
+        "caught_up": False, "since_id": since_id,
+    }
+    state = checkpoint.load() if options.resume else None
+    age = time.time() - state.get("saved_at", 0) if state is not None else 0
+    if 0 < CHECKPOINT_MAX_AGE_S < age:
+        print(f"Checkpoint is {age:.0f}s old (limit {CHECKPOINT_MAX_AGE_S:.0f}s); starting over.")
+        state = None
+    if state is not None:
+        spool = PageSpool(_spool_path(), resume=True, offset=state["offset"])
+        if (spool.last_page, spool.rows) == (state["last_page"], state["rows"]):
+            progress.update(
+                pages=spool.pages, rows=spool.rows, high_water_mark=state["high_water_mark"]
+            )
+            print(f"Resuming after page {spool.last_page} with {spool.rows} rows saved.")
+            return spool, progress, spool.last_page + 1
+        spool.close()
+        print("Checkpoint does not match the saved pages; starting over.")
+    return PageSpool(_spool_path()), progress, None
+
+
+def _collect_pages(page_iter, spool, checkpoint, progress, target_n):
+    """Spool accepted pages, checkpointing after each, until the pull is done."""
+    while progress["rows"] < target_n and not progress["caught_up"]:
+        item = next(page_iter, None)
+        if item is None:
+            break
+        page, page_records = item
+
+        # Keep adding new records from the page until target n is met
+        spool.append(page, _accept_page(page_records, progress, target_n, progress["since_id"]))
+        checkpoint.save(
+            last_page=page,
+            rows=progress["rows"],
+            offset=spool.offset,
+            high_water_mark=progress["high_water_mark"],
+        )
 
         # Check on progress for reference
-        print(f"Page {page}: saved {num_rec}")
-        page += 1
+        print(f"Page {page}: saved {progress['rows']}")
+
+
+def _finish_output(spool, options, progress):
+    """
+    Write the final output and watermark once paging is done.
+
+    The spooled pages are streamed into the requested output format and the
+    spool is removed; the new high-water mark goes to the watermark sidecar.
+
+    :returns: Dict with the ``output`` path and ``high_water_mark`` string.
+    """
+    output = OUTPUT_FILE
+    scrape_output.write_records(spool.iter_records(), output, options.output_format)
+    spool.discard()
+    high_water_mark = progress["high_water_mark"]
+    high_water_mark = None if high_water_mark is None else str(high_water_mark)
+    _write_watermark(options.since, high_water_mark)
+    return {"output": output, "high_water_mark": high_water_mark}
+
+
+def _watermark_path():
+    """Return the watermark sidecar path that sits next to ``OUTPUT_FILE``."""
+    return f"{os.path.splitext(OUTPUT_FILE)[0]}.watermark.json"
+
+
+def _write_watermark(since, high_water_mark):
+    """Write the new high-water mark next to the scraped output."""
+    with open(_watermark_path(), "w", encoding="utf-8") as f:
+        json.dump({"since": since, "high_water_mark": high_water_mark}, f)
+
+
+def _resolve_options(options, overrides):
+    """Merge keyword overrides into :class:`PullOptions` and fill defaults."""
+    options = replace(options or PullOptions(), **overrides)
+    workers = FETCH_WORKERS if options.workers is None else options.workers
+    options.workers = max(1, int(workers))
+    if options.cache is None:
+        options.cache = _default_cache()
+    options.output_format = options.output_format or scrape_output.OUTPUT_FORMAT
+    if options.output_format not in scrape_output.OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {options.output_format}")
+    return options
+
+
+def pull_pages(target_n= 50, start_page=1, options=None, **overrides):
+    """
+    Pull records from paginated survey pages and save to JSON.
+
+    Pages are fetched by a pool of worker threads that share one token
+    bucket, so raising ``workers`` overlaps network latency without
+    exceeding ``rate_limit`` requests per second. With a page cache,
+    unchanged pages are revalidated and reused instead of re-parsed.
+    Each page's records are fsynced to a ``<output>.partial.jsonl`` spool
+    as soon as they are accepted, so memory stays flat and a crash keeps
+    every completed page; the spool is streamed into the final output at
+    the end. After every page a ``<output>.checkpoint.json`` records the
+    last page, rows, spool offset and watermark, and ``resume=True``
+    continues an interrupted run from there without refetching or
+    duplicating rows.
+
+    :param target_n: Maximum number of records to collect.
+    :param start_page: First page to start scraping from.
+    :param options: Optional :class:`PullOptions`.
+    :param overrides: Individual :class:`PullOptions` fields, e.g.
+        ``workers=4`` or ``rate_limit=0``.
+    :returns: Throughput stats dict (pages, rows, pages/s, rows/s) plus the
+        new ``high_water_mark`` and the ``output`` path. Writes
+        ``OUTPUT_FILE`` in the chosen format (``clean.py`` reads JSON arrays
+        and JSONL alike) and the watermark to a ``<output>.watermark.json``
+        sidecar.
+    """
 
-        # Slow the speed of requests to ensure we can reach target n
-        time.sleep(10)
+    options = _resolve_options(options, overrides)
+    since_id = _parse_watermark(options.since)
+
+    # Parses through robots.txt (not needed when replaying from cache)
+    robot = None if options.offline else url_check()
+    options.rate_limit = resolve_rate_limit(options.rate_limit, robot)
+    started = time.monotonic()
+    run = {
+        "start_page": start_page, "target_n": target_n,
+        "since": options.since, "output_format": options.output_format,
+    }
+    checkpoint = scrape_output.Checkpoint(_checkpoint_path(), run)
+    spool, progress, next_page = _open_spool(checkpoint, options, since_id)
+
+    # Run until you've met your target number of records
+    page_iter = _iter_page_records(next_page or start_page, robot, options)
+    try:
+        _collect_pages(page_iter, spool, checkpoint, progress, target_n)
+    finally:
+        page_iter.close()
+        spool.close()
+        if options.cache is not None:
+            options.cache.flush()
 
-    # Save the list as a JSON array
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_records, f, indent=2)
+    if progress["caught_up"]:
+        print(f"Reached watermark {since_id}; stopped paging.")
+
+    # Stream the spooled pages into the requested output format
+    finished = _finish_output(spool, options, progress)
+    checkpoint.clear()
 
     # Confirm number of records in applicant_data
-    print("Finished. Total records saved:", num_rec)
+    print("Finished. Total records saved:", progress["rows"])
+    stats = _throughput(progress["pages"], progress["rows"], time.monotonic() - started)
+    stats.update(finished)
+    print(
+        f"Throughput: {stats['pages_per_s']} pages/s, "
+        f"{stats['rows_per_s']} rows/s; high-water mark {stats['high_water_mark']}"
+    )
+    return stats
+
+
+def _build_arg_parser():
+    """Return the command-line parser for :func:`main`."""
+    parser = argparse.ArgumentParser(description="Scrape GradCafe survey pages.")
+    parser.add_argument("--target-n", type=int, default=500, help="Rows to collect.")
+    parser.add_argument("--start-page", type=int, default=1, help="First page.")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent fetches.")
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR or None,
+        help="On-disk page cache directory (defaults to $SCRAPE_CACHE_DIR).",
+    )
+    parser.add_argument(
+        "--since",
+        default=None,
+        help="Stop at the first page with only result IDs at or below this watermark.",
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Serve pages only from --cache-dir without touching the network.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted pull with the same arguments from its checkpoint.",
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=scrape_output.OUTPUT_FORMATS,
+        default=None,
+        help="Output file format (defaults to $SCRAPE_OUTPUT_FORMAT or json).",
+    )
+    return parser
 
 
 #
-def main():
+def main(argv=None):
     """
     Run the scraper with the default target size.
 
     Intended for command-line use.
+
+    :param argv: Optional CLI arguments; ``None`` runs the default pull.
     """
-    pull_pages(target_n=500)
+    parser = _build_arg_parser()
+    args = parser.parse_args([] if argv is None else argv)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir or SCRAPE_CACHE_DIR")
+
+    cache = None
+    if args.cache_dir:
+        cache = PageCache(args.cache_dir, offline=args.offline)
+    pull_pages(
+        target_n=args.target_n,
+        start_page=args.start_page,
+        workers=args.workers,
+        cache=cache,
+        since=args.since,
+        output_format=args.output_format,
+        resume=args.resume,
+    )
 
 # Run only if executed directly
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
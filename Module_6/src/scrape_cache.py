@@ -0,0 +1,154 @@
+"""
+On-disk HTTP cache for GradCafe survey pages.
+
+Stores page bodies, response validators and parsed records so unchanged
+pages can be revalidated with conditional requests or replayed offline.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+
+CACHE_MAX_BYTES = int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+class PageCache:
+    """
+    Size-bounded on-disk HTTP cache for survey pages.
+
+    Each entry keeps the page body, its parsed records and the response
+    validators (``ETag``/``Last-Modified``) so unchanged pages can be
+    revalidated with a conditional GET and reused without re-parsing.
+    Entries are evicted least-recently-used first once the cache grows past
+    ``max_bytes``. In ``offline`` mode the network is never touched.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES, offline=False):
+        self.directory = directory
+        self.max_bytes = int(max_bytes)
+        self.offline = bool(offline)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._entries = self._load_index()
+        self._clock = max(
+            (entry.get("last_used", 0) for entry in self._entries.values()),
+            default=0,
+        )
+
+    def _path(self, key, suffix):
+        """Return the on-disk path for one cache entry file."""
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def _load_index(self):
+        """Read the entry index, treating a missing/corrupt index as empty."""
+        try:
+            with open(self._path("", self.INDEX_NAME), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _touch(self, entry):
+        """Mark an entry as most recently used."""
+        self._clock += 1
+        entry["last_used"] = self._clock
+
+    def validators(self, url):
+        """
+        Return conditional request headers for a cached URL.
+
+        :param url: Page URL.
+        :returns: Dict with ``If-None-Match``/``If-Modified-Since`` (may be empty).
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return {}
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+            return headers
+
+    def records(self, url):
+        """
+        Return the cached parsed records for ``url``.
+
+        :param url: Page URL.
+        :returns: List of record dicts, or None on a cache miss.
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            try:
+                with open(self._path(entry["key"], ".json"), "r", encoding="utf-8") as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                self._entries.pop(url, None)
+                return None
+            self._touch(entry)
+            return records
+
+    def store(self, url, headers, body, records):
+        """
+        Save a fetched page, its validators and parsed records.
+
+        :param url: Page URL.
+        :param headers: Response headers mapping.
+        :param body: Raw (decoded) page bytes.
+        :param records: Records parsed from ``body``.
+        """
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        records_blob = json.dumps(records, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            with open(self._path(key, ".html"), "wb") as f:
+                f.write(body)
+            with open(self._path(key, ".json"), "wb") as f:
+                f.write(records_blob)
+            entry = {
+                "key": key,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "size": len(body) + len(records_blob),
+            }
+            self._touch(entry)
+            self._entries[url] = entry
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Drop least-recently-used entries until under ``max_bytes``."""
+        total = sum(entry["size"] for entry in self._entries.values())
+        by_age = sorted(self._entries.items(), key=lambda item: item[1]["last_used"])
+        for url, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            for suffix in (".html", ".json"):
+                try:
+                    os.remove(self._path(entry["key"], suffix))
+                except FileNotFoundError:
+                    pass
+            total -= entry["size"]
+            del self._entries[url]
+
+    def _save_index(self):
+        """Atomically persist the entry index."""
+        index_path = self._path("", self.INDEX_NAME)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, index_path)
+
+    def flush(self):
+        """Persist LRU bookkeeping gathered from cache hits."""
+        with self._lock:
+            self._save_index()
@@ -0,0 +1,179 @@
+"""
+Keep-alive HTTP client used by the GradCafe scraper.
+
+Pools persistent connections per host, reuses one TLS context and decodes
+compressed responses so repeated page fetches avoid handshake overhead.
+"""
+
+import gzip
+import http.client
+import os
+import threading
+import zlib
+from collections import namedtuple
+from urllib import error, parse
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+# Keep-alive connection pool settings for page fetches
+HTTP_TIMEOUT = float(os.getenv("SCRAPE_HTTP_TIMEOUT", "30"))
+HTTP_MAX_IDLE_PER_HOST = int(os.getenv("SCRAPE_MAX_IDLE_PER_HOST", "4"))
+HTTP_MAX_REDIRECTS = 5
+ACCEPT_ENCODING = "gzip, deflate, br" if brotli is not None else "gzip, deflate"
+
+HttpResponse = namedtuple("HttpResponse", ["status", "headers", "body", "url"])
+
+
+def _decode_body(body, content_encoding):
+    """
+    Undo the ``Content-Encoding`` applied by the server.
+
+    :param body: Raw response bytes.
+    :param content_encoding: Value of the ``Content-Encoding`` header.
+    :returns: Decoded response bytes.
+    """
+
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate streams without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == "br" and brotli is not None:
+        return brotli.decompress(body)
+    return body
+
+
+def _new_connection(scheme, host, port, ssl_context_factory):
+    """Open a new HTTP(S) connection for the connection pool."""
+    if scheme == "https":
+        return http.client.HTTPSConnection(
+            host, port, timeout=HTTP_TIMEOUT, context=ssl_context_factory()
+        )
+    return http.client.HTTPConnection(host, port, timeout=HTTP_TIMEOUT)
+
+
+class HttpSession:
+    """
+    Minimal keep-alive HTTP client with per-host connection pooling.
+
+    Connections are checked out per request, so the session is safe to share
+    between the page fetch threads. Responses are transparently decoded from
+    gzip/deflate (and brotli when installed), and errors are surfaced as
+    ``urllib.error`` exceptions so callers keep their existing handling.
+    """
+
+    def __init__(self, user_agent, ssl_context_factory, max_idle_per_host=HTTP_MAX_IDLE_PER_HOST):
+        self.user_agent = user_agent
+        self.ssl_context_factory = ssl_context_factory
+        self.max_idle_per_host = max(1, int(max_idle_per_host))
+        self.stats = {"requests": 0, "reused": 0, "wire_bytes": 0, "body_bytes": 0}
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _checkout(self, key):
+        """Return ``(connection, reused)`` for a host key."""
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.stats["reused"] += 1
+                return idle.pop(), True
+        return _new_connection(*key, self.ssl_context_factory), False
+
+    def _checkin(self, key, conn):
+        """Return a healthy connection to the idle pool (or close it)."""
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _send(self, url, headers):
+        """Send one GET and return ``(status, headers, wire_body)``."""
+        parts = parse.urlsplit(url)
+        scheme = parts.scheme.lower()
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        # A pooled socket may have been closed by the server while idle, so
+        # retry once on a fresh connection before reporting a failure.
+        for attempt in range(2):
+            conn, reused = self._checkout(key)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as err:
+                conn.close()
+                if reused and attempt == 0:
+                    continue
+                raise error.URLError(err) from err
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return response.status, response.headers, body
+        raise error.URLError("connection retry exhausted")  # pragma: no cover
+
+    def get(self, url, headers=None):
+        """
+        Fetch ``url`` and return an :data:`HttpResponse` with a decoded body.
+
+        Redirects are followed (up to ``HTTP_MAX_REDIRECTS``). Status codes
+        of 400 and above raise :class:`urllib.error.HTTPError`.
+
+        :param url: Absolute URL to fetch.
+        :param headers: Optional extra request headers.
+        :returns: :data:`HttpResponse` tuple.
+        """
+
+        request_headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Connection": "keep-alive",
+        }
+        request_headers.update(headers or {})
+
+        for _hop in range(HTTP_MAX_REDIRECTS + 1):
+            status, response_headers, raw_body = self._send(url, request_headers)
+            location = response_headers.get("Location")
+            if status in (301, 302, 303, 307, 308) and location:
+                url = parse.urljoin(url, location)
+                continue
+            break
+        else:
+            raise error.URLError(f"too many redirects for {url}")
+
+        try:
+            body = _decode_body(raw_body, response_headers.get("Content-Encoding"))
+        except (OSError, EOFError, zlib.error) as err:
+            raise error.URLError(f"could not decode response body: {err}") from err
+
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["wire_bytes"] += len(raw_body)
+            self.stats["body_bytes"] += len(body)
+
+        if status >= 400:
+            raise error.HTTPError(url, status, str(status), response_headers, None)
+        return HttpResponse(status, response_headers, body, url)
+
+    def close(self):
+        """Close every idle pooled connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
@@ -0,0 +1,192 @@
+"""
+Durable output writers for scraped survey records.
+
+Pages are appended to a page-framed JSONL spool and fsynced one page at a
+time, so a crash loses at most the page being written. When a pull finishes
+the spool is streamed into the requested output format without holding every
+record in memory.
+"""
+
+import json
+import os
+import time
+
+
+# Final output format: indented JSON array, compact JSON array or JSONL. The
+# output path is the same for every format; clean.iter_rows reads all three.
+OUTPUT_FORMAT = os.getenv("SCRAPE_OUTPUT_FORMAT", "json")
+OUTPUT_FORMATS = ("json", "json-compact", "jsonl")
+
+
+class PageSpool:
+    """
+    Append-only, page-framed JSONL spool.
+
+    Each line holds one completed page as ``{"page": n, "records": [...]}``
+    and is flushed and fsynced before :meth:`append` returns. Opening with
+    ``resume=True`` keeps the pages already on disk and truncates a torn
+    trailing line left by a crash, so writing can continue after the last
+    completed page. ``offset`` additionally cuts the spool back to a byte
+    length recorded in a :class:`Checkpoint`.
+    """
+
+    def __init__(self, path, resume=False, offset=None):
+        self.path = path
+        self.pages = 0
+        self.rows = 0
+        self.last_page = None
+        if resume and os.path.exists(path):
+            self._recover(offset)
+        self._handle = open(path, "ab" if resume else "wb")  # pylint: disable=consider-using-with
+
+    def _recover(self, offset):
+        """Count intact pages and drop anything after the last one."""
+        good_end = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if offset is not None and good_end + len(line) > offset:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    page = json.loads(line)
+                except ValueError:
+                    break
+                self.pages += 1
+                self.rows += len(page["records"])
+                self.last_page = page["page"]
+                good_end += len(line)
+        with open(self.path, "rb+") as f:
+            f.truncate(good_end)
+
+    def append(self, page, records):
+        """
+        Durably append one page of records.
+
+        :param page: Page number the records came from.
+        :param records: List of record dicts kept from that page.
+        """
+        line = json.dumps({"page": page, "records": records}) + "\n"
+        self._handle.write(line.encode("utf-8"))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.pages += 1
+        self.rows += len(records)
+        self.last_page = page
+
+    @property
+    def offset(self):
+        """Byte length of the completed pages on disk."""
+        return self._handle.tell()
+
+    def iter_records(self):
+        """Yield spooled records in page order, one page in memory at a time."""
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield from json.loads(line)["records"]
+
+    def close(self):
+        """Close the spool file, keeping it on disk."""
+        self._handle.close()
+
+    def discard(self):
+        """Close and delete the spool."""
+        self.close()
+        os.remove(self.path)
+
+
+class Checkpoint:
+    """
+    Atomic JSON checkpoint for a resumable pull.
+
+    Records the run parameters plus the last completed page, rows written,
+    spool byte offset and high-water mark after every page, stamped with
+    ``saved_at`` (epoch seconds) so callers can bound its age. A checkpoint
+    is only honoured by a later run with identical parameters.
+    """
+
+    def __init__(self, path, run):
+        self.path = path
+        self.run = run
+
+    def load(self):
+        """
+        Return the saved state for this run, or None.
+
+        Missing, unreadable or mismatched checkpoints yield None.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("run") != self.run:
+            return None
+        return state
+
+    def save(self, **state):
+        """Atomically replace the checkpoint with ``state`` for this run."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run": self.run, **state, "saved_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Delete the checkpoint if present."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _write_json(records, f):
+    """Stream records as ``json.dump(records, f, indent=2)`` would."""
+    count = 0
+    for record in records:
+        f.write("[\n" if count == 0 else ",\n")
+        f.write("\n".join(f"  {line}" for line in json.dumps(record, indent=2).split("\n")))
+        count += 1
+    f.write("\n]" if count else "[]")
+
+
+def _write_json_compact(records, f):
+    """Stream records as a JSON array without whitespace."""
+    f.write("[")
+    for index, record in enumerate(records):
+        if index:
+            f.write(",")
+        f.write(json.dumps(record, separators=(",", ":")))
+    f.write("]")
+
+
+def _write_jsonl(records, f):
+    """Stream records one JSON object per line."""
+    for record in records:
+        f.write(json.dumps(record))
+        f.write("\n")
+
+
+WRITERS = {
+    "json": _write_json,
+    "json-compact": _write_json_compact,
+    "jsonl": _write_jsonl,
+}
+
+
+def write_records(records, path, output_format):
+    """
+    Atomically write an iterable of records in one of :data:`OUTPUT_FORMATS`.
+
+    :param records: Iterable of record dicts (consumed once).
+    :param path: Destination file; replaced only after a complete write.
+    :param output_format: Output format name.
+    :raises ValueError: If the format is unknown.
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        WRITERS[output_format](records, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,131 @@
+"""
+Cached robots.txt policy for the GradCafe scraper.
+
+The robots.txt reply is kept in a small JSON file with a TTL, so repeated
+pulls (and every worker process of a sharded backfill) reuse it instead of
+fetching it again. The parsed policy memoizes allow/deny decisions and
+exposes the site's Crawl-delay/Request-rate as a request rate.
+"""
+
+import json
+import os
+import time
+from urllib import robotparser
+
+
+# Seconds a cached robots.txt stays fresh; 0 disables the cache
+ROBOTS_TTL = float(os.getenv("SCRAPE_ROBOTS_TTL", "86400"))
+
+
+class RobotsPolicy(robotparser.RobotFileParser):
+    """
+    Robots parser that memoizes :meth:`can_fetch` decisions.
+
+    Built from a cached robots.txt entry with :meth:`from_entry`. Status
+    codes are interpreted the way :meth:`RobotFileParser.read` does: 401 and
+    403 disallow everything, other 4xx replies allow everything, and 5xx
+    replies (the site is unavailable) disallow everything.
+    """
+
+    def __init__(self, url=""):
+        super().__init__(url)
+        self._decisions = {}
+
+    @classmethod
+    def from_entry(cls, entry):
+        """
+        Build a policy from a :class:`RobotsCache` entry.
+
+        :param entry: Dict with ``url``, ``status`` and ``text``.
+        :returns: Parsed :class:`RobotsPolicy`.
+        """
+        policy = cls(entry["url"])
+        status = entry["status"]
+        if status in (401, 403):
+            policy.disallow_all = True
+        elif 400 <= status < 500:
+            policy.allow_all = True
+        elif status >= 500:
+            policy.disallow_all = True
+        else:
+            policy.parse(entry["text"].splitlines())
+        return policy
+
+    def can_fetch(self, useragent, url):
+        """Return the (memoized) robots.txt decision for ``url``."""
+        key = (useragent, url)
+        allowed = self._decisions.get(key)
+        if allowed is None:
+            allowed = super().can_fetch(useragent, url)
+            self._decisions[key] = allowed
+        return allowed
+
+    def request_rate_limit(self, useragent):
+        """
+        Return the site's requested pace in requests per second.
+
+        ``Crawl-delay`` wins over ``Request-rate`` when both are present. A
+        zero or negative delay sets no pace rather than an unlimited one.
+
+        :param useragent: User agent the rules are looked up for.
+        :returns: Requests per second, or None when robots.txt sets no pace.
+        """
+        delay = self.crawl_delay(useragent)
+        if delay is not None and float(delay) > 0:
+            return 1.0 / float(delay)
+        rate = self.request_rate(useragent)
+        if rate is not None and rate.seconds > 0:
+            return rate.requests / rate.seconds
+        return None
+
+
+class RobotsCache:
+    """
+    Single-entry JSON cache of the robots.txt reply.
+
+    Stores the robots URL, HTTP status, body text and fetch time. An entry
+    is served only for the same URL while younger than ``ttl`` seconds
+    (defaulting to ``SCRAPE_ROBOTS_TTL``); a non-positive TTL disables it.
+    5xx replies are never stored, so an outage is retried on the next pull
+    instead of deciding the policy for a whole TTL.
+    """
+
+    def __init__(self, path, ttl=None):
+        self.path = path
+        self.ttl = float(ROBOTS_TTL if ttl is None else ttl)
+
+    def load(self, url):
+        """
+        Return the fresh cached entry for ``url``, or None.
+
+        Missing, corrupt, expired or mismatched entries yield None.
+        """
+        if self.ttl <= 0:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or entry.get("url") != url:
+            return None
+        age = time.time() - entry.get("fetched_at", 0)
+        if not 0 <= age < self.ttl:
+            return None
+        return entry
+
+    def store(self, url, status, text):
+        """
+        Atomically save a robots.txt reply and return the new entry.
+
+        :param url: robots.txt URL.
+        :param status: HTTP status of the reply.
+        :param text: Reply body (empty for error statuses).
+        """
+        entry = {"url": url, "status": status, "text": text, "fetched_at": time.time()}
+        if self.ttl > 0 and status < 500:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        return entry
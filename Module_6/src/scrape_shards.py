@@ -0,0 +1,262 @@
+"""
+Sharded backfill scraping across worker processes.
+
+A page range is split into contiguous shards, one per process. Each process
+fetches its pages with :func:`scrape.create_pages`, :func:`scrape.check_url`
+and :func:`scrape.scrape_data` under its share of the global rate limit and
+writes a JSONL shard. Pages that fail to fetch are recorded as gaps and
+retried once after every shard has finished. A final merge streams the
+shards in page order into the normal output file, dropping records whose
+URL was already seen.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from . import scrape, scrape_output
+except ImportError:  # pragma: no cover - script execution path
+    import scrape
+    import scrape_output
+
+
+SHARD_PROCESSES = int(os.getenv("SCRAPE_SHARD_PROCESSES", "4"))
+
+
+def partition_pages(start_page, end_page, shards):
+    """
+    Split an inclusive page range into contiguous, near-equal shards.
+
+    :param start_page: First page (inclusive).
+    :param end_page: Last page (inclusive).
+    :param shards: Requested shard count; capped at the number of pages.
+    :returns: List of ``(first, last)`` inclusive ranges in page order.
+    :raises ValueError: If the range is empty.
+    """
+    total = end_page - start_page + 1
+    if total < 1:
+        raise ValueError(f"Empty page range: {start_page}-{end_page}")
+    shards = max(1, min(int(shards), total))
+    size, extra = divmod(total, shards)
+    ranges = []
+    first = start_page
+    for index in range(shards):
+        last = first + size - 1 + (1 if index < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def shard_path(shard_dir, index):
+    """Return the JSONL path for shard ``index``."""
+    return os.path.join(shard_dir, f"shard-{index:03d}.jsonl")
+
+
+def scrape_shard(index, page_range, rate_limit, shard_dir, tokens=1.0):
+    """
+    Scrape one page range into its JSONL shard (runs in a worker process).
+
+    Pages are written one record per line and fsynced page by page. A page
+    that cannot be fetched is recorded in ``failed`` and skipped; the shard
+    stops early at the first page with no records, which is where the
+    survey results end.
+
+    :param index: Shard number, used for the file name.
+    :param page_range: Inclusive ``(first, last)`` pages.
+    :param rate_limit: Requests per second allowed for this process.
+    :param shard_dir: Directory receiving the shard file.
+    :param tokens: Request tokens the shard's rate limiter starts with;
+        below 1 delays the first fetch by the missing fraction of a token.
+    :returns: Stats dict with ``index``, ``path``, ``pages``, ``rows`` and
+        ``failed`` (inclusive ``[first, last]`` ranges of pages that could
+        not be fetched).
+    """
+    path = shard_path(shard_dir, index)
+    limiter = scrape.RateLimiter(rate_limit, tokens=tokens)
+    robot = scrape.url_check()
+    stats = {"index": index, "path": path, "pages": 0, "rows": 0, "failed": []}
+    with open(path, "w", encoding="utf-8") as f:
+        for page in range(page_range[0], page_range[1] + 1):
+            limiter.acquire()
+            soup = scrape.check_url(scrape.create_pages(page), robot)
+            if soup is None:
+                _add_failed_page(stats["failed"], page)
+                continue
+            records = scrape.scrape_data(soup)
+            if not records:
+                break
+            for record in records:
+                f.write(json.dumps(record))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+            stats["pages"] += 1
+            stats["rows"] += len(records)
+    print(f"Shard {index} pages {page_range[0]}-{page_range[1]}: saved {stats['rows']}")
+    return stats
+
+
+def _add_failed_page(failed, page):
+    """Record ``page`` in ``failed``, extending the last range if adjacent."""
+    if failed and failed[-1][1] == page - 1:
+        failed[-1][1] = page
+    else:
+        failed.append([page, page])
+
+
+def retry_failed(shards, rate_limit, shard_dir):
+    """
+    Retry every failed page range once, each into a shard of its own.
+
+    Retries start with an empty token bucket so they keep the pace of the
+    shards that ran just before them. Ranges that fail again are printed as
+    a warning.
+
+    :param shards: Shard stats from :func:`scrape_shard`, in page order.
+    :param rate_limit: Requests per second for the retries.
+    :param shard_dir: Directory receiving the retry shards.
+    :returns: Shard stats in merge order, each retry placed right after the
+        shard it belongs to, and the ranges still failing after the retry.
+    """
+    merged, still_failed = [], []
+    index = len(shards)
+    for shard in shards:
+        merged.append(shard)
+        for first, last in shard["failed"]:
+            retry = scrape_shard(index, (first, last), rate_limit, shard_dir, tokens=0.0)
+            index += 1
+            merged.append(retry)
+            still_failed.extend(retry["failed"])
+    if still_failed:
+        gaps = ", ".join(f"{first}-{last}" for first, last in still_failed)
+        print(f"Warning: pages {gaps} failed twice and are missing from the output")
+    return merged, still_failed
+
+
+def iter_unique_records(paths):
+    """
+    Yield records from JSONL shards in order, skipping repeated URLs.
+
+    Records without a URL cannot be matched and are always kept.
+
+    :param paths: Shard files in page order.
+    """
+    seen = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                url = record.get("url")
+                if url:
+                    if url in seen:
+                        continue
+                    seen.add(url)
+                yield record
+
+
+def merge_shards(paths, output, output_format):
+    """
+    Merge shards into one output file, deduplicating by URL.
+
+    :param paths: Shard files in page order.
+    :param output: Destination path.
+    :param output_format: One of :data:`scrape_output.OUTPUT_FORMATS`.
+    :returns: Number of records written.
+    """
+    written = {"rows": 0}
+
+    def counted(records):
+        for record in records:
+            written["rows"] += 1
+            yield record
+
+    scrape_output.write_records(counted(iter_unique_records(paths)), output, output_format)
+    return written["rows"]
+
+
+def run_sharded(start_page, end_page, processes=None, rate_limit=None, shard_dir=None):
+    """
+    Scrape ``start_page``..``end_page`` across processes and merge the shards.
+
+    The global ``rate_limit`` is divided evenly between the processes and
+    each shard's first request is staggered by its index, so the combined
+    request rate never exceeds it, even at start-up. Pages that failed are
+    retried once at the full rate; those failing again are reported, not
+    silently dropped.
+
+    :param start_page: First page (inclusive).
+    :param end_page: Last page (inclusive).
+    :param processes: Worker processes (defaults to ``SCRAPE_SHARD_PROCESSES``).
+    :param rate_limit: Global requests per second (defaults to
+        :func:`scrape.resolve_rate_limit`; ``0`` disables pacing).
+    :param shard_dir: Shard directory (defaults to ``<output>.shards``).
+    :returns: Stats dict with ``pages``, merged ``rows``, ``duplicates``
+        dropped, ``elapsed_s``, per-shard ``shards`` results (retries
+        included), the ``failed`` page ranges left after the retry and the
+        ``output`` path.
+    """
+    ranges = partition_pages(start_page, end_page, processes or SHARD_PROCESSES)
+    # Loading robots.txt here also warms its cache for the worker processes
+    rate_limit = scrape.resolve_rate_limit(rate_limit, scrape.url_check())
+    shard_dir = shard_dir or f"{os.path.splitext(scrape.OUTPUT_FILE)[0]}.shards"
+    os.makedirs(shard_dir, exist_ok=True)
+    started = time.monotonic()
+
+    count = len(ranges)
+    with ProcessPoolExecutor(max_workers=count) as pool:
+        shards = list(pool.map(
+            scrape_shard, range(count), ranges, [rate_limit / count] * count, [shard_dir] * count,
+            [1.0 - index / count for index in range(count)],
+        ))
+    shards, failed = retry_failed(shards, rate_limit, shard_dir)
+
+    output = scrape.OUTPUT_FILE
+    rows = merge_shards([shard["path"] for shard in shards], output, scrape_output.OUTPUT_FORMAT)
+    scraped = sum(shard["rows"] for shard in shards)
+    stats = {
+        "pages": sum(shard["pages"] for shard in shards),
+        "rows": rows,
+        "duplicates": scraped - rows,
+        "elapsed_s": round(time.monotonic() - started, 3),
+        "shards": shards,
+        "failed": failed,
+        "output": output,
+    }
+    print(
+        f"Merged {len(shards)} shards into {output}: "
+        f"{rows} rows ({scraped - rows} duplicates dropped)"
+    )
+    return stats
+
+
+def main(argv=None):
+    """
+    Run a sharded backfill from the command line.
+
+    :param argv: CLI arguments (``--end-page`` is required).
+    """
+    parser = argparse.ArgumentParser(description="Sharded GradCafe backfill scrape.")
+    parser.add_argument("--start-page", type=int, default=1, help="First page.")
+    parser.add_argument("--end-page", type=int, required=True, help="Last page (inclusive).")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes.")
+    parser.add_argument(
+        "--rate-limit", type=float, default=None, help="Global requests per second."
+    )
+    parser.add_argument("--shard-dir", default=None, help="Directory for JSONL shards.")
+    args = parser.parse_args(argv)
+    run_sharded(
+        args.start_page,
+        args.end_page,
+        processes=args.processes,
+        rate_limit=args.rate_limit,
+        shard_dir=args.shard_dir,
+    )
+
+
+# Run only if executed directly
+if __name__ == "__main__":
+    main(sys.argv[1:])
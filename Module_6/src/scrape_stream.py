@@ -0,0 +1,287 @@
+"""
+Streaming parser backend for GradCafe survey pages.
+
+Tokenizes the page with the standard-library :class:`html.parser.HTMLParser`
+and builds a tiny element tree for only the first ``<table>``'s first
+``<tbody>``, stopping as soon as that body closes. The elements implement the
+small slice of the BeautifulSoup API that :func:`scrape.scrape_data` uses
+(``find``, ``find_all``, ``get_text`` and item access), and the tree-building
+rules mirror BeautifulSoup's ``html.parser`` builder so both backends yield
+identical records.
+"""
+
+from html.entities import html5
+from html.parser import HTMLParser
+import re
+
+
+# Tags BeautifulSoup closes immediately because they cannot have contents
+VOID_ELEMENTS = frozenset({
+    "area", "base", "basefont", "bgsound", "br", "col", "command", "embed",
+    "frame", "hr", "image", "img", "input", "isindex", "keygen", "link",
+    "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr",
+})
+
+# Tags whose strings are kept out of get_text() on ordinary elements
+STRING_CONTAINERS = frozenset({"rp", "rt", "script", "style", "template"})
+
+# Tags inside which whitespace-only strings are kept verbatim
+PRESERVE_WHITESPACE = frozenset({"pre", "textarea"})
+
+TEXT = "text"
+CDATA = "cdata"
+MAIN_CONTENT_KINDS = frozenset({TEXT, CDATA})
+
+_ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+_DECIMAL_REF_RE = re.compile(r"^([0-9]+)(.*)")
+_HEX_REF_RE = re.compile(r"^([0-9a-f]+)(.*)")
+# Named entities as BeautifulSoup knows them: semicolon-terminated HTML5 names
+_ENTITIES = {name[:-1]: char for name, char in html5.items() if name.endswith(";")}
+
+
+class StreamElement:
+    """
+    Lightweight element produced by the streaming backend.
+
+    Children are either nested :class:`StreamElement` objects or
+    ``(kind, text)`` tuples, where ``kind`` is :data:`TEXT`, :data:`CDATA`
+    or the name of the enclosing string-container tag (``script``,
+    ``style``...).
+    """
+
+    __slots__ = ("name", "attrs", "children")
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.children = []
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __repr__(self):
+        return f"<StreamElement {self.name}>"
+
+    def _descendants(self):
+        """Yield descendant elements in document order."""
+        stack = list(reversed(self.children))
+        while stack:
+            child = stack.pop()
+            if isinstance(child, StreamElement):
+                yield child
+                stack.extend(reversed(child.children))
+
+    def _strings(self):
+        """Yield ``(kind, text)`` strings in document order."""
+        stack = list(reversed(self.children))
+        while stack:
+            child = stack.pop()
+            if isinstance(child, StreamElement):
+                stack.extend(reversed(child.children))
+            else:
+                yield child
+
+    def get(self, key, default=None):
+        """Return an attribute value, or ``default`` when it is missing."""
+        return self.attrs.get(key, default)
+
+    def find_all(self, name, **attrs):
+        """
+        Return descendant elements named ``name`` in document order.
+
+        Attribute filters accept a literal value or a callable that receives
+        the attribute value (``None`` when the attribute is missing).
+        """
+        return [
+            element for element in self._descendants()
+            if element.name == name and _attrs_match(element, attrs)
+        ]
+
+    def find(self, name, **attrs):
+        """Return the first matching descendant element, or None."""
+        for element in self._descendants():
+            if element.name == name and _attrs_match(element, attrs):
+                return element
+        return None
+
+    def get_text(self, separator="", strip=False):
+        """Join the element's text like :meth:`bs4.Tag.get_text`."""
+        if self.name in STRING_CONTAINERS:
+            kinds = frozenset({self.name})
+        else:
+            kinds = MAIN_CONTENT_KINDS
+        pieces = []
+        for kind, text in self._strings():
+            if kind not in kinds:
+                continue
+            if strip:
+                text = text.strip()
+            if text:
+                pieces.append(text)
+        return separator.join(pieces)
+
+
+def _attrs_match(element, filters):
+    """Return True when every attribute filter accepts the element."""
+    for key, expected in filters.items():
+        value = element.attrs.get(key)
+        if callable(expected):
+            if not expected(value):
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+def _numeric_reference(name):
+    """Decode a numeric character reference the way BeautifulSoup does."""
+    base, pattern = 10, _DECIMAL_REF_RE
+    if name[:1] in ("x", "X"):
+        name, base, pattern = name[1:], 16, _HEX_REF_RE
+    try:
+        return _code_point(int(name, base)), ""
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return "", name
+        return _code_point(int(match.group(1), base)), match.group(2)
+
+
+def _code_point(number):
+    """Map a reference number to text, using windows-1252 for C1 controls."""
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\N{REPLACEMENT CHARACTER}"
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("windows-1252")
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+
+class _StopParsing(Exception):
+    """Raised once the target table body has been fully read."""
+
+
+class _TableBodyParser(HTMLParser):
+    """Tokenizer that captures the first table's first tbody."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.document = StreamElement("[document]")
+        self._open = []
+        self._captured = []
+        self._table_at = None
+        self._tbody_at = None
+        # Void tags closed on open; a later explicit end tag is skipped once
+        self._already_closed = {}
+        self._pending = []
+
+    def _flush(self):
+        """Turn buffered character data into one string node."""
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        if not self._captured:
+            return
+        if not text.strip(_ASCII_SPACES) and not PRESERVE_WHITESPACE.intersection(self._open):
+            text = "\n" if "\n" in text else " "
+        kind = next((name for name in reversed(self._open) if name in STRING_CONTAINERS), TEXT)
+        self._captured[-1].children.append((kind, text))
+
+    def _push(self, tag, attrs):
+        """Open a tag, capturing it when it lies inside the target tbody."""
+        self._flush()
+        depth = len(self._open)
+        self._open.append(tag)
+        if self._captured:
+            element = StreamElement(tag, {key: value or "" for key, value in attrs})
+            self._captured[-1].children.append(element)
+            self._captured.append(element)
+        elif tag == "table" and self._table_at is None:
+            self._table_at = depth
+        elif tag == "tbody" and self._table_at is not None and self._tbody_at is None:
+            self._tbody_at = depth
+            element = StreamElement(tag, {key: value or "" for key, value in attrs})
+            table = StreamElement("table")
+            table.children.append(element)
+            self.document.children.append(table)
+            self._captured.append(element)
+
+    def _pop_to(self, tag):
+        """Close the most recent open ``tag`` and everything opened after it."""
+        self._flush()
+        if tag not in self._open:
+            return
+        while self._open:
+            depth = len(self._open) - 1
+            name = self._open.pop()
+            if self._captured:
+                self._captured.pop()
+            if depth in (self._tbody_at, self._table_at):
+                raise _StopParsing
+            if name == tag:
+                return
+
+    def handle_starttag(self, tag, attrs):
+        self._push(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self._pop_to(tag)
+            self._already_closed[tag] = self._already_closed.get(tag, 0) + 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._push(tag, attrs)
+        self._pop_to(tag)
+
+    def handle_endtag(self, tag):
+        if self._already_closed.get(tag):
+            self._already_closed[tag] -= 1
+            return
+        self._pop_to(tag)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def handle_data(self, data):
+        self._pending.append(data)
+
+    def handle_charref(self, name):
+        text, extra = _numeric_reference(name)
+        self._pending.append(text)
+        self._pending.append(extra)
+
+    def handle_entityref(self, name):
+        self._pending.append(_ENTITIES.get(name, f"&{name}"))
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith("CDATA[") and self._captured:
+            self._captured[-1].children.append((CDATA, data[len("CDATA["):]))
+
+
+def parse_document(html):
+    """
+    Parse ``html`` into a minimal document holding the first table body.
+
+    :param html: Page HTML as text.
+    :returns: Root :class:`StreamElement`; it contains ``table > tbody`` when
+        the page has one and is empty otherwise.
+    """
+    builder = _TableBodyParser()
+    try:
+        builder.feed(html)
+        builder.close()
+    except _StopParsing:
+        pass
+    return builder.document
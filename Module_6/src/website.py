@@ -12,6 +12,7 @@ import json
 import logging
 import os
 import re
+import sqlite3
 import subprocess
 import sys
 import threading
@@ -20,8 +21,9 @@ from psycopg import sql
 from flask import Flask, current_app, jsonify, redirect, render_template, request, url_for
 
 try:
-    from . import db_builders
+    from . import clean, db_builders
 except ImportError:  # pragma: no cover - script execution path
+    import clean
     import db_builders
 
 try:
@@ -130,6 +132,7 @@ PULL_STATE = {"status": "idle", "message": ""}
 ANALYSIS_STATE = {"message": ""}
 PIPELINE_ERRORS = (
     OSError,
+    sqlite3.Error,
     subprocess.SubprocessError,
     ValueError,
     TypeError,
@@ -299,10 +302,30 @@ def load_cleaned_data_to_db(file_path: str, query_limit=None) -> int:
     return len(inserts)
 
 
+def _run_clean():
+    """
+    Run ``clean.main()`` in this process, reporting any failure as a pipeline error.
+
+    As a subprocess every clean failure surfaced as ``CalledProcessError``;
+    in-process it can raise anything (SQLite, the model runtime), so it is
+    wrapped to keep the pull state from being left ``"running"``.
+
+    :raises RuntimeError: If the clean step fails.
+    """
+    try:
+        clean.main()
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        raise RuntimeError(f"Clean step failed: {exc}") from exc
+
+
 def run_pull_pipeline():
     """
     Run the full scrape → clean → load pipeline.
 
+    The clean step runs in this process rather than as ``python clean.py``,
+    so the LLM standardizer it imports (``LLM_STANDARDIZER_MODE=inprocess``)
+    loads the model on the first pull and reuses it for every later one.
+
     :returns: True on success, False on failure.
     """
 
@@ -320,18 +343,14 @@ def run_pull_pipeline():
             [
                 sys.executable,
                 "-c",
-                f"import scrape; scrape.pull_pages(target_n={PULL_TARGET_N})",
+                f"import scrape; scrape.pull_pages(target_n={PULL_TARGET_N}, resume=True)",
             ],
             cwd=BASE_DIR,
             check=True,
         )
 
-        # Run clean.py to clean the raw data and then load_data.py to insert into the database
-        subprocess.run(
-            [sys.executable, os.path.join(BASE_DIR, "clean.py")],
-            cwd=BASE_DIR,
-            check=True,
-        )
+        # Clean the raw data in-process and then run load_data.py to insert into the database
+        _run_clean()
         load_result = subprocess.run(
             [sys.executable, os.path.join(BASE_DIR, "load_data.py")],
             cwd=BASE_DIR,
@@ -11,6 +11,7 @@ if str(ROOT) not in sys.path:
 os.environ.setdefault("DATABASE_URL", "postgresql://localhost/grad_cafe")
 
 import json
+import sqlite3
 from types import SimpleNamespace
 
 import pytest
@@ -57,13 +58,11 @@ def test_post_pull_data_triggers_loader_with_scraped_rows(monkeypatch, tmp_path)
     def fake_subprocess_run(args, cwd=None, check=None, capture_output=False, text=False):
         if len(args) >= 2 and args[1] == "-c":
             calls.append("scrape")
+            assert "resume=True" in args[2]
             os.makedirs(cwd, exist_ok=True)
             with open(os.path.join(cwd, "applicant_data.json"), "w", encoding="utf-8") as handle:
                 json.dump(fake_rows, handle)
             return SimpleNamespace(stdout="")
-        if len(args) >= 2 and os.path.basename(args[1]) == "clean.py":
-            calls.append("clean")
-            return SimpleNamespace(stdout="")
         if len(args) >= 2 and os.path.basename(args[1]) == "load_data.py":
             calls.append("load")
             with open(os.path.join(cwd, "applicant_data.json"), "r", encoding="utf-8") as handle:
@@ -75,6 +74,7 @@ def test_post_pull_data_triggers_loader_with_scraped_rows(monkeypatch, tmp_path)
     monkeypatch.setattr(website, "BASE_DIR", str(tmp_path))
     monkeypatch.setattr(website, "RAW_FILE", str(tmp_path / "applicant_data.json"))
     monkeypatch.setattr(website.subprocess, "run", fake_subprocess_run)
+    monkeypatch.setattr(website.clean, "main", lambda: calls.append("clean"))
     website.PULL_STATE["status"] = "idle"
     app = website.create_app(
         run_pull_pipeline_fn=website.run_pull_pipeline,
@@ -147,6 +147,7 @@ def test_run_pull_pipeline_sets_default_message(monkeypatch, tmp_path):
 
     monkeypatch.setattr(website, "RAW_FILE", str(tmp_path / "applicant_data.json"))
     monkeypatch.setattr(website.subprocess, "run", fake_subprocess_run)
+    monkeypatch.setattr(website.clean, "main", lambda: None)
 
     website.run_pull_pipeline()
     assert website.PULL_STATE["status"] == "done"
@@ -311,3 +312,58 @@ def test_pull_data_redirects_for_html_form_posts():
     assert resp.status_code == 303
     assert resp.headers["Location"].endswith("/")
     assert tasks == [(website.SCRAPE_TASK_NAME, {})]
+
+
+def test_run_pull_pipeline_reuses_standardizer_across_pulls(monkeypatch, tmp_path):
+    """Clean runs in the web process, so later pulls reuse the loaded standardizer."""
+    clean = website.clean
+    pulls = iter([["1", "2"], ["3"]])
+    imported = []
+
+    def fake_subprocess_run(args, cwd=None, check=None, capture_output=False, text=False):
+        if args[1] == "-c":
+            rows = [
+                {"program_name": "cs", "university": "u", "url": f"https://example.com/result/{i}"}
+                for i in next(pulls)
+            ]
+            (tmp_path / "applicant_data.json").write_text(json.dumps(rows), encoding="utf-8")
+        return SimpleNamespace(stdout="")
+
+    def standardize_rows(rows):
+        for row in rows:
+            yield {**row, "llm-generated-program": row["program"].upper()}
+
+    def recording_import(name):
+        imported.append(name)
+        return SimpleNamespace(standardize_rows=standardize_rows)
+
+    monkeypatch.setattr(website.subprocess, "run", fake_subprocess_run)
+    monkeypatch.setattr(website, "RAW_FILE", str(tmp_path / "applicant_data.json"))
+    monkeypatch.setattr(clean, "SCRAPED_FILE", str(tmp_path / "applicant_data.json"))
+    monkeypatch.setattr(clean, "MASTER_FILE", str(tmp_path / "master.jsonl"))
+    monkeypatch.setattr(clean, "NEW_INPUT_FILE", str(tmp_path / "new.json"))
+    monkeypatch.setattr(clean, "NEW_LLM_FILE", str(tmp_path / "new_llm.json"))
+    monkeypatch.setattr(clean, "LLM_STANDARDIZER_MODE", "inprocess")
+    monkeypatch.setitem(clean._STANDARDIZER, "module", None)
+    monkeypatch.setattr(clean.importlib, "import_module", recording_import)
+
+    assert website.run_pull_pipeline() is True
+    assert website.run_pull_pipeline() is True
+    assert len(imported) == 1
+    master = (tmp_path / "master.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["url"][-1] for line in master] == ["1", "2", "3"]
+
+
+def test_run_pull_pipeline_clean_failure_sets_error(monkeypatch, tmp_path):
+    """A SQLite failure in the in-process clean step ends the pull in error state."""
+
+    def broken_clean():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(website.subprocess, "run", lambda *_a, **_k: SimpleNamespace(stdout=""))
+    monkeypatch.setattr(website, "RAW_FILE", str(tmp_path / "applicant_data.json"))
+    monkeypatch.setattr(website.clean, "main", broken_clean)
+
+    assert website.run_pull_pipeline() is False
+    assert website.PULL_STATE["status"] == "error"
+    assert website.PULL_STATE["message"] == website.PULL_ERROR_MESSAGE
@@ -0,0 +1,87 @@
+"""Tests for the indexed canonical-name fuzzy matcher."""
+
+import difflib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import canon_match
+
+pytestmark = pytest.mark.db
+
+LLM_DIR = ROOT / "src" / "llm_hosting"
+
+
+def _canon(name):
+    with open(LLM_DIR / name, "r", encoding="utf-8") as handle:
+        return [line.strip() for line in handle if line.strip()]
+
+
+def _perturb(rng, text):
+    """Return ``text`` with a few random typos, truncations or case changes."""
+    chars = list(text)
+    for _ in range(rng.randint(0, 4)):
+        op = rng.choice(("delete", "insert", "swap", "replace", "case", "truncate"))
+        pos = rng.randrange(max(1, len(chars)))
+        if op == "delete" and chars:
+            del chars[pos]
+        elif op == "insert":
+            chars.insert(pos, rng.choice("aeiou st"))
+        elif op == "swap" and pos + 1 < len(chars):
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+        elif op == "replace" and chars:
+            chars[pos] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        elif op == "case":
+            chars = list("".join(chars).lower())
+        elif op == "truncate":
+            chars = chars[: max(1, len(chars) * 2 // 3)]
+    return "".join(chars)
+
+
+def _expected(word, candidates, cutoff):
+    matches = difflib.get_close_matches(word, candidates, n=1, cutoff=cutoff)
+    return matches[0] if matches else None
+
+
+@pytest.mark.parametrize(
+    ("canon_file", "cutoff"),
+    [("canon_universities.txt", 0.86), ("canon_programs.txt", 0.84)],
+)
+def test_matches_difflib_on_canon_lists(canon_file, cutoff):
+    """Perturbed canonical names give exactly the difflib result."""
+    candidates = _canon(canon_file)
+    matcher = canon_match.CanonMatcher(candidates)
+    rng = random.Random(canon_file)
+    words = [_perturb(rng, rng.choice(candidates)) for _ in range(40)]
+    words += ["Stanford", "MIT", "Computer Science", "Universty of Toronto", ""]
+    for word in words:
+        assert matcher.best_match(word, cutoff) == _expected(word, candidates, cutoff), word
+
+
+@pytest.mark.parametrize("cutoff", [0.0, 0.3, 0.6, 0.9, 1.0])
+def test_matches_difflib_on_short_strings_and_ties(cutoff):
+    """Low cutoffs (no trigram pruning), ties and duplicates match difflib."""
+    candidates = ["abc", "abd", "abe", "", "xyz", "abc", "bca", "abcd"]
+    matcher = canon_match.CanonMatcher(candidates)
+    rng = random.Random(cutoff)
+    words = ["ab", "abx", "", "zz", "cab", "abcde"]
+    words += ["".join(rng.choice("abcdxyz") for _ in range(rng.randint(1, 5))) for _ in range(30)]
+    for word in words:
+        assert matcher.best_match(word, cutoff) == _expected(word, candidates, cutoff), word
+
+
+def test_exact_membership_and_trigram_bound():
+    """Membership is a set lookup; the pruning bound matches its derivation."""
+    matcher = canon_match.CanonMatcher(["McGill University", "Yale University"])
+    assert "Yale University" in matcher
+    assert "Yale" not in matcher
+    assert matcher.best_match("", 0.5) is None
+    assert canon_match._min_matches(40, 0.86) == 18
+    assert canon_match._min_matches(0, 0.86) == 0
+    assert canon_match._trigram_tokens("aaaaa") == [("aaa", 0), ("aaa", 1), ("aaa", 2)]
@@ -1,8 +1,12 @@
 """Tests for the clean.py data preparation pipeline."""
 
+import io
 import json
+import socketserver
 import sys
+import threading
 from pathlib import Path
+from types import SimpleNamespace
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -175,18 +179,31 @@ def test_append_jsonl_appends_to_existing_dest(tmp_path):
     assert lines == [json.dumps({"a": 1}), json.dumps({"b": 2})]
 
 
+def test_append_jsonl_syncs_url_index(tmp_path):
+    """append_jsonl() brings a URL index up to date with the appended rows."""
+    src = tmp_path / "src.jsonl"
+    dest = tmp_path / "dest.jsonl"
+    src.write_text(json.dumps({"url": "u9"}) + "\n", encoding="utf-8")
+    index = clean.clean_index.UrlIndex(str(dest))
+    index.sync()
+    assert "u9" not in index
+
+    clean.append_jsonl(str(src), str(dest), index)
+    assert "u9" in index
+    index.close()
+
+
 def test_run_llm_standardizer_invokes_subprocess(monkeypatch, tmp_path):
-    """run_llm_standardizer() calls the CLI with expected args."""
+    """Subprocess mode calls the CLI with bare filenames under LLM_IO_BASE_DIR."""
     captured = {}
 
-    def fake_run(args, cwd=None, check=None):
-        captured["args"] = args
-        captured["cwd"] = cwd
-        captured["check"] = check
+    def fake_run(args, cwd=None, env=None, check=None):
+        captured.update(args=args, cwd=cwd, env=env, check=check)
 
     monkeypatch.setattr(clean.subprocess, "run", fake_run)
     monkeypatch.setattr(clean, "LLM_DIR", str(tmp_path))
     monkeypatch.setattr(clean, "LLM_APP", str(tmp_path / "app.py"))
+    monkeypatch.setattr(clean, "LLM_STANDARDIZER_MODE", "subprocess")
 
     input_file = tmp_path / "input.json"
     output_file = tmp_path / "output.json"
@@ -194,59 +211,254 @@ def test_run_llm_standardizer_invokes_subprocess(monkeypatch, tmp_path):
 
     assert captured["cwd"] == str(tmp_path)
     assert captured["check"] is True
-    assert captured["args"][:2] == [sys.executable, str(tmp_path / "app.py")]
-    assert "--file" in captured["args"]
-    assert "--out" in captured["args"]
-    assert str(input_file.resolve()) in captured["args"]
-    assert str(output_file.resolve()) in captured["args"]
-
-
-def test_main_no_new_rows(monkeypatch, capsys):
-    """main() prints a message and exits when no new rows exist."""
-    monkeypatch.setattr(clean, "load_data", lambda _file: [{"program_name": "CS", "university": "Test U"}])
-    monkeypatch.setattr(clean, "load_rows", lambda _file: [{"url": "u1"}])
-    monkeypatch.setattr(clean, "save_data", lambda _rows, _file: None)
-    monkeypatch.setattr(clean, "save_json_list", lambda _rows, _file: None)
-    monkeypatch.setattr(clean, "run_llm_standardizer", lambda _in, _out: None)
-    monkeypatch.setattr(clean, "append_jsonl", lambda _src, _dst: None)
+    assert captured["args"] == [
+        sys.executable, str(tmp_path / "app.py"), "--file", "input.json", "--out", "output.json",
+    ]
+    assert captured["env"]["LLM_IO_BASE_DIR"] == str(tmp_path.resolve())
+
+    with pytest.raises(ValueError, match="share a directory"):
+        clean.run_llm_standardizer(str(input_file), str(tmp_path / "sub" / "out.json"))
+
+
+def _fake_standardizer(monkeypatch, calls):
+    """Install a standardizer module double that records calls."""
+
+    def standardize_rows(rows):
+        for row in rows:
+            calls.append(row["program"])
+            yield {**row, "llm-generated-program": row["program"].upper()}
+
+    module = SimpleNamespace(standardize_rows=standardize_rows)
+    monkeypatch.setitem(clean._STANDARDIZER, "module", module)
+    return module
+
+
+def test_run_llm_standardizer_in_process(monkeypatch, tmp_path):
+    """In-process mode streams rows through the imported standardizer."""
+    calls = []
+    _fake_standardizer(monkeypatch, calls)
+    monkeypatch.setattr(clean.subprocess, "run", lambda *_a, **_k: pytest.fail("no subprocess"))
+    input_file = tmp_path / "in.json"
+    input_file.write_text(json.dumps([{"program": "cs, é"}, {"program": "ee"}]), encoding="utf-8")
+    output_file = tmp_path / "out.jsonl"
+
+    clean.run_llm_standardizer(str(input_file), str(output_file), mode="inprocess")
+    assert calls == ["cs, é", "ee"]
+    assert output_file.read_text(encoding="utf-8").splitlines() == [
+        '{"program": "cs, é", "llm-generated-program": "CS, É"}',
+        '{"program": "ee", "llm-generated-program": "EE"}',
+    ]
+
+    with pytest.raises(ValueError, match="Unknown standardizer mode"):
+        clean.run_llm_standardizer(str(input_file), str(output_file), mode="http")
+
+
+def test_load_standardizer_imports_once(monkeypatch):
+    """load_standardizer() imports llm_hosting/app.py once and caches it."""
+    monkeypatch.setitem(clean._STANDARDIZER, "module", None)
+    imported = []
+    real_import = clean.importlib.import_module
+
+    def recording_import(name):
+        imported.append(name)
+        return real_import(name)
+
+    monkeypatch.setattr(clean.importlib, "import_module", recording_import)
+    module = clean.load_standardizer()
+    assert clean.load_standardizer() is module
+    assert imported == ["src.llm_hosting.app"]
+    assert callable(module.standardize_rows)
+
+
+def test_run_llm_standardizer_socket_daemon(monkeypatch, tmp_path):
+    """Socket mode uses a running daemon and reports row errors."""
+    app = clean.load_standardizer()
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", 0)
+    monkeypatch.setattr(
+        app,
+        "_call_llm",
+        lambda text: {"standardized_program": f"P:{text}", "standardized_university": "U"},
+    )
+    sock_path = str(tmp_path / "std.sock")
+    monkeypatch.setattr(clean, "LLM_STANDARDIZER_SOCKET", sock_path)
+    server = socketserver.UnixStreamServer(sock_path, app._SocketHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        input_file = tmp_path / "in.json"
+        input_file.write_text(json.dumps([{"program": "a"}, {"program": "b"}]), encoding="utf-8")
+        output_file = tmp_path / "out.jsonl"
+        clean.run_llm_standardizer(str(input_file), str(output_file), mode="socket")
+        rows = [json.loads(line) for line in output_file.read_text(encoding="utf-8").splitlines()]
+        assert [row["llm-generated-program"] for row in rows] == ["P:a", "P:b"]
+
+        monkeypatch.setattr(app, "_call_llm", lambda _text: {})
+        with pytest.raises(RuntimeError, match="Standardizer daemon error"):
+            clean.run_llm_standardizer(str(input_file), str(output_file), mode="socket")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_run_llm_standardizer_socket_falls_back(monkeypatch, tmp_path, capsys):
+    """Socket mode runs in-process when no daemon is listening."""
+    calls = []
+    _fake_standardizer(monkeypatch, calls)
+    monkeypatch.setattr(clean, "LLM_STANDARDIZER_SOCKET", str(tmp_path / "missing.sock"))
+    input_file = tmp_path / "in.json"
+    input_file.write_text(json.dumps([{"program": "a"}]), encoding="utf-8")
+
+    clean.run_llm_standardizer(str(input_file), str(tmp_path / "out.jsonl"), mode="socket")
+    assert calls == ["a"]
+    assert "running in-process" in capsys.readouterr().out
+
+
+def _use_files(monkeypatch, tmp_path, scraped, master=None):
+    """Point clean.py at temp files holding ``scraped`` and ``master`` rows."""
+    paths = {
+        "scraped": tmp_path / "applicant_data.json",
+        "master": tmp_path / "master.jsonl",
+        "new_input": tmp_path / "new_input.json",
+    }
+    paths["scraped"].write_text(json.dumps(scraped), encoding="utf-8")
+    if master is not None:
+        paths["master"].write_text(
+            "".join(json.dumps(row) + "\n" for row in master), encoding="utf-8"
+        )
+    monkeypatch.setattr(clean, "SCRAPED_FILE", str(paths["scraped"]))
+    monkeypatch.setattr(clean, "MASTER_FILE", str(paths["master"]))
+    monkeypatch.setattr(clean, "NEW_INPUT_FILE", str(paths["new_input"]))
+    return paths
+
+
+def test_main_no_new_rows(monkeypatch, tmp_path, capsys):
+    """main() rewrites the scraped file and stops when no new rows exist."""
+    paths = _use_files(
+        monkeypatch,
+        tmp_path,
+        [{"program_name": "CS", "university": "Test U", "url": "u1"}, {"university": "X"}],
+        master=[{"url": "u1"}],
+    )
+    monkeypatch.setattr(
+        clean, "run_llm_standardizer", lambda _in, _out: pytest.fail("should not run")
+    )
 
     clean.main()
     captured = capsys.readouterr()
     assert "No new rows to add to LLM output." in captured.out
+    assert "Records removed due to missing program/university: 1" in captured.out
+    rewritten = json.loads(paths["scraped"].read_text(encoding="utf-8"))
+    assert [row["program"] for row in rewritten] == ["CS, Test U"]
+    assert not paths["new_input"].exists()
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "applicant_data.json", "master.jsonl", "master.urls.sqlite",
+    ]
 
 
-def test_main_with_new_rows_triggers_pipeline(monkeypatch):
-    """main() runs the LLM pipeline when new rows are present."""
-    called = {"save_json_list": False, "run_llm": False, "append": False}
+def test_main_with_new_rows_triggers_pipeline(monkeypatch, tmp_path):
+    """main() streams new, de-duplicated rows into the LLM pipeline."""
+    raw = [
+        {"program_name": "CS", "university": "Test U", "url": "u1"},
+        {"program_name": "CS", "university": "Test U", "url": "u2"},
+        {"program_name": "CS", "university": "Test U", "url": "u2"},
+        {"program_name": "EE", "university": "Test U", "url": None},
+    ]
+    paths = _use_files(monkeypatch, tmp_path, raw, master=[{"url": "u1"}])
+    called = {}
+
+    def fake_run_llm(input_file, _out):
+        with open(input_file, "r", encoding="utf-8") as handle:
+            called["llm_input"] = json.load(handle)
 
+    monkeypatch.setattr(clean, "run_llm_standardizer", fake_run_llm)
     monkeypatch.setattr(
         clean,
-        "load_data",
-        lambda _file: [
-            {"program_name": "CS", "university": "Test U", "url": "u1"},
-            {"program_name": "CS", "university": "Test U", "url": "u2"},
-        ],
+        "append_jsonl",
+        lambda src, dst, url_index: called.update(append=(src, dst), known="u1" in url_index),
     )
-    monkeypatch.setattr(clean, "load_rows", lambda _file: [{"url": "u1"}])
-    monkeypatch.setattr(clean, "save_data", lambda _rows, _file: None)
 
-    def fake_save_json_list(_rows, _file):
-        called["save_json_list"] = True
+    clean.main()
+    expected = [clean.reorder_data(row) for row in clean.clean_data(raw)]
+    assert paths["scraped"].read_text(encoding="utf-8") == json.dumps(expected, indent=2)
+    assert called["llm_input"] == [expected[1]]
+    assert called["append"] == (clean.NEW_LLM_FILE, str(paths["master"]))
+    assert called["known"] is True
 
-    def fake_run_llm(_in, _out):
-        called["run_llm"] = True
 
-    def fake_append(_src, _dst):
-        called["append"] = True
+def test_main_failure_keeps_scraped_file(monkeypatch, tmp_path):
+    """A failure mid-stream leaves the scraped file and no temp files behind."""
+    paths = _use_files(monkeypatch, tmp_path, [{"program_name": "CS", "university": "U"}])
+    original = paths["scraped"].read_bytes()
 
-    monkeypatch.setattr(clean, "save_json_list", fake_save_json_list)
-    monkeypatch.setattr(clean, "run_llm_standardizer", fake_run_llm)
-    monkeypatch.setattr(clean, "append_jsonl", fake_append)
+    def broken(_row):
+        raise RuntimeError("boom")
 
-    clean.main()
-    assert called["save_json_list"] is True
-    assert called["run_llm"] is True
-    assert called["append"] is True
+    monkeypatch.setattr(clean, "reorder_data", broken)
+    with pytest.raises(RuntimeError):
+        clean.main()
+    assert paths["scraped"].read_bytes() == original
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["applicant_data.json", "master.urls.sqlite"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 4096])
+def test_iter_json_array_matches_json_load(chunk_size):
+    """iter_json_array() yields the same items as json.load at any chunk size."""
+    rows = [
+        {"program": "Café, U", "gpa": 3.9, "tags": ["a", "]", ","]},
+        {"nested": {"x": [1, {"y": None}]}, "text": "quote \" and \\"},
+        12345,
+        "string",
+        [],
+    ]
+    for text in (json.dumps(rows), json.dumps(rows, indent=2), "  [ ]  ", "[]"):
+        expected = json.loads(text)
+        assert list(clean.iter_json_array(io.StringIO(text), chunk_size)) == expected
+
+
+@pytest.mark.parametrize(
+    "text", ["", "   ", "{}", "[1 2]", "[1,", '[{"a": 1}', '[{"a": ]']
+)
+def test_iter_json_array_rejects_malformed_input(text):
+    """Truncated or malformed arrays raise ValueError."""
+    with pytest.raises(ValueError):
+        list(clean.iter_json_array(io.StringIO(text), 2))
+
+
+def test_iter_rows_streams_lazily(tmp_path):
+    """iter_rows() yields rows before reading the rest of the file."""
+    file_path = tmp_path / "big.json"
+    file_path.write_text("[" + ",".join(['{"i": %d}' % i for i in range(5)]) + ", broken", encoding="utf-8")
+    rows = clean.iter_rows(str(file_path))
+    assert next(rows) == {"i": 0}
+    with pytest.raises(ValueError):
+        list(rows)
+
+
+@pytest.mark.parametrize("batch_rows", [1, 2, 1000])
+@pytest.mark.parametrize("rows", [[], [{}], [{"a": [1, {"b": None}]}, {"c": "x"}, {"d": 1.5}]])
+def test_json_array_writer_matches_json_dump(tmp_path, rows, batch_rows):
+    """JsonArrayWriter output is byte-identical to json.dump(indent=2)."""
+    path = tmp_path / "out.json"
+    writer = clean.JsonArrayWriter(str(path), batch_rows)
+    for row in rows:
+        writer.write(row)
+    assert writer.count == len(rows)
+    assert not path.exists()
+    writer.close()
+    assert path.read_text(encoding="utf-8") == json.dumps(rows, indent=2)
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_iter_clean_data_counts_removed_rows():
+    """iter_clean_data() is lazy and tallies dropped rows."""
+    stats = {}
+    rows = clean.iter_clean_data(
+        [{"program_name": "n/a", "university": "U"}, {"program_name": "CS", "university": "U"}],
+        stats,
+    )
+    assert [row["program"] for row in rows] == ["CS, U"]
+    assert stats == {"removed": 1}
+    assert list(clean.iter_clean_data([{"program_name": None}])) == []
 
 
 def test_main_guard_executes(monkeypatch):
@@ -0,0 +1,120 @@
+"""Tests for the persistent master-file URL index."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import clean_index
+
+pytestmark = pytest.mark.db
+
+
+def _append(path, *urls, newline=True):
+    with open(path, "a", encoding="utf-8") as handle:
+        for url in urls:
+            handle.write(json.dumps({"url": url}) + ("\n" if newline else ""))
+
+
+@pytest.fixture
+def master(tmp_path):
+    """An empty master JSONL path and a helper to reopen its index."""
+    path = tmp_path / "master.jsonl"
+    indexes = []
+
+    def open_index():
+        index = clean_index.UrlIndex(str(path))
+        indexes.append(index)
+        return index
+
+    yield path, open_index
+    for index in indexes:
+        index.close()
+
+
+def test_sync_indexes_only_appended_lines(master):
+    """Later syncs read only the lines appended since the last one."""
+    path, open_index = master
+    index = open_index()
+    assert index.sync() == 0
+    assert index.index_path == str(path.with_suffix(".urls.sqlite"))
+
+    _append(path, "u1", "u2")
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write("\n" + json.dumps({"program": "no url"}) + "\n")
+    assert index.sync() == 4
+    assert ("u1" in index, "u2" in index, "u3" in index) == (True, True, False)
+    assert index.sync() == 0
+
+    # A fresh process resumes from the stored offset
+    _append(path, "u3", "u1")
+    reopened = open_index()
+    assert reopened.sync() == 2
+    assert len(reopened) == 3
+
+
+def test_sync_rebuilds_after_rewrite(master):
+    """A rewritten or truncated master file triggers a full rebuild."""
+    path, open_index = master
+    _append(path, "u1", "u2")
+    index = open_index()
+    index.sync()
+
+    path.write_text(json.dumps({"url": "u7"}) + "\n", encoding="utf-8")
+    assert index.sync() == 1
+    assert ("u1" in index, "u7" in index) == (False, True)
+
+    path.unlink()
+    assert index.sync() == 0
+    assert len(index) == 0
+
+
+def test_sync_rereads_unterminated_last_line(master):
+    """A final line without a newline is indexed but read again next time."""
+    path, open_index = master
+    _append(path, "u1")
+    _append(path, "u2", newline=False)
+    index = open_index()
+    assert index.sync() == 1
+    assert "u2" in index
+
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write('\n{"url": "u3"')
+    index.sync()
+    assert ("u2" in index, "u3" not in index) == (True, True)
+
+
+def test_sync_touch_without_growth_is_cheap(master):
+    """A touched but unchanged file keeps its index."""
+    path, open_index = master
+    _append(path, "u1")
+    index = open_index()
+    index.sync()
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert index.sync() == 0
+    assert "u1" in index
+
+
+def test_sync_batches_inserts(master, monkeypatch):
+    """Large appends are inserted in batches."""
+    path, open_index = master
+    monkeypatch.setattr(clean_index, "INSERT_BATCH_ROWS", 2)
+    _append(path, *[f"u{i}" for i in range(5)])
+    index = open_index()
+    assert index.sync() == 5
+    assert len(index) == 5
+
+
+def test_corrupt_complete_line_raises(master):
+    """Invalid JSON on a complete line is an error, not silently skipped."""
+    path, open_index = master
+    path.write_text("not json\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        open_index().sync()
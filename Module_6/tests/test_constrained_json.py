@@ -0,0 +1,57 @@
+"""Tests for the constrained-JSON response formats and decode counters."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import constrained_json
+
+pytestmark = pytest.mark.db
+
+
+def test_single_row_format_is_the_result_object():
+    """One row is constrained to exactly the two string fields."""
+    fmt = constrained_json.response_format()
+    assert fmt["type"] == "json_object"
+    schema = fmt["schema"]
+    assert schema["required"] == ["standardized_program", "standardized_university"]
+    assert schema["additionalProperties"] is False
+
+
+def test_batch_format_fixes_the_array_length():
+    """A batch reply must hold exactly one object per input row."""
+    schema = constrained_json.response_format(3)["schema"]
+    assert schema["type"] == "array"
+    assert schema["minItems"] == schema["maxItems"] == 3
+    assert schema["items"] is constrained_json.RESULT_SCHEMA
+
+
+@pytest.mark.parametrize(
+    "out, expected",
+    [
+        ({"usage": {"completion_tokens": 17}}, 17),
+        ({"usage": {}}, 0),
+        ({"choices": []}, 0),
+        (None, 0),
+    ],
+)
+def test_completion_tokens(out, expected):
+    """Missing usage data counts as zero generated tokens."""
+    assert constrained_json.completion_tokens(out) == expected
+
+
+def test_decode_stats_rates():
+    """Per-row tokens and the fallback rate are averaged over rows."""
+    stats = constrained_json.DecodeStats()
+    assert stats.stats()["tokens_per_row"] == 0
+    stats.record(1, 20, 0)
+    stats.record(3, 40, 1)
+    result = stats.stats()
+    assert result["calls"] == 2
+    assert result["tokens_per_row"] == 15
+    assert result["fallback_rate"] == 0.25
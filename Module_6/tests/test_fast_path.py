@@ -0,0 +1,70 @@
+"""Tests for the rule-based fast path over canonical names."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import canon_match, fast_path
+
+pytestmark = pytest.mark.db
+
+PROGRAMS = canon_match.CanonMatcher(["Mathematics", "Information Studies"])
+UNIVERSITIES = canon_match.CanonMatcher(["McGill University", "University of Toronto"])
+
+
+def _fast_path():
+    return fast_path.RuleFastPath(
+        lambda p: {"Info Studies": "Information Studies"}.get(p, p),
+        lambda u: {"uoft": "University of Toronto"}.get(u, u),
+    )
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Mathematics, McGill University", ("Mathematics", "McGill University")),
+        ("  mathematics ,  mcgill   university ", ("Mathematics", "McGill University")),
+        ("Info Studies, uoft", ("Information Studies", "University of Toronto")),
+    ],
+)
+def test_resolve_canonical_halves(text, expected):
+    """Canonical halves resolve ignoring case, after the fix tables."""
+    result = _fast_path().resolve(text, PROGRAMS, UNIVERSITIES)
+    assert (result["standardized_program"], result["standardized_university"]) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["Mathematics", "Mathematics, McGill University, Canada", "Math, McGill University",
+     "Mathematics, McG", ", McGill University", ""],
+)
+def test_resolve_leaves_other_strings_to_the_model(text):
+    """Anything but two canonical halves is left unresolved."""
+    assert _fast_path().resolve(text, PROGRAMS, UNIVERSITIES) is None
+
+
+def test_resolve_many_counts_short_circuited_rows():
+    """resolve_many keeps input order and reports the resolved fraction."""
+    path = _fast_path()
+    results = path.resolve_many(
+        ["Mathematics, McGill University", "Math, McG", "mathematics, uoft", "x"],
+        PROGRAMS,
+        UNIVERSITIES,
+    )
+    assert [result is not None for result in results] == [True, False, True, False]
+    assert path.stats() == {"rows": 4, "resolved": 2, "fraction": 0.5}
+    assert _fast_path().stats()["fraction"] == 0.0
+
+
+def test_canonical_lookup_ignores_case():
+    """CanonMatcher.canonical returns the canonical spelling or None."""
+    matcher = canon_match.CanonMatcher(["McGill University", "MCGILL UNIVERSITY"])
+    assert matcher.canonical("McGill University") == "McGill University"
+    assert matcher.canonical("MCGILL UNIVERSITY") == "MCGILL UNIVERSITY"
+    assert matcher.canonical("mcgill university") == "McGill University"
+    assert matcher.canonical("McGill") is None
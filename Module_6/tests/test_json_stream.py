@@ -0,0 +1,116 @@
+"""Tests for the incremental standardizer input reader."""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import json_stream
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture(autouse=True)
+def _tiny_reads(monkeypatch):
+    """Refill the buffer every few characters to cross value boundaries."""
+    monkeypatch.setattr(json_stream, "READ_CHARS", 3)
+
+
+def _rows(text, jsonl=False):
+    return list(json_stream.iter_rows(io.StringIO(text), jsonl=jsonl))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('[{"program": "a, b"}, {"x": [1, {"y": "],}"}]}, 12345]',
+         [{"program": "a, b"}, {"x": [1, {"y": "],}"}]}, 12345]),
+        ("  [ ]  ", []),
+        ('{"meta": 1, "rows": [{"p": 1}, {"p": 2}], "tail": [3]}', [{"p": 1}, {"p": 2}]),
+        ('{"p": 1}\n{"p": 2}\n', [{"p": 1}, {"p": 2}]),
+        ("{}", []),
+        ('{"rows": 5}', []),
+        ("", []),
+        ("7", []),
+    ],
+)
+def test_iter_rows_accepts_normalize_input_shapes(text, expected):
+    """Arrays, {'rows': [...]} objects and concatenated objects stream as rows."""
+    assert _rows(text) == expected
+
+
+def test_iter_rows_reads_json_lines():
+    """jsonl=True reads one value per non-blank line."""
+    assert _rows('{"p": 1}\n\n{"p": 2}\n', jsonl=True) == [{"p": 1}, {"p": 2}]
+
+
+def test_iter_rows_yields_before_reading_the_rest():
+    """The first row is available after reading only its own bytes."""
+    handle = io.StringIO('[{"p": 1}, ' + '{"p": 2}, ' * 1000 + '{"p": 3}]')
+    rows = json_stream.iter_rows(handle)
+    assert next(rows) == {"p": 1}
+    assert handle.tell() < 20
+
+
+@pytest.mark.parametrize("text", ["[1,", "[1 2]", '{"rows": [1,]}', "{1: 2}", '{"a": 1,}', "["])
+def test_iter_rows_rejects_malformed_input(text):
+    """Malformed documents raise JSONDecodeError when reached."""
+    with pytest.raises(json.JSONDecodeError):
+        _rows(text)
+
+
+def test_large_value_is_decoded_a_logarithmic_number_of_times(monkeypatch):
+    """Retries wait for the buffer to double, so a huge value stays linear."""
+    attempts = []
+
+    class CountingDecoder(json.JSONDecoder):
+        def raw_decode(self, s, idx=0):
+            attempts.append(len(s) - idx)
+            return super().raw_decode(s, idx)
+
+    monkeypatch.setattr(json_stream, "_DECODER", CountingDecoder())
+    value = "x" * 30000
+    assert _rows(json.dumps([value, 1])) == [value, 1]
+    assert len(attempts) < 25
+    assert sum(attempts) < 4 * len(value)
+
+
+def test_iter_array_reads_plain_arrays_only():
+    """iter_array() streams a JSON array and rejects any other document."""
+    assert list(json_stream.iter_array(io.StringIO("[1, [2], {}]"), 2)) == [1, [2], {}]
+    with pytest.raises(json.JSONDecodeError):
+        list(json_stream.iter_array(io.StringIO('{"rows": []}')))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5])
+def test_iter_array_reads_numbers_cut_at_the_buffer_edge(chunk_size):
+    """Floats and exponents split mid-token still decode whole."""
+    text = "[1.5e1, 2, -0.25, 3E+2, 7e-1, 10]"
+    assert list(json_stream.iter_array(io.StringIO(text), chunk_size)) == json.loads(text)
+    reader = json_stream._Reader(io.StringIO("[1.5e1, 2]"), chunk_size=3)
+    assert reader.take("[") == "[" and reader.value() == 15.0
+
+
+@pytest.mark.parametrize("jsonl", [False, True])
+def test_iter_rows_refuses_rows_over_the_limit(jsonl):
+    """max_value_chars bounds every row, in arrays and in JSON Lines."""
+    rows = [{"p": "x" * 10}, {"p": "x" * 11}]
+    text = "\n".join(json.dumps(row) for row in rows) if jsonl else json.dumps(rows)
+    parsed = json_stream.iter_rows(io.StringIO(text), jsonl=jsonl, max_value_chars=19)
+    assert next(parsed) == rows[0]
+    with pytest.raises(json_stream.ValueTooLarge, match="19 characters"):
+        next(parsed)
+
+
+def test_json_lines_limit_stops_reading_a_long_line():
+    """An over-long line is refused after reading just past the limit."""
+    handle = io.StringIO("  " + json.dumps({"p": "x" * 1000}) + "\n")
+    with pytest.raises(json_stream.ValueTooLarge):
+        list(json_stream.iter_rows(handle, jsonl=True, max_value_chars=10))
+    assert handle.tell() == 12
@@ -4,8 +4,12 @@ import importlib
 import io
 import json
 import runpy
+import socket
+import socketserver
 import sys
+import threading
 import types
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -17,6 +21,12 @@ if str(ROOT) not in sys.path:
 pytestmark = pytest.mark.db
 
 
+@pytest.fixture(autouse=True)
+def _no_memo(monkeypatch):
+    """Keep the persistent memo off unless a test opts in."""
+    monkeypatch.setenv("LLM_MEMO_MAX_ROWS", "0")
+
+
 def import_app():
     """Import the app module with stubbed LLM and hub dependencies."""
     fake_hf = types.SimpleNamespace(hf_hub_download=lambda **_kw: "/tmp/model.gguf")
@@ -398,6 +408,8 @@ def test_main_guard_serve_path(monkeypatch, tmp_path):
     monkeypatch.setattr("flask.Flask.run", fake_run)
     monkeypatch.setattr(sys, "argv", ["app.py", "--serve"])
 
+    # Running app.py as a script puts its directory on sys.path
+    monkeypatch.syspath_prepend(str(Path(target_path).parent))
     runpy.run_path(target_path, run_name="__main__")
 
     assert "run" in called
@@ -421,6 +433,8 @@ def test_main_guard_file_path(monkeypatch, tmp_path):
         ["app.py", "--file", "in.json", "--out", "out.jsonl"],
     )
 
+    # Running app.py as a script puts its directory on sys.path
+    monkeypatch.syspath_prepend(str(Path(target_path).parent))
     runpy.run_path(target_path, run_name="__main__")
 
     with open(out_path, "r", encoding="utf-8") as handle:
@@ -517,6 +531,8 @@ def test_main_guard_file_path_reports_cli_error(monkeypatch, tmp_path):
         ["app.py", "--file", "missing.json", "--out", "out.jsonl"],
     )
 
+    # Running app.py as a script puts its directory on sys.path
+    monkeypatch.syspath_prepend(str(Path(target_path).parent))
     with pytest.raises(SystemExit) as exc_info:
         runpy.run_path(target_path, run_name="__main__")
     assert exc_info.value.code == 2
@@ -538,3 +554,1137 @@ def test_load_llm_returns_none_when_optional_deps_missing(monkeypatch):
     monkeypatch.setitem(app._LLM_CACHE, "instance", None)
     monkeypatch.setattr(app, "Llama", None)
     assert app._load_llm() is None
+
+
+class StatefulLlama:
+    """Fake model with llama.cpp-style token state and snapshots."""
+
+    def __init__(self):
+        self.input_ids = []
+        self.loads = 0
+
+    def create_chat_completion(self, messages, **_kwargs):
+        tokens = " ".join(m["content"] for m in messages).split()
+        self.input_ids = tokens + ["<reply>"]
+        return {
+            "choices": [{"message": {"content": '{"standardized_program": "P"}'}}],
+            "usage": {"prompt_tokens": len(tokens)},
+        }
+
+    def save_state(self):
+        return types.SimpleNamespace(
+            input_ids=list(self.input_ids) + ["<unused>"],
+            n_tokens=len(self.input_ids),
+        )
+
+    def load_state(self, state):
+        self.loads += 1
+        self.input_ids = list(state.input_ids[: state.n_tokens])
+
+
+def test_chat_completion_reuses_prefix_state(monkeypatch):
+    """The first call snapshots the prefix; later calls restore and count reuse."""
+    app = import_app()
+    llm = StatefulLlama()
+    prefix = [{"role": "system", "content": "shared prefix tokens"}]
+
+    app._chat_completion(llm, [*prefix, {"role": "user", "content": "row one"}], 1)
+    assert llm.loads == 0 and len(app._PREFIX_STATES) == 1
+    app._chat_completion(llm, [*prefix, {"role": "user", "content": "row two"}], 2)
+    assert llm.loads == 1
+
+    stats = app.prefix_cache_stats()
+    assert stats["calls"] == 2 and stats["rows"] == 3
+    assert stats["prompt_tokens"] == 10
+    # "shared prefix tokens row" is common to both prompts
+    assert stats["tokens_saved"] == 4
+    assert stats["tokens_saved_per_row"] == pytest.approx(4 / 3)
+
+
+def test_chat_completion_without_state_support_or_disabled(monkeypatch):
+    """Backends without snapshots, or LLM_PREFIX_CACHE=0, skip the cache."""
+    app = import_app()
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "u"}]
+    plain = _batch_llm("[]")
+    app._chat_completion(plain, messages, 1)
+    assert app._PREFIX_STATES == {}
+
+    monkeypatch.setattr(app, "LLM_PREFIX_CACHE", False)
+    llm = StatefulLlama()
+    app._chat_completion(llm, messages, 1)
+    app._chat_completion(llm, messages, 1)
+    assert app._PREFIX_STATES == {} and llm.loads == 0
+    assert app.prefix_cache_stats()["tokens_saved"] == 0
+
+
+def test_call_llm_paths_share_prefix_cache(monkeypatch):
+    """Per-row and batched prompts keep separate prefix snapshots."""
+    app = import_app()
+    llm = StatefulLlama()
+    monkeypatch.setattr(app, "_load_llm", lambda: llm)
+    app._call_llm("Math, MIT")
+    app._call_llm("Physics, MIT")
+    app._call_llm_batch(["a", "b"])
+    assert set(app._PREFIX_STATES) == {app.SYSTEM_PROMPT, app.BATCH_SYSTEM_PROMPT}
+    stats = app.prefix_cache_stats()
+    assert stats["rows"] == 4
+    few_shot_words = len(" ".join(m["content"] for m in app.FEW_SHOT_MESSAGES).split())
+    assert stats["tokens_saved"] >= few_shot_words
+
+
+def test_load_llm_resets_prefix_states(monkeypatch):
+    """A newly loaded model never restores another model's snapshots."""
+    app = import_app()
+    monkeypatch.setitem(app._LLM_CACHE, "instance", None)
+    app._PREFIX_STATES["stale"] = object()
+    assert app._load_llm() is not None
+    assert app._PREFIX_STATES == {}
+
+
+def test_cli_reports_prefix_cache_savings(monkeypatch, tmp_path, capsys):
+    """The CLI prints prompt tokens reused once the model has been called."""
+    app = import_app()
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "_load_llm", StatefulLlama)
+    (tmp_path / "in.json").write_text(json.dumps([{"program": "CS, U"}]), encoding="utf-8")
+    app._cli_process_file("in.json", out_path="out.jsonl", append=False, to_stdout=False)
+    assert "Prefix cache: 0 of" in capsys.readouterr().err
+
+
+def _use_memo(monkeypatch, app, tmp_path, max_rows=100):
+    """Point the app at a fresh memo file and count model calls."""
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", max_rows)
+    monkeypatch.setattr(app, "LLM_MEMO_PATH", str(tmp_path / "memo.sqlite"))
+    monkeypatch.setitem(app._MEMO, "cache", None)
+    calls = []
+
+    def fake_call_llm_batch(texts):
+        calls.append(list(texts))
+        return [
+            {"standardized_program": text.upper(), "standardized_university": "U"}
+            for text in texts
+        ]
+
+    monkeypatch.setattr(app, "_call_llm_batch", fake_call_llm_batch)
+    return calls
+
+
+def test_memo_serves_repeats_without_inference(monkeypatch, tmp_path):
+    """Normalized repeats hit the memo, within a batch and across calls."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path)
+
+    first = app._standardize_texts(["cs,  stanford", "cs, stanford", "math"])
+    second = app._standardize_texts([" cs, stanford ", "physics"])
+
+    assert calls == [["cs, stanford", "math"], ["physics"]]
+    assert first[0] == first[1] == second[0]
+    assert second[0] is not first[0]
+    assert app._MEMO["cache"].stats() == {"hits": 1, "misses": 4, "rows": 3}
+
+
+def test_memo_skips_rule_fallbacks_after_model_failure(monkeypatch, tmp_path):
+    """A failed model call is answered by the rules but not memoized."""
+    app = import_app()
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", 100)
+    monkeypatch.setattr(app, "LLM_MEMO_PATH", str(tmp_path / "memo.sqlite"))
+    monkeypatch.setattr(app, "LLM_RULE_FAST_PATH", False)
+    replies = [RuntimeError("transient"), '{"standardized_program": "Computer Science"}']
+    calls = []
+
+    class FlakyLlama:
+        def create_chat_completion(self, messages, **_kwargs):
+            calls.append(messages[-1]["content"])
+            reply = replies.pop(0)
+            if isinstance(reply, Exception):
+                raise reply
+            return {"choices": [{"message": {"content": reply}}]}
+
+    monkeypatch.setattr(app, "_load_llm", FlakyLlama)
+    first = app._standardize_texts(["Comp Sci, Stanford"])[0]
+    assert first["standardized_program"] == "Comp Sci"  # rules
+    assert app._MEMO["cache"].stats()["rows"] == 0
+    second = app._standardize_texts(["Comp Sci, Stanford"])[0]
+    assert len(calls) == 2
+    assert second["standardized_program"] == "Computer Science"
+    assert app._MEMO["cache"].stats()["rows"] == 1
+
+
+def test_batch_reports_which_items_are_rule_fallbacks(monkeypatch):
+    """Items missing from a batched reply come back as RuleResult."""
+    app = import_app()
+    monkeypatch.setattr(
+        app,
+        "_load_llm",
+        lambda: _batch_llm('[{"standardized_program": "Math", "standardized_university": "MIT"}]'),
+    )
+    results = app._call_llm_batch(["math, mit", "cs, stanford"])
+    assert not isinstance(results[0], app.RuleResult)
+    assert isinstance(results[1], app.RuleResult)
+
+
+def test_memo_persists_and_invalidates_on_version_change(tmp_path):
+    """Entries survive reopening and are wiped when the version changes."""
+    app = import_app()
+    path = str(tmp_path / "memo.sqlite")
+    result = {"standardized_program": "P", "standardized_university": "U"}
+    memo = app.memo_cache.MemoCache(path, "v1", 10)
+    memo.put_many({"a": result})
+    memo.close()
+
+    memo = app.memo_cache.MemoCache(path, "v1", 10)
+    assert memo.get_many(["a", "b"]) == {"a": result}
+    assert memo.stats() == {"hits": 1, "misses": 1, "rows": 1}
+    memo.close()
+
+    memo = app.memo_cache.MemoCache(path, "v2", 10)
+    assert memo.get_many(["a"]) == {}
+    assert memo.stats()["rows"] == 0
+    memo.close()
+
+
+def test_memo_evicts_least_recently_used(tmp_path):
+    """Beyond max_rows, the entries used longest ago are evicted."""
+    app = import_app()
+    memo = app.memo_cache.MemoCache(str(tmp_path / "memo.sqlite"), "v", 2)
+    result = {"standardized_program": "P", "standardized_university": "U"}
+    memo.put_many({"a": result})
+    memo.put_many({"b": result})
+    memo.get_many(["a"])
+    memo.put_many({"c": result})
+    assert set(memo.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert memo.stats()["rows"] == 2
+    memo.close()
+
+
+def test_memo_version_tracks_model_prompts_and_canon(monkeypatch):
+    """MODEL_FILE, canon lists and the LLM runtime all change the version."""
+    app = import_app()
+    base = app.memo_version()
+    monkeypatch.setattr(app, "MODEL_FILE", "other.gguf")
+    assert app.memo_version() != base
+    model = app.memo_version()
+    monkeypatch.setattr(app, "LLM_CONSTRAINED_JSON", not app.LLM_CONSTRAINED_JSON)
+    assert app.memo_version() != model
+    constrained = app.memo_version()
+    monkeypatch.setattr(app, "LLM_BATCH_SIZE", app.LLM_BATCH_SIZE + 1)
+    assert app.memo_version() != constrained
+    monkeypatch.setattr(app, "Llama", None)
+    rules = app.memo_version()
+    monkeypatch.setattr(app, "LLM_BATCH_SIZE", 1)
+    assert app.memo_version() == rules  # decoding settings do not affect the rules
+    monkeypatch.setattr(app, "CANON_UNIS", [*app.CANON_UNIS, "New University"])
+    assert app.memo_version() != rules
+
+
+def test_memo_stores_rule_results_without_llm_runtime(monkeypatch, tmp_path):
+    """On a rules-only host the rules are the backend and their results are memoized."""
+    app = import_app()
+    monkeypatch.setattr(app, "Llama", None)
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", 100)
+    monkeypatch.setattr(app, "LLM_MEMO_PATH", str(tmp_path / "memo.sqlite"))
+    monkeypatch.setattr(app, "LLM_RULE_FAST_PATH", False)
+    first = app._standardize_texts(["Comp Sci, Stanford", "math, mit"])
+    assert app._MEMO["cache"].stats()["rows"] == 2
+    assert app._standardize_texts(["Comp Sci, Stanford"])[0] == first[0]
+    assert app._MEMO["cache"].stats()["hits"] == 1
+
+
+def test_memo_disabled_calls_model_directly(monkeypatch, tmp_path):
+    """LLM_MEMO_MAX_ROWS=0 bypasses the memo entirely."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path, max_rows=0)
+    app._standardize_texts(["a", "a"])
+    assert calls == [["a", "a"]]
+    assert app._memo_cache() is None
+    assert not (tmp_path / "memo.sqlite").exists()
+
+
+def test_endpoint_cli_and_metrics_use_memo(monkeypatch, tmp_path, capsys):
+    """/standardize and the CLI share the memo; /metrics reports it."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path)
+    client = app.app.test_client()
+    resp = client.post("/standardize", json=[{"program": "cs"}, {"program": "cs"}])
+    assert [r["llm-generated-program"] for r in resp.get_json()["rows"]] == ["CS", "CS"]
+
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    (tmp_path / "in.json").write_text(json.dumps([{"program": "cs"}]), encoding="utf-8")
+    app._cli_process_file("in.json", out_path="out.jsonl", append=False, to_stdout=False)
+    assert calls == [["cs"]]
+    assert "Memo: 2 hits, 1 misses." in capsys.readouterr().err
+
+    body = client.get("/metrics").get_json()
+    assert body["memo"] == {"hits": 2, "misses": 1, "rows": 1}
+    assert body["prefix_cache"]["calls"] == 0
+
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", 0)
+    assert client.get("/metrics").get_json()["memo"] is None
+
+
+def test_standardize_rows_is_lazy(monkeypatch):
+    """standardize_rows() pulls one batch of rows at a time."""
+    app = import_app()
+    seen = []
+
+    def fake_call_llm_batch(texts):
+        seen.append(texts)
+        return [
+            {"standardized_program": text.upper(), "standardized_university": "U"}
+            for text in texts
+        ]
+
+    monkeypatch.setattr(app, "_call_llm_batch", fake_call_llm_batch)
+    source = iter([{"program": "a"}, {"program": None}, {"program": "c"}])
+    rows = app.standardize_rows(source, batch_size=2)
+    assert next(rows)["llm-generated-program"] == "A"
+    assert seen == [["a", ""]]
+    assert next(rows)["llm-generated-university"] == "U"
+    assert next(rows)["llm-generated-program"] == "C"
+    assert seen == [["a", ""], ["c"]]
+    assert list(rows) == []
+
+
+def test_standardize_rows_defaults_to_env_batch_size(monkeypatch):
+    """Without batch_size, rows are grouped by LLM_BATCH_SIZE."""
+    app = import_app()
+    seen = []
+
+    def fake_call_llm_batch(texts):
+        seen.append(len(texts))
+        return [{"standardized_program": "P", "standardized_university": "U"}] * len(texts)
+
+    monkeypatch.setattr(app, "_call_llm_batch", fake_call_llm_batch)
+    monkeypatch.setattr(app, "LLM_BATCH_SIZE", 3)
+    assert len(list(app.standardize_rows([{"program": "x"}] * 7))) == 7
+    assert seen == [3, 3, 1]
+
+
+def _batch_llm(reply):
+    """Return a fake model whose completion is ``reply`` (or raises it)."""
+
+    class FakeLlama:
+        calls = []
+
+        def create_chat_completion(self, messages, **kwargs):
+            FakeLlama.calls.append((messages, kwargs))
+            if isinstance(reply, Exception):
+                raise reply
+            return {"choices": [{"message": {"content": reply}}]}
+
+    return FakeLlama()
+
+
+def test_few_shot_messages_are_prebuilt():
+    """Both prompt prefixes are built once and end with an assistant turn."""
+    app = import_app()
+    assert app.FEW_SHOT_MESSAGES[0]["content"] == app.SYSTEM_PROMPT
+    assert len(app.FEW_SHOT_MESSAGES) == 1 + 2 * len(app.FEW_SHOTS)
+    assert app.BATCH_FEW_SHOT_MESSAGES[0]["content"] == app.BATCH_SYSTEM_PROMPT
+    assert len(app.BATCH_FEW_SHOT_MESSAGES) == 3
+    batch_in = json.loads(app.BATCH_FEW_SHOT_MESSAGES[1]["content"])
+    batch_out = json.loads(app.BATCH_FEW_SHOT_MESSAGES[2]["content"])
+    assert batch_in == [x_in for x_in, _ in app.FEW_SHOTS]
+    assert batch_out == [x_out for _, x_out in app.FEW_SHOTS]
+
+
+def test_call_llm_batch_packs_programs_into_one_prompt(monkeypatch):
+    """One completion standardizes the whole batch, in order."""
+    app = import_app()
+    reply = (
+        'Sure: [{"standardized_program":"Mathematics","standardized_university":"MIT"},'
+        '{"standardized_program":"Physics","standardized_university":"Yale University"}]'
+    )
+    llm = _batch_llm(reply)
+    monkeypatch.setattr(app, "_load_llm", lambda: llm)
+    monkeypatch.setattr(app, "_post_normalize_program", lambda s: s)
+    monkeypatch.setattr(app, "_post_normalize_university", lambda s: s)
+
+    result = app._call_llm_batch(["math, mit", "physics, yale"])
+
+    assert [r["standardized_program"] for r in result] == ["Mathematics", "Physics"]
+    assert result[1]["standardized_university"] == "Yale University"
+    assert len(llm.calls) == 1
+    messages, kwargs = llm.calls[0]
+    assert json.loads(messages[-1]["content"]) == [
+        {"program": "math, mit"},
+        {"program": "physics, yale"},
+    ]
+    assert kwargs["max_tokens"] == 2 * app.LLM_BATCH_TOKENS_PER_ROW
+
+
+def test_call_llm_batch_falls_back_per_item(monkeypatch):
+    """Missing, malformed or empty items fall back to the rules individually."""
+    app = import_app()
+    reply = json.dumps(
+        [
+            {"standardized_program": "Chemistry", "standardized_university": ""},
+            "not an object",
+            {"standardized_program": "", "standardized_university": "X"},
+        ]
+    )
+    monkeypatch.setattr(app, "_load_llm", lambda: _batch_llm(reply))
+    monkeypatch.setattr(app, "_split_fallback", lambda text: (f"rule-{text}", "U"))
+    monkeypatch.setattr(app, "_post_normalize_program", lambda s: s)
+    monkeypatch.setattr(app, "_post_normalize_university", lambda s: s)
+
+    result = app._call_llm_batch(["a", "b", "c", "d"])
+
+    assert [r["standardized_program"] for r in result] == [
+        "Chemistry",
+        "rule-b",
+        "rule-c",
+        "rule-d",
+    ]
+    assert result[0]["standardized_university"] == ""
+
+
+@pytest.mark.parametrize(
+    "reply",
+    ["no json here", '{"standardized_program": "P"}', RuntimeError("boom")],
+)
+def test_call_llm_batch_falls_back_for_whole_batch(monkeypatch, reply):
+    """Unparseable replies, non-arrays and failed calls use the rules."""
+    app = import_app()
+    monkeypatch.setattr(app, "_load_llm", lambda: _batch_llm(reply))
+    monkeypatch.setattr(app, "_split_fallback", lambda text: (text.upper(), "U"))
+    monkeypatch.setattr(app, "_post_normalize_program", lambda s: s)
+    monkeypatch.setattr(app, "_post_normalize_university", lambda s: s)
+
+    result = app._call_llm_batch(["a", "b"])
+
+    assert [r["standardized_program"] for r in result] == ["A", "B"]
+
+
+def test_call_llm_batch_small_and_rules_only_paths(monkeypatch):
+    """Single items reuse _call_llm; without a model every item uses rules."""
+    app = import_app()
+    monkeypatch.setattr(app, "_load_llm", lambda: _batch_llm("[]"))
+    monkeypatch.setattr(
+        app,
+        "_call_llm",
+        lambda text: {"standardized_program": f"llm-{text}", "standardized_university": ""},
+    )
+    assert app._call_llm_batch(["a"])[0]["standardized_program"] == "llm-a"
+    assert app._call_llm_batch([]) == []
+
+    monkeypatch.setattr(app, "_load_llm", lambda: None)
+    monkeypatch.setattr(app, "_split_fallback", lambda text: (text.upper(), "U"))
+    monkeypatch.setattr(app, "_post_normalize_program", lambda s: s)
+    monkeypatch.setattr(app, "_post_normalize_university", lambda s: s)
+    assert app._call_llm_batch(["a", "b"]) == [
+        {"standardized_program": "A", "standardized_university": "U"},
+        {"standardized_program": "B", "standardized_university": "U"},
+    ]
+
+
+def test_canon_paths_default_to_app_dir():
+    """Canonical lists load regardless of the importing process's cwd."""
+    app = import_app()
+    assert app.CANON_UNIS_PATH == str(Path(app.__file__).with_name("canon_universities.txt"))
+    assert app.MODEL_DIR == str(Path(app.__file__).with_name("models"))
+    assert app.CANON_UNIS and app.CANON_PROGS
+
+
+def test_socket_handler_replies_per_line(monkeypatch, tmp_path):
+    """The daemon answers every row line, reporting bad rows as errors."""
+    app = import_app()
+    monkeypatch.setattr(
+        app,
+        "_call_llm",
+        lambda text: {"standardized_program": f"P:{text}", "standardized_university": "U"},
+    )
+    sock_path = str(tmp_path / "std.sock")
+    server = socketserver.UnixStreamServer(sock_path, app._SocketHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(sock_path)
+            conn.sendall(b'{"program": "cs"}\n\n[1]\nnot json\n')
+            conn.shutdown(socket.SHUT_WR)
+            replies = [json.loads(line) for line in conn.makefile("rb")]
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert replies[0] == {
+        "program": "cs", "llm-generated-program": "P:cs", "llm-generated-university": "U",
+    }
+    assert "JSON object" in replies[1]["error"]
+    assert "error" in replies[2]
+
+
+def test_serve_socket_replaces_stale_socket(monkeypatch, tmp_path):
+    """serve_socket() removes a stale socket file and loads the model first."""
+    app = import_app()
+    sock_path = tmp_path / "std.sock"
+    sock_path.write_text("stale", encoding="utf-8")
+    events = []
+
+    class FakeServer:
+        def __init__(self, path, handler):
+            events.append(("bind", path, handler, sock_path.exists()))
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def serve_forever(self):
+            events.append("serve")
+
+    monkeypatch.setattr(app, "_load_llm", lambda: events.append("load"))
+    monkeypatch.setattr(app.socketserver, "UnixStreamServer", FakeServer)
+    app.serve_socket(str(sock_path))
+    assert events == ["load", ("bind", str(sock_path), app._SocketHandler, False), "serve"]
+
+    events.clear()
+    app.serve_socket(str(sock_path))
+    assert events[0] == "load"
+
+
+def test_main_guard_socket_path(monkeypatch, tmp_path):
+    """__main__ guard starts the socket daemon when --socket is given."""
+    app = import_app()
+    called = {}
+
+    class FakeServer:
+        def __init__(self, path, _handler):
+            called["path"] = path
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def serve_forever(self):
+            called["served"] = True
+
+    monkeypatch.setattr(socketserver, "UnixStreamServer", FakeServer)
+    monkeypatch.setattr(sys, "argv", ["app.py", "--socket", str(tmp_path / "s.sock")])
+    # Running app.py as a script puts its directory on sys.path
+    monkeypatch.syspath_prepend(str(Path(app.__file__).parent))
+    runpy.run_path(app.__file__, run_name="__main__")
+    assert called == {"path": str(tmp_path / "s.sock"), "served": True}
+
+
+def test_cli_workers_preserve_order_in_chunks(monkeypatch, tmp_path):
+    """--workers splits rows into chunks and writes them back in input order."""
+    app = import_app()
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(app.ordered_pool, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(app, "LLM_WORKER_CHUNK_ROWS", 2)
+    monkeypatch.setattr(app, "N_THREADS", 8)
+    seen = []
+
+    def fake_call_llm_batch(texts):
+        seen.append(list(texts))
+        return [
+            {"standardized_program": text.upper(), "standardized_university": "U"}
+            for text in texts
+        ]
+
+    monkeypatch.setattr(app, "_call_llm_batch", fake_call_llm_batch)
+    rows = [{"program": f"p{i}"} for i in range(7)]
+    (tmp_path / "in.json").write_text(json.dumps(rows), encoding="utf-8")
+    app._cli_process_file("in.json", out_path="out.jsonl", append=False, to_stdout=False, workers=3)
+
+    lines = (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["llm-generated-program"] for line in lines] == [
+        f"P{i}" for i in range(7)
+    ]
+    assert sorted(len(texts) for texts in seen) == [1, 2, 2, 2]
+    assert app._LLM_CACHE["n_threads"] == 2
+
+
+def test_init_worker_resets_inherited_caches(monkeypatch):
+    """A worker drops the parent's model, prefix states and memo handle."""
+    app = import_app()
+    monkeypatch.setitem(app._LLM_CACHE, "instance", object())
+    monkeypatch.setitem(app._MEMO, "cache", object())
+    app._PREFIX_STATES["prompt"] = object()
+    app._init_worker(3)
+    assert app._LLM_CACHE == {"instance": None, "n_threads": 3}
+    assert app._PREFIX_STATES == {}
+    assert app._MEMO["cache"] is None
+
+
+def test_worker_counters_merge_into_parent(monkeypatch, tmp_path):
+    """Chunk counter deltas are added to the parent's memo and prefix stats."""
+    app = import_app()
+    _use_memo(monkeypatch, app, tmp_path)
+    app._standardize_chunk([{"program": "cs"}])
+    text, deltas = app._standardize_chunk([{"program": "cs"}, {"program": "math"}])
+
+    assert [json.loads(line)["llm-generated-program"] for line in text.splitlines()] == [
+        "CS",
+        "MATH",
+    ]
+    assert deltas["memo_hits"] == 1
+    assert deltas["memo_misses"] == 1
+    assert deltas["calls"] == 0
+
+    app._merge_counters(dict(deltas, calls=2, rows=3))
+    assert app._MEMO["cache"].stats()["hits"] == 2
+    assert app.prefix_cache_stats()["rows"] == 3
+
+    monkeypatch.setattr(app, "LLM_MEMO_MAX_ROWS", 0)
+    app._merge_counters(deltas)
+    assert app._cache_counters()["memo_hits"] == 0
+
+
+def test_cli_streams_json_lines_and_rows_wrapper(monkeypatch, tmp_path):
+    """The CLI reads .jsonl input and streams {'rows': [...]} objects."""
+    app = import_app()
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        app,
+        "_call_llm_batch",
+        lambda texts: [{"standardized_program": t, "standardized_university": "U"} for t in texts],
+    )
+    (tmp_path / "in.jsonl").write_text('{"program": "a"}\n\n{"program": "b"}\n', encoding="utf-8")
+    (tmp_path / "in.json").write_text(json.dumps({"rows": [{"program": "c"}]}), encoding="utf-8")
+
+    app._cli_process_file("in.jsonl", out_path="a.jsonl", append=False, to_stdout=False)
+    app._cli_process_file("in.json", out_path="b.jsonl", append=False, to_stdout=False)
+
+    lines = (tmp_path / "a.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["llm-generated-program"] for line in lines] == ["a", "b"]
+    lines = (tmp_path / "b.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["llm-generated-program"] for line in lines] == ["c"]
+
+
+def test_cli_writes_rows_before_a_later_parse_error(monkeypatch, tmp_path):
+    """Rows parsed before malformed input are already written."""
+    app = import_app()
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "LLM_BATCH_SIZE", 1)
+    (tmp_path / "in.json").write_text('[{"program": "a"}, {"program": ', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        app._cli_process_file("in.json", out_path="out.jsonl", append=False, to_stdout=False)
+    assert len((tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()) == 1
+
+
+def test_cli_rejects_output_that_is_the_input(monkeypatch, tmp_path):
+    """Writing over the file being streamed is refused before truncating it."""
+    app = import_app()
+    monkeypatch.setenv("LLM_IO_BASE_DIR", str(tmp_path))
+    (tmp_path / "in.jsonl").write_text('{"program": "a"}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="differ from the input"):
+        app._cli_process_file("in.jsonl", out_path="in.jsonl", append=False, to_stdout=False)
+    assert (tmp_path / "in.jsonl").read_text(encoding="utf-8") == '{"program": "a"}\n'
+
+
+def test_fast_path_skips_the_model_for_canonical_rows(monkeypatch, tmp_path, capsys):
+    """Canonical 'Program, University' rows never reach the memo or model."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path)
+    results = app._standardize_texts(
+        ["Mathematics, UBC", "cs, stanford", "information studies, mcgill university"]
+    )
+    assert calls == [["cs, stanford"]]
+    assert results[0] == {
+        "standardized_program": "Mathematics",
+        "standardized_university": "University of British Columbia",
+    }
+    assert results[1]["standardized_program"] == "CS, STANFORD"
+    assert results[2]["standardized_university"] == "McGill University"
+    assert app._MEMO["cache"].stats()["rows"] == 1
+
+    body = app.app.test_client().get("/metrics").get_json()
+    assert body["fast_path"]["resolved"] == 2
+    assert body["fast_path"]["rows"] == 3
+    app._report_caches()
+    assert "Rule fast path: 2 of 3 rows (66.7%)" in capsys.readouterr().err
+
+
+def test_fast_path_can_be_disabled(monkeypatch, tmp_path):
+    """LLM_RULE_FAST_PATH=0 sends every row to the model."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path)
+    monkeypatch.setattr(app, "LLM_RULE_FAST_PATH", False)
+    app._standardize_texts(["Mathematics, McGill University"])
+    assert calls == [["Mathematics, McGill University"]]
+    assert app._FAST_PATH.stats()["rows"] == 0
+
+
+def test_worker_counters_include_fast_path(monkeypatch):
+    """Fast-path counts from workers are merged into the parent."""
+    app = import_app()
+    _text, deltas = app._standardize_chunk([{"program": "Mathematics, McGill University"}])
+    assert deltas["fast_path_rows"] == 1
+    assert deltas["fast_path_resolved"] == 1
+    app._merge_counters(deltas)
+    assert app._FAST_PATH.stats()["resolved"] == 2
+
+
+def test_pool_serves_concurrent_requests(monkeypatch, tmp_path):
+    """With a pool, /standardize rows are batched on per-instance models."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path, max_rows=0)
+    monkeypatch.setattr(app, "_new_llm", lambda: "model")
+    pool = app.start_pool(2)
+    client = app.app.test_client()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(
+            executor.map(
+                lambda i: client.post("/standardize", json={"rows": [{"program": f"p{i}"}, 1]}),
+                range(4),
+            )
+        )
+    for i, response in enumerate(responses):
+        body = response.get_json()
+        assert body["invalid_rows_skipped"] == 1
+        assert body["rows"][0]["llm-generated-program"] == f"P{i}"
+    assert sorted(text for batch in calls for text in batch) == [f"p{i}" for i in range(4)]
+    stats = client.get("/metrics").get_json()["pool"]
+    assert stats["rows"] == 4
+    assert stats["instances"] == 2
+    assert app._LLM_CACHE["instance"] is None  # pool models are thread-bound
+    assert app.start_pool(1) is not pool
+    app._POOL["pool"].close()
+
+
+def test_pool_batch_uses_thread_bound_model(monkeypatch):
+    """Pool batches use their own model and prefix cache, not the shared one."""
+    app = import_app()
+    monkeypatch.setattr(app, "_THREAD_MODEL", threading.local())
+    llm = StatefulLlama()
+    cache = app.prefix_cache.PrefixCache()
+    app._run_pool_batch((llm, cache), ["cs, stanford"])
+    app._run_pool_batch((llm, cache), ["ee, stanford"])
+    assert app._load_llm() is llm
+    assert llm.loads == 1
+    assert cache.counters["rows"] == 2
+    assert app.prefix_cache_stats()["calls"] == 0
+
+
+def test_pool_row_errors_fall_back(monkeypatch):
+    """A failed pool batch falls back to the rule-based result for its rows."""
+    app = import_app()
+    monkeypatch.setattr(app, "_new_llm", lambda: None)
+
+    def failing(_texts):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(app, "_standardize_texts", failing)
+    app.start_pool(1)
+    body = app.app.test_client().post("/standardize", json=[{"program": "Math, UBC"}]).get_json()
+    assert body["rows"][0]["llm-generated-university"] == "University of British Columbia"
+    app._POOL["pool"].close()
+
+
+def test_pool_overload_returns_429(monkeypatch):
+    """Requests beyond the queue capacity get 429 with Retry-After."""
+    app = import_app()
+
+    class FullPool:
+        def submit(self, _items):
+            raise app.serving.Overloaded(7)
+
+    monkeypatch.setitem(app._POOL, "pool", FullPool())
+    response = app.app.test_client().post("/standardize", json=[{"program": "x"}])
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert response.get_json() == {"error": "overloaded", "retry_after": 7}
+
+
+def test_serve_http_modes(monkeypatch):
+    """serve_http uses waitress for pooled serving when it is installed."""
+    app = import_app()
+    called = []
+    monkeypatch.setattr(app, "LLM_WARMUP", False)
+    monkeypatch.setattr(app, "_new_llm", lambda: None)
+    monkeypatch.setattr("flask.Flask.run", lambda self, **kw: called.append(("flask", kw)))
+    monkeypatch.setattr(app, "waitress_serve", lambda _app, **kw: called.append(("waitress", kw)))
+    app.serve_http(8001, pool_instances=2)
+    assert called[-1] == ("waitress", {"host": "0.0.0.0", "port": 8001, "threads": 16})
+    monkeypatch.setattr(app, "waitress_serve", None)
+    app.serve_http(8002, pool_instances=1)
+    assert called[-1][1]["threaded"] is True
+    app.serve_http(8003)
+    assert "threaded" not in called[-1][1]
+    app._POOL["pool"].close()
+
+
+def test_main_guard_serve_pool(monkeypatch):
+    """__main__ guard passes --pool through to serve_http."""
+    app = import_app()
+    monkeypatch.setattr("llama_cpp.Llama", lambda **_kw: object())
+    started = []
+    monkeypatch.setattr("flask.Flask.run", lambda self, **kw: started.append(kw))
+    monkeypatch.setenv("LLM_WARMUP", "0")
+    monkeypatch.setattr(sys, "argv", ["app.py", "--serve", "--pool", "2"])
+    # Running app.py as a script puts its directory on sys.path
+    monkeypatch.syspath_prepend(str(Path(app.__file__).parent))
+    namespace = runpy.run_path(app.__file__, run_name="__main__")
+    assert started
+    assert namespace["_POOL"]["pool"].stats()["instances"] == 2
+    namespace["_POOL"]["pool"].close()
+
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def test_standardize_streams_ndjson_without_row_cap(monkeypatch, tmp_path):
+    """NDJSON clients get one line per row, past STANDARDIZE_MAX_ROWS."""
+    app = import_app()
+    calls = _use_memo(monkeypatch, app, tmp_path, max_rows=0)
+    monkeypatch.setattr(app, "STANDARDIZE_MAX_ROWS", 2)
+    monkeypatch.setattr(app, "LLM_BATCH_SIZE", 2)
+    rows = [{"program": f"p{i}", "id": i} for i in range(5)]
+    response = app.app.test_client().post(
+        "/standardize", data=json.dumps({"rows": rows[:3] + [7] + rows[3:]}), headers=NDJSON
+    )
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 6
+    assert lines[3] == {"error": "row must be a JSON object"}
+    assert [line["id"] for line in lines if "id" in line] == list(range(5))
+    assert lines[5]["llm-generated-program"] == "P4"
+    assert len(calls) == 5
+
+
+def test_standardize_stream_reads_json_lines_until_bad_json():
+    """An NDJSON body is read per line; malformed input ends with an error line."""
+    app = import_app()
+    response = app.app.test_client().post(
+        "/standardize",
+        data='{"program": "Mathematics, UBC"}\n\n{"program": \n',
+        headers={**NDJSON, "Content-Type": "application/x-ndjson"},
+    )
+    first, last = response.get_data(as_text=True).splitlines()
+    assert json.loads(first)["llm-generated-university"] == "University of British Columbia"
+    assert json.loads(last)["error"].startswith("invalid JSON")
+
+
+def test_standardize_refuses_oversized_bodies_with_413(monkeypatch):
+    """Bodies past the buffered or streamed limit get a JSON 413 before parsing."""
+    app = import_app()
+    monkeypatch.setitem(app.app.config, "MAX_CONTENT_LENGTH", 64)
+    monkeypatch.setattr(app, "STANDARDIZE_MAX_STREAM_BYTES", 128)
+    client = app.app.test_client()
+    body = json.dumps([{"program": "x" * 100}])
+    response = client.post("/standardize", data=body)
+    assert response.status_code == 413
+    assert response.get_json()["error"] == "request too large"
+    assert client.post("/standardize", data=body, headers=NDJSON).status_code == 200
+    response = client.post("/standardize", data=body * 2, headers=NDJSON)
+    assert response.status_code == 413
+
+
+def test_standardize_stream_stops_at_an_oversized_row(monkeypatch):
+    """A row over STANDARDIZE_MAX_ROW_CHARS ends the stream with a 413 line."""
+    app = import_app()
+    monkeypatch.setattr(app, "STANDARDIZE_MAX_ROW_CHARS", 40)
+    rows = [{"program": "Mathematics, UBC"}, {"program": "x" * 100}, {"program": "y"}]
+    for body, content_type in (
+        (json.dumps(rows), "application/json"),
+        ("\n".join(json.dumps(row) for row in rows), "application/x-ndjson"),
+    ):
+        response = app.app.test_client().post(
+            "/standardize", data=body, headers={**NDJSON, "Content-Type": content_type}
+        )
+        first, last = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert first["llm-generated-university"] == "University of British Columbia"
+        assert last == {"error": "request too large: row exceeds 40 characters", "status": 413}
+
+
+def test_standardize_prefers_json_for_generic_accept():
+    """Clients that accept any type still get the buffered JSON response."""
+    app = import_app()
+    response = app.app.test_client().post(
+        "/standardize",
+        json=[{"program": "x"}],
+        headers={"Accept": "*/*"},
+    )
+    assert response.mimetype == "application/json"
+    assert response.get_json()["rows"][0]["program"] == "x"
+
+
+def test_standardize_stream_waits_for_pool_capacity(monkeypatch):
+    """A full pool delays a streamed batch instead of failing the response."""
+    app = import_app()
+    attempts = []
+
+    class BusyPool:
+        limits = app.serving.BatchLimits(max_queue=1)
+
+        def submit(self, items):
+            attempts.append(list(items))
+            if len(attempts) == 1:
+                raise app.serving.Overloaded(3)
+            return [app.Future() for _ in items]
+
+    def failing_result(self, timeout=None):
+        raise RuntimeError("model crashed")
+
+    sleeps = []
+    monkeypatch.setattr(app.time, "sleep", sleeps.append)
+    monkeypatch.setattr(app.Future, "result", failing_result)
+    monkeypatch.setitem(app._POOL, "pool", BusyPool())
+    response = app.app.test_client().post(
+        "/standardize", json=[{"program": "Math, UBC"}, {"program": "cs, mit"}], headers=NDJSON
+    )
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sleeps == [3]
+    assert attempts == [["Math, UBC"], ["Math, UBC"], ["cs, mit"]]
+    assert lines[0]["llm-generated-university"] == "University of British Columbia"
+
+
+def test_warmup_loads_model_and_snapshots_prompts(monkeypatch):
+    """Warmup times each phase and leaves prefix snapshots for both prompts."""
+    app = import_app()
+    llm = StatefulLlama()
+    monkeypatch.setattr(app, "_new_llm", lambda: llm)
+    client = app.app.test_client()
+    assert client.get("/ready").get_json()["state"] == "lazy"
+
+    status = app.warmup()
+    assert status["ready"] and status["state"] == "ready"
+    assert set(status["phases_s"]) == {"canon_index", "model_load", "prompt"}
+    assert status["total_s"] == pytest.approx(sum(status["phases_s"].values()), abs=1e-3)
+    assert app._LLM_CACHE["instance"] is llm
+    assert set(app._PREFIX_STATES) == {app.SYSTEM_PROMPT, app.BATCH_SYSTEM_PROMPT}
+    assert getattr(app._THREAD_MODEL, "llm", None) is None
+    assert client.get("/ready").status_code == 200
+    assert client.get("/metrics").get_json()["startup"]["state"] == "ready"
+
+
+def test_warmup_pool_warms_every_instance(monkeypatch):
+    """Each pool instance evaluates the prompts into its own prefix cache."""
+    app = import_app()
+    monkeypatch.setattr(app, "_new_llm", StatefulLlama)
+    app.warmup(pool_instances=2)
+    assert len(app._POOL["models"]) == 2
+    for _llm, cache in app._POOL["models"]:
+        assert set(cache.states) == {app.SYSTEM_PROMPT, app.BATCH_SYSTEM_PROMPT}
+    assert app._LLM_CACHE["instance"] is None
+    app._POOL["pool"].close()
+
+
+def test_requests_wait_for_warmup_and_failures_are_reported(monkeypatch):
+    """/ready and /standardize answer 503 while warming; failures fall back to lazy loading."""
+    app = import_app()
+    client = app.app.test_client()
+    seen = []
+
+    def slow_load():
+        seen.append(client.get("/ready").status_code)
+        seen.append(client.post("/standardize", json=[{"program": "x"}]).status_code)
+        raise OSError("download failed")
+
+    monkeypatch.setattr(app, "_new_llm", slow_load)
+    status = app.warmup()
+    assert seen == [503, 503]
+    assert status["state"] == "failed" and status["error"] == "download failed"
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.get_json()["error"] == "download failed"
+    assert "model_load" in response.get_json()["phases_s"]
+    assert client.post("/standardize", json=[{"program": "x"}]).status_code == 200
+
+
+def test_warmup_records_failure_for_unexpected_errors(monkeypatch):
+    """An exception outside the row errors still leaves the warming state."""
+    app = import_app()
+
+    def broken_load():
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(app, "_new_llm", broken_load)
+    with pytest.raises(KeyboardInterrupt):
+        app.warmup()
+    status = app.app.test_client().get("/ready").get_json()
+    assert status["state"] == "failed"
+    assert status["error"] == "warmup did not complete"
+
+
+def test_serve_http_warms_up_in_background(monkeypatch):
+    """serve_http starts warmup on a thread before serving."""
+    app = import_app()
+    started = []
+
+    class FakeThread:
+        def __init__(self, target, args, daemon):
+            started.append((target, args, daemon))
+
+        def start(self):
+            started.append(("start", app._STARTUP.state))
+
+    monkeypatch.setattr(app.threading, "Thread", FakeThread)
+    monkeypatch.setattr("flask.Flask.run", lambda self, **kw: started.append("run"))
+    app.serve_http(8004)
+    assert started == [(app.warmup, (0,), True), ("start", "warming"), "run"]
+
+
+def test_serve_socket_can_skip_warmup(monkeypatch, tmp_path):
+    """LLM_WARMUP=0 leaves the socket daemon to load the model lazily."""
+    app = import_app()
+    monkeypatch.setattr(app, "LLM_WARMUP", False)
+    monkeypatch.setattr(app, "warmup", lambda: pytest.fail("warmup ran"))
+
+    class FakeServer:
+        def __init__(self, *_args):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def serve_forever(self):
+            return None
+
+    monkeypatch.setattr(socketserver, "UnixStreamServer", FakeServer)
+    app.serve_socket(str(tmp_path / "s.sock"))
+    assert app._STARTUP.state == "lazy"
+
+
+def test_model_is_memory_mapped_by_default(monkeypatch):
+    """The GGUF file is mapped unless LLM_USE_MMAP=0."""
+    app = import_app()
+    seen = []
+    monkeypatch.setattr(app, "Llama", lambda **kw: seen.append(kw["use_mmap"]))
+    app._new_llm()
+    monkeypatch.setattr(app, "LLM_USE_MMAP", False)
+    app._new_llm()
+    assert seen == [True, False]
+
+
+def test_serve_prefork_loads_before_forking(monkeypatch):
+    """The parent binds and loads the model, then forks the workers."""
+    app = import_app()
+    events = []
+    monkeypatch.setattr(app, "_new_llm", lambda: events.append("load") or StatefulLlama())
+
+    def run_workers(workers, serve):
+        events.append(("fork", workers))
+        monkeypatch.setattr(app, "_serve_forked", lambda sock: events.append(sock.getsockname()))
+        serve()
+
+    monkeypatch.setattr(app.prefork, "run_workers", run_workers)
+    app.serve_prefork(0, 3)
+    assert events[:2] == ["load", ("fork", 3)]
+    assert events[2][0] == "0.0.0.0"
+    assert app._STARTUP.status()["state"] == "ready"
+    assert "prompt" not in app._STARTUP.phases
+    assert app._PREFIX_STATES == {}  # prompts are evaluated after the fork
+
+
+def test_forked_worker_warms_prompts_and_serves(monkeypatch, caplog):
+    """A worker evaluates its prompts, then serves the inherited socket."""
+    app = import_app()
+    served = []
+    llm = StatefulLlama()
+    monkeypatch.setitem(app._LLM_CACHE, "instance", llm)
+
+    class FakeServer:
+        def serve_forever(self):
+            served.append("werkzeug")
+
+    def fake_make_server(host, port, wsgi_app, fd):
+        served.append((host, port, wsgi_app, fd))
+        return FakeServer()
+
+    monkeypatch.setattr(app, "make_server", fake_make_server)
+    monkeypatch.setattr(app, "waitress_serve", None)
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        app._serve_forked(listener)
+        port = listener.getsockname()[1]
+        assert served == [("127.0.0.1", port, app.app, listener.fileno()), "werkzeug"]
+        assert "waitress is not installed" in caplog.text
+        assert set(app._PREFIX_STATES) == {app.SYSTEM_PROMPT, app.BATCH_SYSTEM_PROMPT}
+
+        def broken(**_kwargs):
+            raise RuntimeError("no context")
+
+        monkeypatch.setattr(llm, "create_chat_completion", broken)
+        monkeypatch.setattr(app, "_warm_model", lambda *_args: broken())
+        monkeypatch.setattr(
+            app, "waitress_serve", lambda _app, sockets, threads: served.append(sockets)
+        )
+        app._serve_forked(listener)
+        assert served[-1] == [listener]
+
+
+def test_main_guard_prefork(monkeypatch):
+    """--prefork starts the pre-fork server and cannot be combined with --pool."""
+    app = import_app()
+    called = []
+    monkeypatch.setattr(sys, "argv", ["app.py", "--serve", "--prefork", "2", "--pool", "2"])
+    monkeypatch.syspath_prepend(str(Path(app.__file__).parent))
+    with pytest.raises(SystemExit):
+        runpy.run_path(app.__file__, run_name="__main__")
+
+    import prefork
+
+    monkeypatch.setattr(prefork, "run_workers", lambda workers, _serve: called.append(workers))
+    monkeypatch.setattr(sys, "argv", ["app.py", "--serve", "--prefork", "2"])
+    monkeypatch.setenv("PORT", "0")
+    runpy.run_path(app.__file__, run_name="__main__")
+    assert called == [2]
+
+
+def _recording_llm(replies):
+    """Fake model returning canned replies and recording request kwargs."""
+    calls = []
+
+    class RecordingLlama:
+        def create_chat_completion(self, messages, **kwargs):
+            calls.append(kwargs)
+            return {
+                "choices": [{"message": {"content": replies.pop(0)}}],
+                "usage": {"completion_tokens": 12},
+            }
+
+    return RecordingLlama(), calls
+
+
+def test_replies_are_grammar_constrained_and_counted(monkeypatch, capsys):
+    """Prompts carry a JSON-schema response_format; tokens and fallbacks are counted."""
+    app = import_app()
+    llm, calls = _recording_llm(
+        [
+            '{"standardized_program": "Math", "standardized_university": "MIT"}',
+            '[{"standardized_program": "Physics", "standardized_university": "MIT"}]',
+        ]
+    )
+    monkeypatch.setattr(app, "_load_llm", lambda: llm)
+    assert app._call_llm("math, mit")["standardized_program"] == "Math"
+    app._call_llm_batch(["physics, mit", "chemistry, mit"])
+
+    assert calls[0]["response_format"] == app.constrained_json.response_format()
+    assert calls[1]["response_format"]["schema"]["maxItems"] == 2
+    decoding = app.app.test_client().get("/metrics").get_json()["decoding"]
+    assert decoding["rows"] == 3
+    assert decoding["completion_tokens"] == 24
+    assert decoding["tokens_per_row"] == 8
+    assert decoding["fallback_rows"] == 1
+    app._report_caches()
+    assert "8.0 generated tokens per row, 33.3% of model rows" in capsys.readouterr().err
+
+
+def test_unconstrained_replies_and_failed_calls(monkeypatch):
+    """LLM_CONSTRAINED_JSON=0 sends no grammar; failed calls count as fallbacks."""
+    app = import_app()
+    llm, calls = _recording_llm(["not json"])
+    monkeypatch.setattr(app, "_load_llm", lambda: llm)
+    monkeypatch.setattr(app, "LLM_CONSTRAINED_JSON", False)
+    app._call_llm("math, mit")
+    assert "response_format" not in calls[0]
+    app._call_llm_batch(["a", "b"])  # no reply left: the call itself fails
+    stats = app._DECODE.stats()
+    assert stats["fallback_rows"] == 3
+    assert stats["completion_tokens"] == 12
+
+
+def test_worker_counters_include_decoding():
+    """Decoding counts from --workers processes are merged into the parent."""
+    app = import_app()
+    deltas = dict(app._cache_counters(), decode_rows=4, decode_fallback_rows=1)
+    app._merge_counters(deltas)
+    assert app._DECODE.stats()["fallback_rate"] == 0.25
@@ -0,0 +1,43 @@
+"""Tests for the order-preserving worker-process fan-out."""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import ordered_pool
+
+pytestmark = pytest.mark.db
+
+
+def _square(value):
+    return value * value
+
+
+def test_imap_ordered_bounds_tasks_in_flight(monkeypatch):
+    """At most IN_FLIGHT_PER_WORKER tasks per worker are pulled ahead."""
+    monkeypatch.setattr(ordered_pool, "ProcessPoolExecutor", ThreadPoolExecutor)
+    pulled = []
+
+    def tasks():
+        for value in range(7):
+            pulled.append(value)
+            yield value
+
+    results = ordered_pool.imap_ordered(_square, tasks(), 2)
+    assert next(results) == 0
+    assert len(pulled) == 2 * ordered_pool.IN_FLIGHT_PER_WORKER
+    assert list(results) == [value * value for value in range(1, 7)]
+
+
+def test_imap_ordered_runs_initializer_in_real_processes():
+    """Results come back in order from a real process pool."""
+    results = ordered_pool.imap_ordered(
+        _square, range(5), 2, initializer=_square, initargs=(3,)
+    )
+    assert list(results) == [0, 1, 4, 9, 16]
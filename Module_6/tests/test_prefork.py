@@ -0,0 +1,87 @@
+"""Tests for pre-forked workers and per-process memory accounting."""
+
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import prefork
+
+pytestmark = pytest.mark.db
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="Linux only")
+def test_memory_kb_reads_smaps_rollup():
+    """RSS, PSS and the shared/private split are reported in KiB."""
+    stats = prefork.memory_kb()
+    assert stats["rss_kb"] >= stats["pss_kb"] > 0
+    assert stats["rss_kb"] == pytest.approx(
+        stats["shared_clean_kb"]
+        + stats["shared_dirty_kb"]
+        + stats["private_clean_kb"]
+        + stats["private_dirty_kb"],
+        abs=8,
+    )
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/smaps_rollup"), reason="Linux only")
+def test_child_pids_lists_direct_children():
+    """Processes started by this one are listed as its children."""
+    with subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"]) as child:
+        try:
+            assert child.pid in prefork.child_pids()
+        finally:
+            child.kill()
+
+
+def test_memory_kb_and_children_of_missing_process():
+    """An unknown pid yields no figures instead of an error."""
+    assert prefork.memory_kb(-1) == {}
+    assert prefork.child_pids(-1) == []
+
+
+def test_run_workers_forks_and_reaps(tmp_path):
+    """Each forked worker runs the serving loop; the parent waits for all."""
+    marker = tmp_path / "served"
+
+    def serve():
+        with open(marker, "a", encoding="utf-8") as f:
+            f.write(f"{os.getpid()}\n")
+
+    previous = signal.getsignal(signal.SIGTERM)
+    prefork.run_workers(3, serve)
+    pids = marker.read_text(encoding="utf-8").split()
+    assert len(set(pids)) == 3
+    assert str(os.getpid()) not in pids
+    assert signal.getsignal(signal.SIGTERM) is previous
+
+
+def test_run_workers_stops_remaining_workers(monkeypatch):
+    """An interrupt or SIGTERM in the parent terminates the live workers."""
+    forked = iter([101, 102])
+    killed = []
+    monkeypatch.setattr(prefork.os, "fork", lambda: next(forked))
+
+    def interrupted_wait():
+        raise KeyboardInterrupt
+
+    def kill(pid, signum):
+        killed.append((pid, signum))
+        if pid == 102:
+            raise ProcessLookupError
+
+    monkeypatch.setattr(prefork.os, "wait", interrupted_wait)
+    monkeypatch.setattr(prefork.os, "kill", kill)
+    prefork.run_workers(2, lambda: None)
+    assert sorted(killed) == [(101, signal.SIGTERM), (102, signal.SIGTERM)]
+
+    with pytest.raises(SystemExit) as excinfo:
+        prefork._exit_on_signal(signal.SIGTERM, None)
+    assert excinfo.value.code == 128 + signal.SIGTERM
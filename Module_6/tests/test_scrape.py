@@ -3,7 +3,9 @@
 import json
 import ssl
 import sys
+import time
 from pathlib import Path
+from types import SimpleNamespace
 
 import pytest
 
@@ -11,33 +13,11 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from src import scrape
+from src import clean, scrape, scrape_output
 
 pytestmark = pytest.mark.web
 
 
-def test_url_check_calls_robotparser(monkeypatch, capsys):
-    """url_check() initializes RobotFileParser and reports status."""
-    calls = {"set_url": None, "read": 0}
-
-    class FakeParser:
-        def set_url(self, url):
-            calls["set_url"] = url
-
-        def read(self):
-            calls["read"] += 1
-
-    monkeypatch.setattr(scrape.robotparser, "RobotFileParser", lambda: FakeParser())
-
-    parser = scrape.url_check()
-
-    out = capsys.readouterr().out
-    assert "robots.txt checked" in out
-    assert calls["set_url"].endswith("robots.txt")
-    assert calls["read"] == 1
-    assert isinstance(parser, FakeParser)
-
-
 def test_build_ssl_context_without_certifi(monkeypatch):
     """_build_ssl_context falls back to system trust when certifi is unavailable."""
     sentinel = object()
@@ -52,44 +32,33 @@ def test_build_ssl_context_without_certifi(monkeypatch):
     assert scrape._build_ssl_context() is sentinel
 
 
-def test_is_cert_verification_error_ssl_error_and_non_ssl_reason():
-    """_is_cert_verification_error handles generic SSLError and non-SSL reasons."""
-    ssl_err = scrape.error.URLError(scrape.ssl.SSLError("CERTIFICATE_VERIFY_FAILED"))
-    assert scrape._is_cert_verification_error(ssl_err) is True
-
-    non_ssl_err = scrape.error.URLError("network down")
-    assert scrape._is_cert_verification_error(non_ssl_err) is False
-
+def test_url_check_fetches_and_caches_robots(monkeypatch, tmp_path, capsys):
+    """url_check() fetches robots.txt once and reuses it from the cache."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    fetched = []
 
-def test_url_check_reraises_non_cert_urlerror(monkeypatch):
-    """url_check() re-raises URLError when it is not a cert-verification issue."""
-    class FakeParser:
-        def set_url(self, _url):
-            return None
+    def fake_fetch_text(url):
+        fetched.append(url)
+        return "User-agent: *\nDisallow: /private\nCrawl-delay: 4\n"
 
-        def read(self):
-            raise scrape.error.URLError("network down")
-
-    monkeypatch.setattr(scrape.robotparser, "RobotFileParser", lambda: FakeParser())
-    with pytest.raises(scrape.error.URLError):
-        scrape.url_check()
+    monkeypatch.setattr(scrape, "_fetch_text", fake_fetch_text)
 
+    parser = scrape.url_check()
+    assert "robots.txt checked" in capsys.readouterr().out
+    assert fetched == ["https://www.thegradcafe.com/robots.txt"]
+    assert (tmp_path / "out.robots.json").exists()
+    assert parser.can_fetch(scrape.USER_AGENT, scrape.URL + "survey/") is True
+    assert parser.can_fetch(scrape.USER_AGENT, scrape.URL + "private/x") is False
 
-def test_url_check_retries_with_ca_bundle_on_cert_error(monkeypatch, capsys):
-    """url_check() retries robots fetch via TLS context on cert failures."""
-    calls = {"read": 0, "parsed": None, "urlopen": 0}
-
-    class FakeParser:
-        def set_url(self, _url):
-            return None
+    cached = scrape.url_check()
+    assert "robots.txt loaded from cache" in capsys.readouterr().out
+    assert len(fetched) == 1
+    assert cached.request_rate_limit(scrape.USER_AGENT) == 0.25
 
-        def read(self):
-            calls["read"] += 1
-            cert_error = ssl.SSLCertVerificationError("CERTIFICATE_VERIFY_FAILED")
-            raise scrape.error.URLError(cert_error)
 
-        def parse(self, lines):
-            calls["parsed"] = list(lines)
+def test_fetch_text_uses_tls_context(monkeypatch):
+    """_fetch_text() sends the user agent over the shared TLS context."""
+    seen = {}
 
     class FakeResponse:
         def __enter__(self):
@@ -101,23 +70,88 @@ def test_url_check_retries_with_ca_bundle_on_cert_error(monkeypatch, capsys):
         def read(self):
             return b"User-agent: *\nDisallow:"
 
-    def fake_urlopen(_req, context=None):
-        calls["urlopen"] += 1
-        assert context is not None
+    def fake_urlopen(req, context=None):
+        seen["agent"] = req.get_header("User-agent")
+        seen["context"] = context
         return FakeResponse()
 
-    monkeypatch.setattr(scrape.robotparser, "RobotFileParser", lambda: FakeParser())
     monkeypatch.setattr(scrape.request, "urlopen", fake_urlopen)
+    assert scrape._fetch_text(scrape.URL + "robots.txt") == "User-agent: *\nDisallow:"
+    assert seen["agent"] == scrape.USER_AGENT
+    assert isinstance(seen["context"], ssl.SSLContext)
 
-    parser = scrape.url_check()
 
-    out = capsys.readouterr().out
-    assert "retrying with CA bundle" in out
-    assert "robots.txt checked" in out
-    assert calls["read"] == 1
-    assert calls["urlopen"] == 1
-    assert calls["parsed"] == ["User-agent: *", "Disallow:"]
-    assert isinstance(parser, FakeParser)
+def test_url_check_http_error_statuses(monkeypatch, tmp_path):
+    """robots.txt error replies follow RobotFileParser.read() rules."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape.scrape_robots, "ROBOTS_TTL", 0)
+    status = {"code": 403}
+
+    def fake_fetch_text(url):
+        raise scrape.error.HTTPError(url=url, code=status["code"], msg="x", hdrs=None, fp=None)
+
+    monkeypatch.setattr(scrape, "_fetch_text", fake_fetch_text)
+    assert scrape.url_check().can_fetch(scrape.USER_AGENT, scrape.URL) is False
+    status["code"] = 404
+    assert scrape.url_check().can_fetch(scrape.USER_AGENT, scrape.URL) is True
+    assert not (tmp_path / "out.robots.json").exists()
+
+
+def test_url_check_server_error_disallows_without_caching(monkeypatch, tmp_path):
+    """A 5xx robots.txt reply disallows everything and is not cached."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape.scrape_robots, "ROBOTS_TTL", 86400)
+    replies = [503, None]
+
+    def fake_fetch_text(url):
+        code = replies.pop(0)
+        if code is not None:
+            raise scrape.error.HTTPError(url=url, code=code, msg="x", hdrs=None, fp=None)
+        return "User-agent: *\nDisallow:"
+
+    monkeypatch.setattr(scrape, "_fetch_text", fake_fetch_text)
+    assert scrape.url_check().can_fetch(scrape.USER_AGENT, scrape.URL) is False
+    assert not (tmp_path / "out.robots.json").exists()
+    # The next pull fetches robots.txt again instead of reusing the outage
+    assert scrape.url_check().can_fetch(scrape.USER_AGENT, scrape.URL) is True
+    assert replies == []
+
+
+def test_url_check_reraises_urlerror(monkeypatch, tmp_path):
+    """url_check() re-raises network errors that are not HTTP replies."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+
+    def fake_fetch_text(_url):
+        raise scrape.error.URLError("network down")
+
+    monkeypatch.setattr(scrape, "_fetch_text", fake_fetch_text)
+    with pytest.raises(scrape.error.URLError):
+        scrape.url_check()
+
+
+def test_resolve_rate_limit_prefers_explicit_then_env_then_robots(monkeypatch, capsys):
+    """Explicit and configured rates win over robots.txt pacing."""
+    policy = scrape.scrape_robots.RobotsPolicy.from_entry(
+        {"url": "u", "status": 200, "text": "User-agent: *\nCrawl-delay: 2"}
+    )
+    monkeypatch.setattr(scrape, "RATE_LIMIT_ENV", None)
+    monkeypatch.setattr(scrape, "RATE_LIMIT_PER_SEC", 0.1)
+    assert scrape.resolve_rate_limit(3.0, policy) == 3.0
+    assert scrape.resolve_rate_limit(None, policy) == 0.5
+    assert "0.5 requests/s from robots.txt" in capsys.readouterr().out
+    assert scrape.resolve_rate_limit(None, None) == 0.1
+
+    no_pace = scrape.scrape_robots.RobotsPolicy.from_entry(
+        {"url": "u", "status": 200, "text": "User-agent: *\nDisallow:"}
+    )
+    assert scrape.resolve_rate_limit(None, no_pace) == 0.1
+    zero_delay = scrape.scrape_robots.RobotsPolicy.from_entry(
+        {"url": "u", "status": 200, "text": "User-agent: *\nCrawl-delay: 0"}
+    )
+    assert scrape.resolve_rate_limit(None, zero_delay) == 0.1
+    monkeypatch.setattr(scrape, "RATE_LIMIT_ENV", "1")
+    monkeypatch.setattr(scrape, "RATE_LIMIT_PER_SEC", 1.0)
+    assert scrape.resolve_rate_limit(None, policy) == 1.0
 
 
 def test_check_url_not_allowed(monkeypatch, capsys):
@@ -138,17 +172,12 @@ def test_check_url_allowed_returns_soup(monkeypatch):
         def can_fetch(self, _agent, _url):
             return True
 
-    class FakeResponse:
-        def __enter__(self):
-            return self
+    class FakeSession:
+        def get(self, url, headers=None):
+            body = b"<html><body><table></table></body></html>"
+            return scrape.HttpResponse(200, {}, body, url)
 
-        def __exit__(self, exc_type, exc, tb):
-            return False
-
-        def read(self):
-            return b"<html><body><table></table></body></html>"
-
-    monkeypatch.setattr(scrape.request, "urlopen", lambda _req: FakeResponse())
+    monkeypatch.setattr(scrape, "HTTP_SESSION", FakeSession())
     soup = scrape.check_url("https://example.com/page", FakeParser())
     assert soup is not None
     assert soup.find("table") is not None
@@ -160,10 +189,11 @@ def test_check_url_http_error(monkeypatch, capsys):
         def can_fetch(self, _agent, _url):
             return True
 
-    def boom(_req):
-        raise scrape.error.HTTPError(url=None, code=403, msg="Forbidden", hdrs=None, fp=None)
+    class FakeSession:
+        def get(self, url, headers=None):
+            raise scrape.error.HTTPError(url=url, code=403, msg="Forbidden", hdrs=None, fp=None)
 
-    monkeypatch.setattr(scrape.request, "urlopen", boom)
+    monkeypatch.setattr(scrape, "HTTP_SESSION", FakeSession())
     result = scrape.check_url("https://example.com/page", FakeParser())
     out = capsys.readouterr().out
     assert result is None
@@ -176,16 +206,39 @@ def test_check_url_url_error(monkeypatch, capsys):
         def can_fetch(self, _agent, _url):
             return True
 
-    def boom(_req, context=None):
-        raise scrape.error.URLError("network down")
+    class FakeSession:
+        def get(self, url, headers=None):
+            raise scrape.error.URLError("network down")
 
-    monkeypatch.setattr(scrape.request, "urlopen", boom)
+    monkeypatch.setattr(scrape, "HTTP_SESSION", FakeSession())
     result = scrape.check_url("https://example.com/page", FakeParser())
     out = capsys.readouterr().out
     assert result is None
     assert "An error has occurred" in out
 
 
+def test_urlopen_with_tls_falls_back_without_context_kwarg(monkeypatch):
+    """_urlopen_with_tls retries urlopen without ``context`` for simple doubles."""
+    sentinel = object()
+    monkeypatch.setattr(scrape.request, "urlopen", lambda _req: sentinel)
+    assert scrape._urlopen_with_tls(object()) is sentinel
+
+
+def test_shared_ssl_context_is_built_once(monkeypatch):
+    """_shared_ssl_context() loads the CA bundle once per process."""
+    monkeypatch.setitem(scrape._SSL_CONTEXT_CACHE, "context", None)
+    built = []
+
+    def fake_build():
+        built.append(1)
+        return object()
+
+    monkeypatch.setattr(scrape, "_build_ssl_context", fake_build)
+    first = scrape._shared_ssl_context()
+    assert scrape._shared_ssl_context() is first
+    assert len(built) == 1
+
+
 def test_scrape_data_no_table():
     """scrape_data() returns [] when no table is present."""
     soup = scrape.BeautifulSoup("<html><body>No table</body></html>", "html.parser")
@@ -273,6 +326,41 @@ def test_parse_decision_empty_and_whitespace():
     assert scrape._parse_decision("   ") == (None, None)
 
 
+@pytest.mark.parametrize(
+    ("text", "field"),
+    [
+        ("Fall 2026", "semester_year_start"),
+        ("Winter\t2027", "semester_year_start"),
+        ("fall 2026", None),
+        ("American", "citizenship"),
+        ("American\n", None),
+        ("GPA 3.89", "gpa"),
+        ("GPA 3.89\n", "gpa"),
+        ("GRE AW 4.5", "gre_aw"),
+        ("GRE V 165", "gre_v"),
+        ("GRE 330", "gre"),
+        ("GRE V 4.5", None),
+        ("Other", None),
+    ],
+)
+def test_apply_detail_text_classifies_tokens(text, field):
+    """The combined detail classifier keeps the per-pattern semantics."""
+    record = scrape._empty_record()
+    scrape._apply_detail_text(record, text)
+    filled = {key: value for key, value in record.items() if value is not None}
+    assert filled == ({field: text} if field else {})
+
+
+def test_parse_decision_caches_repeated_strings():
+    """Repeated decision strings are served from the lookup cache."""
+    scrape._parse_decision.cache_clear()
+    assert scrape._parse_decision("Accepted   on 30 Jan") == ("Accepted", "30 Jan")
+    assert scrape._parse_decision("Accepted   on 30 Jan") == ("Accepted", "30 Jan")
+    assert scrape._parse_decision("Wait listed ON\n2 Feb") == ("Wait listed", "2 Feb")
+    info = scrape._parse_decision.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
+
+
 def test_create_pages():
     """create_pages() builds correct survey URLs."""
     assert scrape.create_pages(1).endswith("/survey/")
@@ -331,16 +419,502 @@ def test_pull_pages_normal_path_caps_target(monkeypatch, tmp_path, capsys):
     assert "Finished. Total records saved: 3" in out
 
 
+def test_rate_limiter_reserve_paces_requests(monkeypatch):
+    """RateLimiter hands out burst tokens, then spaces requests by 1/rate."""
+    clock = {"now": 100.0}
+    monkeypatch.setattr(scrape.time, "monotonic", lambda: clock["now"])
+
+    limiter = scrape.RateLimiter(rate=2.0, burst=2)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == pytest.approx(0.5)
+
+    clock["now"] += 1.5
+    assert limiter.reserve() == 0.0
+
+    staggered = scrape.RateLimiter(rate=2.0, tokens=0.5)
+    assert staggered.reserve() == pytest.approx(0.25)
+    capped = scrape.RateLimiter(rate=2.0, burst=2, tokens=5)
+    assert [capped.reserve() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.5)]
+
+
+def test_rate_limiter_acquire_sleeps_and_disabled_rate(monkeypatch):
+    """acquire() sleeps for the reserved delay; rate <= 0 never waits."""
+    slept = []
+    monkeypatch.setattr(scrape.time, "sleep", slept.append)
+    monkeypatch.setattr(scrape.time, "monotonic", lambda: 5.0)
+
+    limiter = scrape.RateLimiter(rate=0.1)
+    limiter.acquire()
+    limiter.acquire()
+    assert slept == [pytest.approx(10.0)]
+
+    unlimited = scrape.RateLimiter(rate=0)
+    assert unlimited.reserve() == 0.0
+
+
+def test_pull_pages_concurrent_preserves_page_order(monkeypatch, tmp_path, capsys):
+    """Concurrent fetches are emitted in page order and report throughput."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    fetched = []
+
+    def fake_check_url(page_url, _parser):
+        page = 1 if page_url.endswith("/survey/") else int(page_url.rsplit("=", 1)[1])
+        fetched.append(page)
+        # Later pages finish first so ordering must come from the window
+        scrape.time.sleep(0.01 * (5 - min(page, 5)))
+        return None if page > 4 else page
+
+    monkeypatch.setattr(scrape, "check_url", fake_check_url)
+    monkeypatch.setattr(
+        scrape,
+        "scrape_data",
+        lambda page: [{"page": page, "row": 0}, {"page": page, "row": 1}],
+    )
+
+    stats = scrape.pull_pages(target_n=100, start_page=1, workers=3, rate_limit=0)
+
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    assert [row["page"] for row in data] == [1, 1, 2, 2, 3, 3, 4, 4]
+    assert stats["pages"] == 4
+    assert stats["rows"] == 8
+    assert stats["rows_per_s"] > 0
+    assert 5 in fetched
+
+    out = capsys.readouterr().out
+    assert out.index("Page 1: saved 2") < out.index("Page 4: saved 8")
+    assert "pages/s" in out
+
+
+class AllowAll:
+    """Robots parser double that allows every URL."""
+
+    def can_fetch(self, _agent, _url):
+        return True
+
+
+class FakeConditionalSession:
+    """Session double that records conditional headers and replays statuses."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.headers = []
+
+    def get(self, url, headers=None):
+        self.headers.append(dict(headers or {}))
+        status, body = self.responses.pop(0)
+        return scrape.HttpResponse(status, {"ETag": '"v1"'}, body, url)
+
+
+PAGE_HTML = (
+    b"<table><tbody><tr><td>U</td><td><span>P</span></td><td>D</td>"
+    b"<td>Accepted</td><td><a href='/result/9'>x</a></td></tr></tbody></table>"
+)
+
+
+def test_fetch_cached_records_uses_conditional_get(monkeypatch, tmp_path, capsys):
+    """A 304 response reuses cached records without calling scrape_data."""
+    cache = scrape.PageCache(str(tmp_path))
+    session = FakeConditionalSession([(200, PAGE_HTML), (304, b"")])
+    monkeypatch.setattr(scrape, "HTTP_SESSION", session)
+    limiter = scrape.RateLimiter(rate=0)
+    url = "https://example.com/survey/"
+
+    first = scrape._fetch_page_records(url, AllowAll(), limiter, cache)
+    assert first[0]["url"].endswith("/result/9")
+
+    def fail_scrape(_soup):
+        raise AssertionError("scrape_data should be skipped on 304")
+
+    monkeypatch.setattr(scrape, "scrape_data", fail_scrape)
+    second = scrape._fetch_page_records(url, AllowAll(), limiter, cache)
+    assert second == first
+    assert session.headers[0] == {}
+    assert session.headers[1] == {"If-None-Match": '"v1"'}
+    assert "not modified" in capsys.readouterr().out
+
+
+def test_fetch_cached_records_refetches_when_304_has_no_records(monkeypatch, tmp_path):
+    """A 304 without cached records falls back to a rate-limited unconditional fetch."""
+    cache = scrape.PageCache(str(tmp_path))
+    session = FakeConditionalSession([(304, b""), (200, PAGE_HTML)])
+    monkeypatch.setattr(scrape, "HTTP_SESSION", session)
+    acquired = []
+
+    class CountingLimiter(scrape.RateLimiter):
+        def acquire(self):
+            acquired.append(len(session.headers))
+            super().acquire()
+
+    records = scrape._fetch_page_records(
+        "https://example.com/survey/", AllowAll(), CountingLimiter(rate=0), cache
+    )
+    assert len(records) == 1
+    assert len(session.headers) == 2
+    assert acquired == [0, 1]  # one token before each request
+
+
+def test_fetch_cached_records_blocked_and_errors(monkeypatch, tmp_path, capsys):
+    """Robots denials and HTTP errors return None on the cached path."""
+    cache = scrape.PageCache(str(tmp_path))
+
+    class DenyAll:
+        def can_fetch(self, _agent, _url):
+            return False
+
+    limiter = scrape.RateLimiter(rate=0)
+    assert scrape._fetch_page_records("https://example.com/", DenyAll(), limiter, cache) is None
+
+    class BrokenSession:
+        def get(self, url, headers=None):
+            raise scrape.error.URLError("down")
+
+    monkeypatch.setattr(scrape, "HTTP_SESSION", BrokenSession())
+    assert scrape._fetch_page_records("https://example.com/", AllowAll(), limiter, cache) is None
+    assert "An error has occurred" in capsys.readouterr().out
+
+
+def test_pull_pages_offline_replays_cache_without_network(monkeypatch, tmp_path):
+    """Offline caches skip robots.txt and stop at the first uncached page."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+
+    def no_network():
+        raise AssertionError("url_check must not run offline")
+
+    monkeypatch.setattr(scrape, "url_check", no_network)
+    cache = scrape.PageCache(str(tmp_path / "cache"))
+    cache.store(scrape.create_pages(1), {}, b"", [{"url": "u1"}, {"url": "u2"}])
+    offline = scrape.PageCache(str(tmp_path / "cache"), offline=True)
+
+    stats = scrape.pull_pages(target_n=10, cache=offline, rate_limit=0)
+
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        assert json.load(handle) == [{"url": "u1"}, {"url": "u2"}]
+    assert stats["pages"] == 1
+
+
+def test_default_cache_from_environment(monkeypatch, tmp_path):
+    """_default_cache() honours SCRAPE_CACHE_DIR."""
+    monkeypatch.setattr(scrape, "CACHE_DIR", "")
+    assert scrape._default_cache() is None
+    monkeypatch.setattr(scrape, "CACHE_DIR", str(tmp_path))
+    assert scrape._default_cache().directory == str(tmp_path)
+
+
+def _fake_result_pages(pages, fetched):
+    """Return a check_url double serving ``pages`` of result IDs by page number."""
+
+    def fake_check_url(page_url, _parser):
+        page = 1 if page_url.endswith("/survey/") else int(page_url.rsplit("=", 1)[1])
+        fetched.append(page)
+        return pages.get(page)
+
+    return fake_check_url
+
+
+def test_pull_pages_stops_at_since_watermark(monkeypatch, tmp_path, capsys):
+    """Paging stops once a page holds only IDs at or below the watermark."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    pages = {1: [110, 109, 108], 2: [107, 104, None], 3: [102, 101], 4: [100]}
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages(pages, fetched))
+    monkeypatch.setattr(
+        scrape,
+        "scrape_data",
+        lambda ids: [
+            {"url": f"https://www.thegradcafe.com/result/{i}" if i else None}
+            for i in ids
+        ],
+    )
+
+    stats = scrape.pull_pages(target_n=50, since="105", rate_limit=0)
+
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    assert [row["url"] and row["url"].rsplit("/", 1)[1] for row in data] == [
+        "110", "109", "108", "107", None,
+    ]
+    assert fetched == [1, 2, 3]
+    assert stats["high_water_mark"] == "110"
+    with open(tmp_path / "out.watermark.json", "r", encoding="utf-8") as handle:
+        assert json.load(handle) == {"since": "105", "high_water_mark": "110"}
+    assert "Reached watermark 105" in capsys.readouterr().out
+
+
+def test_pull_pages_ignores_non_numeric_watermark(monkeypatch, tmp_path, capsys):
+    """A date-style watermark cannot be compared to result IDs and is ignored."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [5]}, fetched))
+    monkeypatch.setattr(
+        scrape,
+        "scrape_data",
+        lambda ids: [{"url": f"https://www.thegradcafe.com/result/{i}"} for i in ids],
+    )
+
+    stats = scrape.pull_pages(target_n=50, since="2026-02-01", rate_limit=0)
+    assert stats["rows"] == 1
+    assert stats["high_water_mark"] == "5"
+    assert "ignoring non-numeric watermark" in capsys.readouterr().out
+
+
+def _fake_url_records(ids):
+    """Return result records for the given IDs."""
+    return [{"url": f"https://www.thegradcafe.com/result/{i}"} for i in ids]
+
+
+def test_pull_pages_streams_jsonl_output(monkeypatch, tmp_path):
+    """The jsonl format writes one record per line and removes the spool."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    pages = {1: [9, 8], 2: [7, 6], 3: [5]}
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages(pages, []))
+    monkeypatch.setattr(scrape, "scrape_data", _fake_url_records)
+
+    stats = scrape.pull_pages(target_n=3, rate_limit=0, output_format="jsonl")
+
+    assert stats["output"] == str(tmp_path / "out.json")
+    lines = (tmp_path / "out.json").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["url"][-1] for line in lines] == ["9", "8", "7"]
+    assert not (tmp_path / "out.partial.jsonl").exists()
+
+
+def test_jsonl_scrape_feeds_clean(monkeypatch, tmp_path):
+    """A jsonl pull lands where clean.py reads it and flows through to the master file."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "applicant_data.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [9, 8], 2: [7]}, []))
+    monkeypatch.setattr(
+        scrape,
+        "scrape_data",
+        lambda ids: [
+            {"program_name": "Physics", "university": "MIT", "url": f"https://x/result/{i}"}
+            for i in ids
+        ],
+    )
+    scrape.pull_pages(target_n=3, rate_limit=0, output_format="jsonl")
+
+    def standardize_rows(rows):
+        for row in rows:
+            yield {**row, "llm-generated-program": "Physics"}
+
+    monkeypatch.setattr(clean, "SCRAPED_FILE", scrape.OUTPUT_FILE)
+    monkeypatch.setattr(clean, "MASTER_FILE", str(tmp_path / "master.jsonl"))
+    monkeypatch.setattr(clean, "NEW_INPUT_FILE", str(tmp_path / "new.json"))
+    monkeypatch.setattr(clean, "NEW_LLM_FILE", str(tmp_path / "new_llm.json"))
+    monkeypatch.setattr(clean, "LLM_STANDARDIZER_MODE", "inprocess")
+    monkeypatch.setitem(clean._STANDARDIZER, "module", SimpleNamespace(standardize_rows=standardize_rows))
+    clean.main()
+
+    master = (tmp_path / "master.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["url"][-1] for line in master] == ["9", "8", "7"]
+    assert [row["program"] for row in clean.load_data(scrape.OUTPUT_FILE)] == ["Physics, MIT"] * 3
+
+
+def test_pull_pages_keeps_completed_pages_after_crash(monkeypatch, tmp_path):
+    """Pages accepted before a failure stay durable in the spool."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [9, 8], 2: [7]}, []))
+
+    def flaky_scrape_data(ids):
+        if ids == [7]:
+            raise RuntimeError("parser crashed")
+        return _fake_url_records(ids)
+
+    monkeypatch.setattr(scrape, "scrape_data", flaky_scrape_data)
+
+    with pytest.raises(RuntimeError):
+        scrape.pull_pages(target_n=10, rate_limit=0)
+
+    assert not (tmp_path / "out.json").exists()
+    spool = scrape.PageSpool(str(tmp_path / "out.partial.jsonl"), resume=True)
+    assert (spool.last_page, spool.rows) == (1, 2)
+    spool.close()
+
+
+def _crash_on_page(crash_ids):
+    """Return a scrape_data double that fails once for the given ID list."""
+    state = {"crashed": False}
+
+    def scrape_data(ids):
+        if ids == crash_ids and not state["crashed"]:
+            state["crashed"] = True
+            raise RuntimeError("connection dropped")
+        return _fake_url_records(ids)
+
+    return scrape_data
+
+
+def test_pull_pages_resumes_from_checkpoint(monkeypatch, tmp_path, capsys):
+    """A resumed pull continues after the last completed page without duplicates."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    pages = {1: [20, 19], 2: [18, 17], 3: [16, 15], 4: [14]}
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages(pages, fetched))
+    monkeypatch.setattr(scrape, "scrape_data", _crash_on_page([16, 15]))
+
+    with pytest.raises(RuntimeError):
+        scrape.pull_pages(target_n=7, since="10", rate_limit=0, resume=True)
+    with open(tmp_path / "out.checkpoint.json", "r", encoding="utf-8") as handle:
+        state = json.load(handle)
+    assert (state["last_page"], state["rows"], state["high_water_mark"]) == (2, 4, 20)
+
+    fetched.clear()
+    stats = scrape.pull_pages(target_n=7, since="10", rate_limit=0, resume=True)
+
+    assert fetched[0] == 3
+    assert "Resuming after page 2 with 4 rows saved." in capsys.readouterr().out
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        data = json.load(handle)
+    assert [row["url"].rsplit("/", 1)[1] for row in data] == [
+        "20", "19", "18", "17", "16", "15", "14",
+    ]
+    assert (stats["pages"], stats["rows"], stats["high_water_mark"]) == (4, 7, "20")
+    assert not (tmp_path / "out.checkpoint.json").exists()
+    assert not (tmp_path / "out.partial.jsonl").exists()
+
+
+def test_pull_pages_restarts_from_a_stale_checkpoint(monkeypatch, tmp_path, capsys):
+    """A checkpoint older than CHECKPOINT_MAX_AGE_S is not resumed from."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [3], 2: [2], 3: [1]}, fetched))
+    monkeypatch.setattr(scrape, "scrape_data", _crash_on_page([2]))
+    monkeypatch.setattr(scrape, "CHECKPOINT_MAX_AGE_S", 60)
+    with pytest.raises(RuntimeError):
+        scrape.pull_pages(target_n=3, rate_limit=0, resume=True)
+
+    saved_at = time.time()
+    monkeypatch.setattr(scrape.time, "time", lambda: saved_at + 61)
+    fetched.clear()
+    scrape.pull_pages(target_n=3, rate_limit=0, resume=True)
+
+    assert fetched[0] == 1
+    assert "limit 60s); starting over" in capsys.readouterr().out
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        assert [row["url"][-1] for row in json.load(handle)] == ["3", "2", "1"]
+
+
+def test_pull_pages_refetches_page_missing_from_checkpoint(monkeypatch, tmp_path):
+    """A page spooled but not checkpointed is cut off and fetched once more."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [3], 2: [2], 3: [1]}, fetched))
+    monkeypatch.setattr(scrape, "scrape_data", _fake_url_records)
+    original_save = scrape_output.Checkpoint.save
+
+    def crash_after_page_one(self, **state):
+        if state["last_page"] == 2:
+            raise OSError("disk full")
+        original_save(self, **state)
+
+    monkeypatch.setattr(scrape_output.Checkpoint, "save", crash_after_page_one)
+    with pytest.raises(OSError):
+        scrape.pull_pages(target_n=3, rate_limit=0, resume=True)
+    monkeypatch.setattr(scrape_output.Checkpoint, "save", original_save)
+
+    fetched.clear()
+    scrape.pull_pages(target_n=3, rate_limit=0, resume=True)
+
+    assert fetched == [2, 3]
+    with open(tmp_path / "out.json", "r", encoding="utf-8") as handle:
+        assert [row["url"][-1] for row in json.load(handle)] == ["3", "2", "1"]
+
+
+def test_pull_pages_ignores_unusable_checkpoints(monkeypatch, tmp_path, capsys):
+    """Mismatched runs, lost spools and non-resume pulls start from scratch."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    fetched = []
+    monkeypatch.setattr(scrape, "check_url", _fake_result_pages({1: [3], 2: [2]}, fetched))
+    monkeypatch.setattr(scrape, "scrape_data", _crash_on_page([2]))
+
+    with pytest.raises(RuntimeError):
+        scrape.pull_pages(target_n=2, rate_limit=0, resume=True)
+
+    # Different parameters: the checkpoint belongs to another run
+    fetched.clear()
+    monkeypatch.setattr(scrape, "scrape_data", _crash_on_page([2]))
+    with pytest.raises(RuntimeError):
+        scrape.pull_pages(target_n=5, rate_limit=0, resume=True)
+    assert fetched[0] == 1
+
+    # Same parameters but the spool is gone
+    (tmp_path / "out.partial.jsonl").unlink()
+    fetched.clear()
+    monkeypatch.setattr(scrape, "scrape_data", _fake_url_records)
+    scrape.pull_pages(target_n=5, rate_limit=0, resume=True)
+    assert fetched[0] == 1
+    assert "does not match the saved pages" in capsys.readouterr().out
+
+    # Without resume a leftover checkpoint is never consulted
+    scrape_output.Checkpoint(str(tmp_path / "out.checkpoint.json"), {}).save(
+        last_page=1, rows=1, offset=0, high_water_mark=None
+    )
+    fetched.clear()
+    scrape.pull_pages(target_n=5, rate_limit=0)
+    assert fetched[0] == 1
+
+
+def test_pull_pages_rejects_unknown_output_format(monkeypatch):
+    """An unsupported output format fails before any page is fetched."""
+    monkeypatch.setattr(scrape, "url_check", lambda: pytest.fail("should not fetch"))
+    with pytest.raises(ValueError, match="Unknown output format"):
+        scrape.pull_pages(target_n=1, output_format="xml")
+
+
 def test_main_calls_pull_pages(monkeypatch):
     """main() calls pull_pages() with the default target."""
     called = {}
 
-    def fake_pull_pages(target_n=50, start_page=1):
+    def fake_pull_pages(target_n=50, start_page=1, **kwargs):
         called["target_n"] = target_n
+        called["cache"] = kwargs.get("cache")
 
     monkeypatch.setattr(scrape, "pull_pages", fake_pull_pages)
+    monkeypatch.setattr(scrape, "CACHE_DIR", "")
     scrape.main()
     assert called["target_n"] == 500
+    assert called["cache"] is None
+
+
+def test_main_offline_cli_uses_cache(monkeypatch, tmp_path):
+    """--offline replays pages from --cache-dir."""
+    called = {}
+
+    def fake_pull_pages(target_n=50, start_page=1, **kwargs):
+        called.update(kwargs, target_n=target_n, start_page=start_page)
+
+    monkeypatch.setattr(scrape, "pull_pages", fake_pull_pages)
+    scrape.main(
+        [
+            "--target-n", "20", "--start-page", "3", "--since", "42",
+            "--cache-dir", str(tmp_path), "--offline", "--output-format", "jsonl", "--resume",
+        ]
+    )
+    assert called["target_n"] == 20
+    assert called["output_format"] == "jsonl"
+    assert called["resume"] is True
+    assert called["since"] == "42"
+    assert called["start_page"] == 3
+    assert called["cache"].offline is True
+    assert called["cache"].directory == str(tmp_path)
+
+
+def test_main_offline_requires_cache_dir(monkeypatch):
+    """--offline without a cache directory is a usage error."""
+    monkeypatch.setattr(scrape, "CACHE_DIR", "")
+    with pytest.raises(SystemExit) as exc_info:
+        scrape.main(["--offline"])
+    assert exc_info.value.code == 2
 
 
 def test_main_guard_executes():
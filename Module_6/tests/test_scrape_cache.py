@@ -0,0 +1,74 @@
+"""Tests for the on-disk survey page cache."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape_cache
+
+pytestmark = pytest.mark.web
+
+
+def test_page_cache_round_trip_and_validators(tmp_path):
+    """PageCache stores records and validators and reloads them from disk."""
+    cache = scrape_cache.PageCache(str(tmp_path))
+    url = "https://example.com/survey/"
+    assert cache.validators(url) == {}
+    assert cache.records(url) is None
+
+    headers = {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+    cache.store(url, headers, b"<html></html>", [{"url": "u1"}])
+    cache.flush()
+
+    reloaded = scrape_cache.PageCache(str(tmp_path))
+    assert reloaded.records(url) == [{"url": "u1"}]
+    assert reloaded.validators(url) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Mon, 01 Jan 2026 00:00:00 GMT",
+    }
+
+
+def test_page_cache_evicts_least_recently_used(tmp_path):
+    """Entries beyond max_bytes are evicted oldest-use first."""
+    cache = scrape_cache.PageCache(str(tmp_path), max_bytes=250)
+    cache.store("a", {}, b"x" * 100, [])
+    cache.store("b", {}, b"y" * 100, [])
+    assert cache.records("a") == []
+    cache.store("c", {}, b"z" * 100, [])
+
+    assert cache.records("b") is None
+    assert cache.records("a") == []
+    assert cache.records("c") == []
+    assert len(list(tmp_path.glob("*.html"))) == 2
+
+
+def test_page_cache_tolerates_corrupt_index_and_missing_files(tmp_path):
+    """A corrupt index starts empty; missing entry files count as misses."""
+    (tmp_path / scrape_cache.PageCache.INDEX_NAME).write_text("{not json", encoding="utf-8")
+    cache = scrape_cache.PageCache(str(tmp_path))
+    assert cache.records("a") is None
+
+    cache.store("a", {}, b"body", [{"row": 1}])
+    for path in tmp_path.glob("*.json"):
+        if path.name != scrape_cache.PageCache.INDEX_NAME:
+            path.unlink()
+    assert cache.records("a") is None
+    assert cache.validators("a") == {}
+
+    (tmp_path / scrape_cache.PageCache.INDEX_NAME).write_text("[]", encoding="utf-8")
+    assert scrape_cache.PageCache(str(tmp_path)).records("a") is None
+
+
+def test_page_cache_eviction_ignores_already_deleted_files(tmp_path):
+    """Eviction does not fail when an entry's files were removed externally."""
+    cache = scrape_cache.PageCache(str(tmp_path), max_bytes=10)
+    cache.store("a", {}, b"x" * 5, [])
+    for path in tmp_path.glob("*.html"):
+        path.unlink()
+    cache.store("b", {}, b"y" * 20, [])
+    assert cache.records("a") is None
@@ -0,0 +1,194 @@
+"""Tests for the keep-alive HTTP client used by the scraper."""
+
+import ssl
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape_http
+
+pytestmark = pytest.mark.web
+
+
+class FakeHTTPResponse:
+    """Minimal http.client response double for HttpSession tests."""
+
+    def __init__(self, status=200, body=b"", headers=None, will_close=False):
+        self.status = status
+        self.headers = headers or {}
+        self.will_close = will_close
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+class FakeConnection:
+    """Connection double that replays queued responses or errors."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.closed = False
+
+    def request(self, method, path, headers=None):
+        self.requests.append((method, path, dict(headers or {})))
+
+    def getresponse(self):
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def close(self):
+        self.closed = True
+
+
+def _patch_connections(monkeypatch, connections):
+    """Make HttpSession hand out the given fake connections in order."""
+    opened = []
+
+    def fake_new_connection(scheme, host, port, _ssl_context_factory):
+        conn = connections.pop(0)
+        opened.append((scheme, host, port, conn))
+        return conn
+
+    monkeypatch.setattr(scrape_http, "_new_connection", fake_new_connection)
+    return opened
+
+
+def test_http_session_reuses_connection_and_decodes_gzip(monkeypatch):
+    """HttpSession keeps connections alive across requests and gunzips bodies."""
+    html = b"<table>" + b"x" * 2000 + b"</table>"
+    conn = FakeConnection(
+        [
+            FakeHTTPResponse(body=scrape_http.gzip.compress(html), headers={"Content-Encoding": "gzip"}),
+            FakeHTTPResponse(body=b"plain"),
+        ]
+    )
+    opened = _patch_connections(monkeypatch, [conn])
+    session = scrape_http.HttpSession("agent", lambda: None)
+
+    first = session.get("https://example.com/survey/?page=2")
+    second = session.get("https://example.com/survey/")
+
+    assert first.body == html
+    assert second.body == b"plain"
+    assert len(opened) == 1
+    assert opened[0][:3] == ("https", "example.com", 443)
+    assert conn.requests[0][1] == "/survey/?page=2"
+    assert "gzip" in conn.requests[0][2]["Accept-Encoding"]
+    assert session.stats["reused"] == 1
+    assert session.stats["wire_bytes"] < session.stats["body_bytes"]
+
+
+def test_http_session_retries_stale_pooled_connection(monkeypatch):
+    """A dead keep-alive socket is replaced by a fresh connection once."""
+    stale = FakeConnection(
+        [FakeHTTPResponse(body=b"one"), scrape_http.http.client.RemoteDisconnected("gone")]
+    )
+    fresh = FakeConnection([FakeHTTPResponse(body=b"two", will_close=True)])
+    _patch_connections(monkeypatch, [stale, fresh])
+    session = scrape_http.HttpSession("agent", lambda: None)
+
+    assert session.get("http://example.com/a").body == b"one"
+    assert session.get("http://example.com/b").body == b"two"
+    assert stale.closed is True
+    assert fresh.closed is True
+
+
+def test_http_session_wraps_transport_errors(monkeypatch):
+    """Errors on a fresh connection surface as URLError."""
+    _patch_connections(monkeypatch, [FakeConnection([OSError("refused")])])
+    with pytest.raises(scrape_http.error.URLError):
+        scrape_http.HttpSession("agent", lambda: None).get("http://example.com/")
+
+
+def test_http_session_follows_redirects_and_raises_http_errors(monkeypatch):
+    """Redirects are followed and 4xx responses raise HTTPError."""
+    conn = FakeConnection(
+        [
+            FakeHTTPResponse(status=301, headers={"Location": "/moved"}),
+            FakeHTTPResponse(status=404, body=b"missing"),
+        ]
+    )
+    _patch_connections(monkeypatch, [conn])
+
+    with pytest.raises(scrape_http.error.HTTPError) as exc_info:
+        scrape_http.HttpSession("agent", lambda: None).get("https://example.com/old")
+    assert exc_info.value.code == 404
+    assert conn.requests[1][1] == "/moved"
+
+
+def test_http_session_too_many_redirects(monkeypatch):
+    """Redirect loops stop after HTTP_MAX_REDIRECTS hops."""
+    monkeypatch.setattr(scrape_http, "HTTP_MAX_REDIRECTS", 1)
+    conn = FakeConnection(
+        [FakeHTTPResponse(status=302, headers={"Location": "/loop"}) for _ in range(2)]
+    )
+    _patch_connections(monkeypatch, [conn])
+    with pytest.raises(scrape_http.error.URLError, match="too many redirects"):
+        scrape_http.HttpSession("agent", lambda: None).get("https://example.com/loop")
+
+
+def test_http_session_rejects_corrupt_encoded_body(monkeypatch):
+    """Undecodable compressed bodies raise URLError."""
+    conn = FakeConnection(
+        [FakeHTTPResponse(body=b"not gzip", headers={"Content-Encoding": "gzip"})]
+    )
+    _patch_connections(monkeypatch, [conn])
+    with pytest.raises(scrape_http.error.URLError, match="could not decode"):
+        scrape_http.HttpSession("agent", lambda: None).get("https://example.com/")
+
+
+def test_http_session_pool_limit_and_close(monkeypatch):
+    """Idle connections beyond the per-host limit are closed; close() drains the pool."""
+    session = scrape_http.HttpSession("agent", lambda: None, max_idle_per_host=1)
+    key = ("https", "example.com", 443)
+    first = FakeConnection([])
+    second = FakeConnection([])
+    session._checkin(key, first)
+    session._checkin(key, second)
+    assert second.closed is True
+    assert first.closed is False
+
+    session.close()
+    assert first.closed is True
+
+
+def test_decode_body_deflate_variants():
+    """_decode_body handles zlib-wrapped and raw deflate streams."""
+    data = b"hello deflate"
+    raw = scrape_http.zlib.compressobj(wbits=-scrape_http.zlib.MAX_WBITS)
+    raw_stream = raw.compress(data) + raw.flush()
+    assert scrape_http._decode_body(scrape_http.zlib.compress(data), "deflate") == data
+    assert scrape_http._decode_body(raw_stream, "deflate") == data
+    assert scrape_http._decode_body(data, None) == data
+
+
+def test_decode_body_brotli_when_available(monkeypatch):
+    """_decode_body uses the optional brotli module for ``br`` bodies."""
+    fake_brotli = type("FakeBrotli", (), {"decompress": staticmethod(lambda b: b[::-1])})
+    monkeypatch.setattr(scrape_http, "brotli", fake_brotli)
+    assert scrape_http._decode_body(b"cba", "br") == b"abc"
+
+
+def test_new_connection_picks_transport_by_scheme():
+    """HTTPS connections get the session's SSL context; HTTP needs none."""
+    contexts = []
+
+    def factory():
+        contexts.append(ssl.create_default_context())
+        return contexts[-1]
+
+    https_conn = scrape_http._new_connection("https", "example.com", 443, factory)
+    http_conn = scrape_http._new_connection("http", "example.com", 80, factory)
+
+    assert isinstance(https_conn, scrape_http.http.client.HTTPSConnection)
+    assert not isinstance(http_conn, scrape_http.http.client.HTTPSConnection)
+    assert len(contexts) == 1
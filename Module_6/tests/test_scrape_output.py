@@ -0,0 +1,137 @@
+"""Tests for the durable scrape output writers."""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape_output
+
+pytestmark = pytest.mark.web
+
+RECORDS = [
+    {"university": "Café U", "gpa": None, "nested": {"a": [1, 2], "b": {}}, "empty": []},
+    {"university": "Line\nBreak", "tags": ["x"]},
+]
+
+
+@pytest.mark.parametrize("records", [RECORDS, [], [{}]])
+def test_json_format_is_byte_identical_to_json_dump(tmp_path, records):
+    """The streamed json writer matches json.dump(indent=2) exactly."""
+    path = tmp_path / "out.json"
+    scrape_output.write_records(iter(records), str(path), "json")
+    assert path.read_text(encoding="utf-8") == json.dumps(records, indent=2)
+    assert not (tmp_path / "out.json.tmp").exists()
+
+
+def test_compact_and_jsonl_formats(tmp_path):
+    """Compact arrays have no whitespace; JSONL has one record per line."""
+    compact = tmp_path / "out.min.json"
+    scrape_output.write_records(iter(RECORDS), str(compact), "json-compact")
+    assert compact.read_text(encoding="utf-8") == json.dumps(RECORDS, separators=(",", ":"))
+
+    lines = tmp_path / "out.jsonl"
+    scrape_output.write_records(iter(RECORDS), str(lines), "jsonl")
+    assert [json.loads(line) for line in lines.read_text(encoding="utf-8").splitlines()] == RECORDS
+
+
+def test_write_records_rejects_unknown_format(tmp_path):
+    """Unknown formats raise before any file is created."""
+    with pytest.raises(ValueError, match="Unknown output format"):
+        scrape_output.write_records([], str(tmp_path / "out"), "csv")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_page_spool_appends_and_replays_pages(tmp_path):
+    """Appended pages are replayed in order and counted."""
+    path = tmp_path / "spool.jsonl"
+    spool = scrape_output.PageSpool(str(path))
+    spool.append(1, RECORDS[:1])
+    spool.append(2, RECORDS[1:])
+    assert (spool.pages, spool.rows, spool.last_page) == (2, 2, 2)
+    spool.close()
+    assert list(spool.iter_records()) == RECORDS
+
+    fresh = scrape_output.PageSpool(str(path))
+    assert path.read_bytes() == b""
+    fresh.discard()
+    assert not path.exists()
+
+
+def test_page_spool_resume_truncates_torn_tail(tmp_path):
+    """Resuming keeps intact pages and drops a torn or corrupt tail."""
+    path = tmp_path / "spool.jsonl"
+    spool = scrape_output.PageSpool(str(path))
+    spool.append(3, [{"id": 1}, {"id": 2}])
+    spool.append(4, [{"id": 3}])
+    spool.close()
+    intact = path.read_bytes()
+
+    with open(path, "ab") as handle:
+        handle.write(b'{"page": 5, "records": [{"id"')
+    resumed = scrape_output.PageSpool(str(path), resume=True)
+    assert (resumed.pages, resumed.rows, resumed.last_page) == (2, 3, 4)
+    assert path.read_bytes() == intact
+    resumed.append(5, [{"id": 4}])
+    resumed.close()
+    assert [row["id"] for row in resumed.iter_records()] == [1, 2, 3, 4]
+
+    with open(path, "ab") as handle:
+        handle.write(b"not json\n")
+    again = scrape_output.PageSpool(str(path), resume=True)
+    assert (again.pages, again.last_page) == (3, 5)
+    again.close()
+
+
+def test_page_spool_resume_without_file_starts_empty(tmp_path):
+    """Resuming a missing spool starts a new one."""
+    spool = scrape_output.PageSpool(str(tmp_path / "missing.jsonl"), resume=True)
+    assert (spool.pages, spool.rows, spool.last_page) == (0, 0, None)
+    spool.close()
+
+
+def test_page_spool_resume_cuts_back_to_offset(tmp_path):
+    """A checkpointed offset drops pages written after the checkpoint."""
+    path = tmp_path / "spool.jsonl"
+    spool = scrape_output.PageSpool(str(path))
+    spool.append(1, [{"id": 1}])
+    offset = spool.offset
+    spool.append(2, [{"id": 2}])
+    spool.close()
+
+    resumed = scrape_output.PageSpool(str(path), resume=True, offset=offset)
+    assert (resumed.pages, resumed.rows, resumed.last_page) == (1, 1, 1)
+    assert resumed.offset == offset
+    resumed.close()
+
+
+def test_checkpoint_round_trip_and_run_matching(tmp_path):
+    """Checkpoints load only for the same run and tolerate bad files."""
+    path = tmp_path / "pull.checkpoint.json"
+    checkpoint = scrape_output.Checkpoint(str(path), {"start_page": 1, "target_n": 5})
+    assert checkpoint.load() is None
+
+    before = time.time()
+    checkpoint.save(last_page=3, rows=4, offset=120, high_water_mark=99)
+    state = checkpoint.load()
+    assert before <= state.pop("saved_at") <= time.time()
+    assert state == {
+        "run": {"start_page": 1, "target_n": 5},
+        "last_page": 3, "rows": 4, "offset": 120, "high_water_mark": 99,
+    }
+    assert scrape_output.Checkpoint(str(path), {"start_page": 2}).load() is None
+
+    path.write_text("[1, 2]", encoding="utf-8")
+    assert checkpoint.load() is None
+    path.write_text("{torn", encoding="utf-8")
+    assert checkpoint.load() is None
+
+    checkpoint.clear()
+    checkpoint.clear()
+    assert not path.exists()
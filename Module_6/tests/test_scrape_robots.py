@@ -0,0 +1,107 @@
+"""Tests for the cached robots.txt policy."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape_robots
+
+pytestmark = pytest.mark.web
+
+ROBOTS_URL = "https://www.thegradcafe.com/robots.txt"
+
+
+def _policy(text, status=200):
+    return scrape_robots.RobotsPolicy.from_entry(
+        {"url": ROBOTS_URL, "status": status, "text": text}
+    )
+
+
+def test_policy_memoizes_decisions(monkeypatch):
+    """Each (agent, URL) decision is computed once."""
+    policy = _policy("User-agent: *\nDisallow: /admin\n")
+    calls = []
+    real = scrape_robots.robotparser.RobotFileParser.can_fetch
+
+    def counting(self, useragent, url):
+        calls.append(url)
+        return real(self, useragent, url)
+
+    monkeypatch.setattr(scrape_robots.robotparser.RobotFileParser, "can_fetch", counting)
+    for _ in range(3):
+        assert policy.can_fetch("zhang", "https://www.thegradcafe.com/survey/") is True
+        assert policy.can_fetch("zhang", "https://www.thegradcafe.com/admin/") is False
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("User-agent: *\nCrawl-delay: 5\nRequest-rate: 1/1\n", 0.2),
+        ("User-agent: *\nCrawl-delay: 0\n", None),
+        ("User-agent: *\nCrawl-delay: 0\nRequest-rate: 1/2\n", 0.5),
+        ("User-agent: *\nRequest-rate: 3/60\n", 0.05),
+        ("User-agent: *\nRequest-rate: 3/0\n", None),
+        ("User-agent: *\nDisallow:\n", None),
+    ],
+)
+def test_request_rate_limit(text, expected):
+    """Crawl-delay wins over Request-rate; absent or zero pacing yields None."""
+    assert _policy(text).request_rate_limit("zhang") == expected
+
+
+@pytest.mark.parametrize(("status", "expected"), [(401, False), (404, True), (503, False)])
+def test_error_statuses_match_stdlib(status, expected):
+    """Error replies decide like RobotFileParser.read(); 5xx disallows."""
+    assert _policy("", status).can_fetch("zhang", ROBOTS_URL) is expected
+
+
+def test_cache_skips_server_errors(tmp_path):
+    """A 5xx reply is returned but not stored."""
+    path = tmp_path / "robots.json"
+    cache = scrape_robots.RobotsCache(str(path), ttl=60)
+    assert cache.store(ROBOTS_URL, 503, "")["status"] == 503
+    assert not path.exists()
+    cache.store(ROBOTS_URL, 404, "")
+    assert cache.load(ROBOTS_URL)["status"] == 404
+
+
+def test_cache_round_trip_and_expiry(monkeypatch, tmp_path):
+    """Entries load for the same URL until the TTL runs out."""
+    path = tmp_path / "robots.json"
+    cache = scrape_robots.RobotsCache(str(path), ttl=60)
+    assert cache.load(ROBOTS_URL) is None
+
+    now = {"t": 1000.0}
+    monkeypatch.setattr(scrape_robots.time, "time", lambda: now["t"])
+    entry = cache.store(ROBOTS_URL, 200, "User-agent: *\n")
+    assert cache.load(ROBOTS_URL) == entry
+    assert cache.load("https://other.example/robots.txt") is None
+
+    now["t"] = 1060.0
+    assert cache.load(ROBOTS_URL) is None
+    now["t"] = 900.0
+    assert cache.load(ROBOTS_URL) is None
+
+
+def test_cache_ignores_corrupt_files_and_disabled_ttl(monkeypatch, tmp_path):
+    """Corrupt files are misses; a zero TTL neither reads nor writes."""
+    path = tmp_path / "robots.json"
+    path.write_text("[1]", encoding="utf-8")
+    assert scrape_robots.RobotsCache(str(path), ttl=60).load(ROBOTS_URL) is None
+    path.write_text("{torn", encoding="utf-8")
+    assert scrape_robots.RobotsCache(str(path), ttl=60).load(ROBOTS_URL) is None
+
+    path.unlink()
+    monkeypatch.setattr(scrape_robots, "ROBOTS_TTL", 0)
+    disabled = scrape_robots.RobotsCache(str(path))
+    assert disabled.store(ROBOTS_URL, 200, "")["status"] == 200
+    assert not path.exists()
+    path.write_text(json.dumps({"url": ROBOTS_URL, "fetched_at": 0}), encoding="utf-8")
+    assert disabled.load(ROBOTS_URL) is None
@@ -0,0 +1,204 @@
+"""Tests for sharded multi-process scraping."""
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape, scrape_shards
+
+pytestmark = pytest.mark.web
+
+
+def _fake_site(monkeypatch, pages):
+    """Serve ``pages`` (page number -> result IDs) through check_url/scrape_data."""
+    fetched = []
+
+    def fake_check_url(page_url, _parser):
+        page = 1 if page_url.endswith("/survey/") else int(page_url.rsplit("=", 1)[1])
+        fetched.append(page)
+        return pages.get(page)
+
+    monkeypatch.setattr(scrape, "url_check", lambda: object())
+    monkeypatch.setattr(scrape, "check_url", fake_check_url)
+    monkeypatch.setattr(
+        scrape,
+        "scrape_data",
+        lambda ids: [{"url": f"https://www.thegradcafe.com/result/{i}" if i else None} for i in ids],
+    )
+    return fetched
+
+
+def _read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_partition_pages_splits_contiguous_ranges():
+    """Ranges cover the span in order with sizes differing by at most one."""
+    assert scrape_shards.partition_pages(1, 10, 3) == [(1, 4), (5, 7), (8, 10)]
+    assert scrape_shards.partition_pages(5, 6, 8) == [(5, 5), (6, 6)]
+    assert scrape_shards.partition_pages(3, 3, 0) == [(3, 3)]
+    with pytest.raises(ValueError, match="Empty page range"):
+        scrape_shards.partition_pages(5, 4, 2)
+
+
+def test_scrape_shard_writes_jsonl_and_stops_at_end(monkeypatch, tmp_path):
+    """A shard writes one record per line and stops at the first empty page."""
+    fetched = _fake_site(monkeypatch, {2: [20, 19], 3: [18], 4: []})
+
+    stats = scrape_shards.scrape_shard(1, (2, 6), 0, str(tmp_path))
+
+    assert fetched == [2, 3, 4]
+    assert stats == {
+        "index": 1, "path": str(tmp_path / "shard-001.jsonl"), "pages": 2, "rows": 3, "failed": [],
+    }
+    assert [row["url"][-2:] for row in _read_jsonl(stats["path"])] == ["20", "19", "18"]
+
+
+def test_scrape_shard_records_failed_pages_and_keeps_going(monkeypatch, tmp_path):
+    """A page that cannot be fetched is recorded as a gap, not the end of the shard."""
+    fetched = _fake_site(monkeypatch, {2: [20], 5: [17], 6: [16], 8: [14]})
+
+    stats = scrape_shards.scrape_shard(0, (2, 8), 0, str(tmp_path))
+
+    assert fetched == [2, 3, 4, 5, 6, 7, 8]
+    assert stats["failed"] == [[3, 4], [7, 7]]
+    assert (stats["pages"], stats["rows"]) == (4, 4)
+
+
+def test_run_sharded_retries_mid_shard_failures(monkeypatch, tmp_path, capsys):
+    """Failed pages are retried once; the rest of the range is still scraped."""
+    pages = {1: [9], 3: [7], 4: [6], 5: []}
+    fetched = _fake_site(monkeypatch, pages)
+    real_check_url = scrape.check_url
+
+    def flaky_check_url(page_url, parser):
+        soup = real_check_url(page_url, parser)
+        if fetched.count(2) == 1:
+            pages[2] = [8]  # page 2 fails once, then recovers
+        return soup
+
+    monkeypatch.setattr(scrape, "check_url", flaky_check_url)
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape_shards, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(scrape_shards.scrape_output, "OUTPUT_FORMAT", "jsonl")
+
+    stats = scrape_shards.run_sharded(1, 5, processes=1, rate_limit=0)
+
+    assert fetched == [1, 2, 3, 4, 5, 2]
+    assert stats["failed"] == []
+    assert stats["shards"][0]["failed"] == [[2, 2]]
+    assert stats["shards"][1]["path"].endswith("shard-001.jsonl")
+    assert [row["url"][-1] for row in _read_jsonl(stats["output"])] == ["9", "7", "6", "8"]
+
+    pages.clear()
+    stats = scrape_shards.run_sharded(1, 2, processes=1, rate_limit=0)
+    assert stats["failed"] == [[1, 2]]
+    assert "pages 1-2 failed twice" in capsys.readouterr().out
+
+
+def test_merge_shards_dedupes_by_url(tmp_path):
+    """Repeated URLs across shards are dropped; URL-less rows are kept."""
+    first = tmp_path / "a.jsonl"
+    second = tmp_path / "b.jsonl"
+    first.write_text('{"url": "u1"}\n{"url": null}\n{"url": "u2"}\n', encoding="utf-8")
+    second.write_text('{"url": "u2"}\n{"url": null}\n{"url": "u3"}\n', encoding="utf-8")
+
+    output = tmp_path / "merged.json"
+    rows = scrape_shards.merge_shards([str(first), str(second)], str(output), "json")
+
+    assert rows == 5
+    with open(output, "r", encoding="utf-8") as handle:
+        assert [row["url"] for row in json.load(handle)] == ["u1", None, "u2", None, "u3"]
+
+
+def test_run_sharded_splits_rate_and_merges(monkeypatch, tmp_path, capsys):
+    """Each shard gets an equal share of the global rate and results merge in order."""
+    pages = {1: [9, 8], 2: [8, 7], 3: [6], 4: [5], 5: [4]}
+    fetched = _fake_site(monkeypatch, pages)
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape_shards, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(scrape_shards.scrape_output, "OUTPUT_FORMAT", "jsonl")
+    rates, starts = [], []
+    real_limiter = scrape.RateLimiter
+
+    def recording_limiter(rate, burst=1, tokens=None):
+        rates.append(rate)
+        starts.append(tokens)
+        return real_limiter(0, burst)
+
+    monkeypatch.setattr(scrape, "RateLimiter", recording_limiter)
+
+    stats = scrape_shards.run_sharded(1, 5, processes=2, rate_limit=3.0)
+
+    assert sorted(fetched) == [1, 2, 3, 4, 5]
+    assert rates == [1.5, 1.5]
+    assert sorted(starts) == [0.5, 1.0]
+    assert stats["output"] == str(tmp_path / "out.json")
+    assert (stats["pages"], stats["rows"], stats["duplicates"]) == (5, 6, 1)
+    assert [shard["path"] for shard in stats["shards"]] == [
+        str(tmp_path / "out.shards" / "shard-000.jsonl"),
+        str(tmp_path / "out.shards" / "shard-001.jsonl"),
+    ]
+    assert [row["url"][-1] for row in _read_jsonl(stats["output"])] == ["9", "8", "7", "6", "5", "4"]
+    assert "1 duplicates dropped" in capsys.readouterr().out
+
+
+def test_run_sharded_defaults(monkeypatch, tmp_path):
+    """Process count and global rate fall back to module settings."""
+    monkeypatch.setattr(scrape, "OUTPUT_FILE", str(tmp_path / "out.json"))
+    monkeypatch.setattr(scrape, "RATE_LIMIT_PER_SEC", 0.5)
+    monkeypatch.setattr(scrape, "url_check", lambda: None)
+    monkeypatch.setattr(scrape_shards, "SHARD_PROCESSES", 1)
+    monkeypatch.setattr(scrape_shards, "ProcessPoolExecutor", ThreadPoolExecutor)
+    calls = []
+
+    def fake_shard(index, page_range, rate_limit, shard_dir, tokens=1.0):
+        calls.append((index, page_range, rate_limit, tokens))
+        path = scrape_shards.shard_path(shard_dir, index)
+        Path(path).write_text("", encoding="utf-8")
+        return {"index": index, "path": path, "pages": 0, "rows": 0, "failed": []}
+
+    monkeypatch.setattr(scrape_shards, "scrape_shard", fake_shard)
+    stats = scrape_shards.run_sharded(1, 3, shard_dir=str(tmp_path / "shards"))
+
+    assert calls == [(0, (1, 3), 0.5, 1.0)]
+    assert stats["rows"] == 0
+
+
+def test_main_parses_arguments(monkeypatch):
+    """main() forwards CLI options to run_sharded()."""
+    called = {}
+
+    def fake_run(start_page, end_page, **kwargs):
+        called.update(kwargs, start_page=start_page, end_page=end_page)
+
+    monkeypatch.setattr(scrape_shards, "run_sharded", fake_run)
+    scrape_shards.main(
+        ["--start-page", "10", "--end-page", "90", "--processes", "8", "--rate-limit", "2"]
+    )
+    assert called == {
+        "start_page": 10, "end_page": 90, "processes": 8, "rate_limit": 2.0, "shard_dir": None,
+    }
+
+
+def test_main_guard_executes():
+    """__main__ guard invokes main() with the CLI arguments."""
+    target_path = scrape_shards.__file__
+    with open(target_path, "r", encoding="utf-8") as handle:
+        lines = handle.readlines()
+    guard_line = next(
+        i for i, line in enumerate(lines, 1) if 'if __name__ == "__main__":' in line
+    )
+    called = {}
+    code = "\n" * guard_line + "main(sys.argv[1:])\n"
+    fake_sys = type("FakeSys", (), {"argv": ["scrape_shards.py", "--end-page", "3"]})
+    exec(compile(code, target_path, "exec"), {"main": lambda argv: called.update(argv=argv), "sys": fake_sys})
+    assert called["argv"] == ["--end-page", "3"]
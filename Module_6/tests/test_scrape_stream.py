@@ -0,0 +1,132 @@
+"""Tests for the pluggable HTML parser backends used by the scraper."""
+
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src import scrape, scrape_stream
+
+pytestmark = pytest.mark.web
+
+CORPUS_DIR = Path(__file__).resolve().parent / "data" / "scrape_pages"
+CORPUS = sorted(CORPUS_DIR.glob("*.html"))
+BACKENDS = [
+    "stream",
+    pytest.param(
+        "lxml",
+        marks=pytest.mark.skipif(
+            importlib.util.find_spec("lxml") is None, reason="lxml not installed"
+        ),
+    ),
+]
+
+
+@pytest.mark.parametrize("page", CORPUS, ids=lambda path: path.stem)
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_match_html_parser_records(page, backend):
+    """Every backend yields byte-identical records to the default parser."""
+    html = page.read_text(encoding="utf-8")
+    expected = json.dumps(scrape.parse_html(html, "html.parser"), indent=2)
+    assert json.dumps(scrape.parse_html(html, backend), indent=2) == expected
+
+
+@pytest.mark.parametrize("page", CORPUS, ids=lambda path: path.stem)
+def test_stream_rows_match_beautifulsoup_text(page):
+    """Row text, with and without stripping, matches BeautifulSoup exactly."""
+    html = page.read_text(encoding="utf-8")
+
+    def row_text(document):
+        table = document.find("table")
+        tbody = table.find("tbody") if table else None
+        rows = tbody.find_all("tr") if tbody else []
+        return [(row.get_text("|", strip=True), row.get_text()) for row in rows]
+
+    expected = row_text(scrape.make_soup(html, "html.parser"))
+    assert row_text(scrape.make_soup(html, "stream")) == expected
+
+
+def test_corpus_survey_page_parses_expected_records():
+    """The realistic corpus page exercises main, detail and comment rows."""
+    html = (CORPUS_DIR / "survey_page.html").read_text(encoding="utf-8")
+    records = scrape.parse_html(html, "stream")
+    assert len(records) == 5
+    first = records[0]
+    assert first["university"] == "Johns Hopkins University"
+    assert first["masters_or_phd"] == "PhD"
+    assert first["url"] == "https://www.thegradcafe.com/result/991234"
+    assert first["gre_aw"] == "GRE AW 4.5"
+    assert first["comments"].startswith("Got the email at 9pm — so happy!")
+    assert records[2]["url"].endswith("/result/991232")
+
+
+def test_make_soup_uses_configured_backend(monkeypatch):
+    """make_soup falls back to PARSER_BACKEND and rejects unknown names."""
+    monkeypatch.setattr(scrape, "PARSER_BACKEND", "stream")
+    document = scrape.make_soup("<table><tbody><tr></tr></tbody></table>")
+    assert isinstance(document, scrape_stream.StreamElement)
+
+    with pytest.raises(ValueError, match="Unknown parser backend"):
+        scrape.make_soup("<p></p>", backend="html5lib")
+
+
+def test_check_url_parses_with_stream_backend(monkeypatch):
+    """check_url hands fetched HTML to the configured backend."""
+
+    class Session:
+        def get(self, _url):
+            body = (CORPUS_DIR / "survey_page.html").read_bytes()
+            return scrape.HttpResponse(200, {}, body, "https://example.com/")
+
+    class AllowAll:
+        def can_fetch(self, _agent, _url):
+            return True
+
+    monkeypatch.setattr(scrape, "HTTP_SESSION", Session())
+    monkeypatch.setattr(scrape, "PARSER_BACKEND", "stream")
+    document = scrape.check_url("https://example.com/", AllowAll())
+    assert isinstance(document, scrape_stream.StreamElement)
+    assert len(scrape.scrape_data(document)) == 5
+
+
+def test_stream_element_lookup_helpers():
+    """Attribute filters, item access and string containers behave like bs4."""
+    document = scrape_stream.parse_document(
+        "<table><tbody><tr><td class='a' data-x>one<script>s()</script></td>"
+        "<td class='b'>two</td></tr></tbody></table>"
+    )
+    tbody = document.find("tbody")
+    assert repr(tbody) == "<StreamElement tbody>"
+    cells = tbody.find_all("td", **{"class": "b"})
+    assert [cell.get_text() for cell in cells] == ["two"]
+    first = tbody.find("td")
+    assert first["class"] == "a"
+    assert first.get("data-x") == ""
+    assert first.get("missing", "d") == "d"
+    assert first.find("span") is None
+    assert first.get_text() == "one"
+    assert first.find("script").get_text() == "s()"
+
+
+def test_stream_numeric_references_follow_beautifulsoup():
+    """Malformed numeric references keep their trailing data."""
+    assert scrape_stream._numeric_reference("65") == ("A", "")
+    assert scrape_stream._numeric_reference("x41") == ("A", "")
+    assert scrape_stream._numeric_reference("65abc") == ("A", "abc")
+    assert scrape_stream._numeric_reference("xzz") == ("", "zz")
+    assert scrape_stream._code_point(0xD800) == "\N{REPLACEMENT CHARACTER}"
+    assert scrape_stream._code_point(0x81) == "\x81"
+    assert scrape_stream._code_point(0x80) == "€"
+
+
+def test_stream_parser_handles_documents_without_a_body():
+    """Pages without a table or with trailing text parse to an empty root."""
+    assert scrape_stream.parse_document("").children == []
+    assert scrape_stream.parse_document("<p>no table</p> trailing").children == []
+    assert scrape.scrape_data(scrape_stream.parse_document("</table>")) == []
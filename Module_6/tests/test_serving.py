@@ -0,0 +1,121 @@
+"""Tests for the micro-batching model-instance pool."""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import serving
+
+pytestmark = pytest.mark.db
+
+
+def _upper_batches(batches):
+    def run_batch(instance, items):
+        batches.append((instance, list(items)))
+        return [item.upper() for item in items]
+
+    return run_batch
+
+
+def test_rows_from_separate_requests_share_a_batch():
+    """Rows submitted by concurrent requests are coalesced into one batch."""
+    batches = []
+    limits = serving.BatchLimits(max_batch=3, max_wait_s=5.0, max_queue=10)
+    pool = serving.MicroBatchPool(["m0"], _upper_batches(batches), limits)
+    futures = pool.submit(["a"]) + pool.submit(["b", "c"])
+    assert [future.result(timeout=5) for future in futures] == ["A", "B", "C"]
+    pool.close()
+    assert batches == [("m0", ["a", "b", "c"])]
+    stats = pool.stats()
+    assert stats["requests"] == 2
+    assert stats["batches"] == 1
+    assert stats["avg_batch_rows"] == 3
+    assert stats["queued"] == 0
+    assert stats["instances"] == 1
+
+
+def test_large_request_is_spread_across_instances():
+    """Each row goes to the least-loaded queue, so every instance gets work."""
+    gate = threading.Event()
+    batches = []
+
+    def run_batch(instance, items):
+        gate.wait(5)
+        batches.append((instance, list(items)))
+        return list(items)
+
+    limits = serving.BatchLimits(max_batch=1, max_wait_s=0.0, max_queue=10)
+    pool = serving.MicroBatchPool(["m0", "m1"], run_batch, limits)
+    futures = pool.submit(["a", "b", "c", "d"])
+    gate.set()
+    assert [future.result(timeout=5) for future in futures] == ["a", "b", "c", "d"]
+    pool.close()
+    assert {instance for instance, _ in batches} == {"m0", "m1"}
+
+
+def test_full_queue_rejects_whole_request():
+    """A request that does not fit is refused with a retry hint."""
+    gate = threading.Event()
+
+    def run_batch(_instance, items):
+        gate.wait(5)
+        return list(items)
+
+    limits = serving.BatchLimits(max_batch=1, max_wait_s=0.0, max_queue=2)
+    pool = serving.MicroBatchPool(["m0"], run_batch, limits)
+    futures = pool.submit(["a", "b"])
+    with pytest.raises(serving.Overloaded) as excinfo:
+        pool.submit(["c"])
+    assert excinfo.value.retry_after >= 1
+    assert pool.stats()["rejected"] == 1
+    assert pool.stats()["queued"] == 2
+    gate.set()
+    assert [future.result(timeout=5) for future in futures] == ["a", "b"]
+    pool.close()
+    assert pool.submit(["d"])  # capacity is released once rows finish
+
+
+def test_batch_errors_reach_every_caller():
+    """A failing batch sets the exception on all of its futures."""
+
+    def run_batch(_instance, items):
+        if "bad" in items:
+            raise RuntimeError("boom")
+        return items[:-1]
+
+    limits = serving.BatchLimits(max_batch=1, max_wait_s=0.0, max_queue=10)
+    pool = serving.MicroBatchPool(["m0"], run_batch, limits)
+    failed, short = pool.submit(["bad", "ok"])
+    with pytest.raises(RuntimeError, match="boom"):
+        failed.result(timeout=5)
+    with pytest.raises(ValueError, match="0 of 1"):
+        short.result(timeout=5)
+    pool.close()
+    assert pool.stats()["queued"] == 0
+
+
+def test_close_finishes_the_batch_being_collected():
+    """Shutdown during the batching window still answers the queued rows."""
+    batches = []
+    limits = serving.BatchLimits(max_batch=4, max_wait_s=5.0, max_queue=10)
+    pool = serving.MicroBatchPool(["m0"], _upper_batches(batches), limits)
+    future = pool.submit(["a"])[0]
+    pool.close()
+    assert future.result(timeout=5) == "A"
+    assert batches == [("m0", ["a"])]
+
+
+def test_retry_after_scales_with_backlog():
+    """The retry hint is the backlog in batch rounds times batch latency."""
+    pool = serving.MicroBatchPool(["m0"], _upper_batches([]), serving.BatchLimits(max_batch=2))
+    assert pool.retry_after() == 1
+    pool.counters["queued"] = 40
+    pool._batch_s = 1.5
+    assert pool.retry_after() == 30
+    pool.close()
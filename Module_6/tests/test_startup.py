@@ -0,0 +1,47 @@
+"""Tests for the warmup readiness state and phase timings."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from src.llm_hosting import startup
+
+pytestmark = pytest.mark.db
+
+
+def test_lazy_service_counts_as_ready():
+    """Before any warmup the service serves lazily and reports ready."""
+    status = startup.Startup().status()
+    assert status == {
+        "ready": True,
+        "state": "lazy",
+        "error": None,
+        "phases_s": {},
+        "total_s": 0.0,
+    }
+
+
+def test_phases_accumulate_and_failures_are_kept():
+    """Repeated phases add up, even when the block raises."""
+    tracker = startup.Startup()
+    tracker.begin()
+    assert not tracker.ready
+    with tracker.phase("model_load"):
+        pass
+    with pytest.raises(OSError):
+        with tracker.phase("model_load"):
+            raise OSError("disk")
+    assert list(tracker.phases) == ["model_load"]
+    tracker.finish("disk")
+    assert tracker.status()["state"] == "failed"
+    assert tracker.ready  # served lazily after a failed warmup
+
+    tracker.begin()
+    assert tracker.phases == {} and tracker.error is None
+    tracker.finish()
+    assert tracker.ready